@@ -1,10 +1,19 @@
 from fpdf import FPDF
+import os
+import sys
 import textwrap
 import ifcopenshell as ios
 from bonsai.bim.ifc import IfcStore
 from datetime import datetime
 import bpy
 
+# totals come from the schedule valuation of the RateListImporter rate_catalog package
+_RATE_LIST_IMPORTER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "RateListImporter")
+if _RATE_LIST_IMPORTER not in sys.path:
+    sys.path.insert(0, _RATE_LIST_IMPORTER)
+
+from rate_catalog import schedule_valuation
+
 class SchedulePDF(FPDF):
     def __init__(self, file, project, cost_schedule):
         super().__init__()
@@ -16,6 +25,8 @@ class SchedulePDF(FPDF):
         self.file = file
         self.project = project
         self.cost_schedule = cost_schedule
+        # quantities, rates and totals of the whole schedule, computed once per export
+        self.valuation = schedule_valuation(file, cost_schedule)
         
         # output parameters
         self.category_level_to_new_page = 0
@@ -196,22 +207,17 @@ class SchedulePDF(FPDF):
     
     
     def draw_cost_item_totals(self, cost_item, unit, should_print_rates=True):
-        # TODO: trovare un modo più serio per calcolare il totale della voce
         self.set_font('Arial', '', 8)
-        total_quantity = ios.util.cost.get_total_quantity(cost_item)
-        if not total_quantity: total_quantity = 0.0
-        costs = cost_item.CostValues
-        if costs:
-            cost_value = costs[0].AppliedValue
-            if cost_value:
-                cost = cost_value.wrappedValue # modificare per avere il total cost
-                total_cost = total_quantity*cost
-            else:
-                cost = 0.0
-                total_cost = 0.0
+        valuation = self.valuation
+        row = valuation.row(cost_item)
+        if row is None:
+            # not in the schedule tree: its quantity alone, without cost and total
+            total_quantity = ios.util.cost.get_total_quantity(cost_item) or 0.0
+            cost = total_cost = 0.0
         else:
-            cost = 0.0
-            total_cost = 0.0
+            total_quantity = float(valuation.quantity[row])
+            cost = float(valuation.rate[row])
+            total_cost = float(valuation.total[row])
             
         self.line(10 + sum(self.col_widths)-sum(self.col_widths[-3:]),  self.get_y(), 10 + sum(self.col_widths),  self.get_y())
         if should_print_rates == False or self.cost_schedule.PredefinedType == 'UNPRICEDBILLOFQUANTITIES':
@@ -219,29 +225,23 @@ class SchedulePDF(FPDF):
             self.add_table_row(["", "Sum "+unit, "" , "", "", "", "%.2f" % (round(total_quantity,2)),"______", "______"])
         else:
             # print rates and total
-            self.add_table_row(["", "Sum "+unit, "" , "", "", "", "%.2f" % (round(total_quantity,2)),str(cost), str(round(total_quantity*cost,2))])
+            self.add_table_row(["", "Sum "+unit, "" , "", "", "", "%.2f" % (round(total_quantity,2)),str(cost), str(round(total_cost,2))])
             
 
     def draw_summary(self):
-        """Print summary costs page TODO: finish function"""
+        """Print summary costs page"""
         self.add_page()
         self.draw_table_header()
-        root_costs = list(ios.util.cost.get_root_cost_items(self.cost_schedule))
+        valuation = self.valuation
         self.set_font('Arial', '', 10)
         counter = 1
-        total_cost = 0.0
-        for root_cost in root_costs:
-            try:
-                cost_values = ios.util.cost.get_cost_values(root_cost)
-                cost_value = cost_values[0]["label"]
-                total_cost += float(cost_value[:-8])
-            except:
-                cost_value = "0.00"
-            self.add_table_row([str(counter), root_cost.Name , "", "", "", "", "","", cost_value[:-8]])
+        for row in valuation.tree.children(-1).tolist():
+            cost_value = "%.2f" % round(float(valuation.subtotal[row]), 2)
+            self.add_table_row([str(counter), valuation.tree.items[row].Name , "", "", "", "", "","", cost_value])
             counter += 1
         self.add_table_row(["", "" , "", "", "", "", "","", ""])
         self.set_font('Arial', 'B', 10)
-        self.add_table_row(['', 'Total' , "", "", "", "", "","", "%.2f" % (round(total_cost,2))])
+        self.add_table_row(['', 'Total' , "", "", "", "", "","", "%.2f" % (round(valuation.grand_total,2))])
         self.add_table_row(["", "" , "", "", "", "", "","", ""])
         self.line(10, self.get_y(), 200, self.get_y())
     
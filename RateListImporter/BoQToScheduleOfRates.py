@@ -1,5 +1,15 @@
+import os
+import sys
+
 import bpy
 
+# schedules are walked and valued through RateListImporter's rate_catalog package
+_HERE = os.path.dirname(os.path.abspath(__file__))
+if _HERE not in sys.path:
+    sys.path.insert(0, _HERE)
+
+from rate_catalog import cost_tree, schedule_valuation, touch_cost_trees
+
 try:
     from bonsai import tool as _bonsai_tool
     _IfcOperatorBase = (_bonsai_tool.Ifc.Operator, bpy.types.Operator)
@@ -16,36 +26,15 @@ MAX_DISPLAY = 10
 # Helpers
 # ---------------------------------------------------------------------------
 
-def _get_applied_value(cost_item):
-    for cv in (cost_item.CostValues or []):
-        try:
-            v = cv.AppliedValue
-            if v is not None:
-                return float(v.wrappedValue if hasattr(v, "wrappedValue") else v)
-        except Exception:
-            pass
-    return None
-
-
-def _collect_leaf_items(schedule):
-    import ifcopenshell.util.cost
+def _get_applied_value(valuation, cost_item):
+    return valuation.rate_of(cost_item)
 
-    items = []
 
-    def traverse(cost_item):
-        children = [child for rel in (cost_item.IsNestedBy or []) for child in rel.RelatedObjects]
-        if not children:
-            items.append(cost_item)
-        for child in children:
-            traverse(child)
+def _collect_leaf_items(file, schedule):
+    return cost_tree(file, schedule).leaves()
 
-    for root_item in ifcopenshell.util.cost.get_root_cost_items(schedule):
-        traverse(root_item)
 
-    return items
-
-
-def _build_unique_items(all_items):
+def _build_unique_items(all_items, valuation):
     """
     Returns (unique_items, conflicts).
     unique_items: one representative IfcCostItem per (Identification, Name) key.
@@ -70,7 +59,7 @@ def _build_unique_items(all_items):
             continue
 
         descriptions = {item.Description or "" for item in items}
-        values = {_get_applied_value(item) for item in items}
+        values = {_get_applied_value(valuation, item) for item in items}
 
         if len(descriptions) > 1 or len(values) > 1:
             conflicts.append({
@@ -86,22 +75,10 @@ def _build_unique_items(all_items):
     return unique_items, conflicts
 
 
-def _collect_sor_items(schedule):
+def _collect_sor_items(file, schedule):
     """Return all items in the SoR as a list of (key, cost_item) tuples."""
-    import ifcopenshell.util.cost
-
-    items = []
-
-    def traverse(cost_item):
-        items.append(((cost_item.Identification or "", cost_item.Name or ""), cost_item))
-        for rel in (cost_item.IsNestedBy or []):
-            for child in rel.RelatedObjects:
-                traverse(child)
-
-    for root_item in ifcopenshell.util.cost.get_root_cost_items(schedule):
-        traverse(root_item)
-
-    return items
+    items = cost_tree(file, schedule).items
+    return [((item.Identification or "", item.Name or ""), item) for item in items]
 
 
 def _diff_text(a, b, label_a="BoQ", label_b="SoR", ctx=30):
@@ -135,15 +112,15 @@ def _format_diffs(diffs, label_boq="BoQ", label_sor="SoR"):
     return "\n\n".join(parts)
 
 
-def _compare_cost_items(boq_item, sor_item):
+def _compare_cost_items(boq_item, sor_item, boq_valuation, sor_valuation):
     """Returns list of dicts {field, boq, sor} for each differing field (empty if fully congruent)."""
     diffs = []
     boq_desc = boq_item.Description or ""
     sor_desc = sor_item.Description or ""
     if boq_desc != sor_desc:
         diffs.append({"field": "Description", "boq": boq_desc, "sor": sor_desc})
-    boq_val = _get_applied_value(boq_item)
-    sor_val = _get_applied_value(sor_item)
+    boq_val = _get_applied_value(boq_valuation, boq_item)
+    sor_val = _get_applied_value(sor_valuation, sor_item)
     if boq_val != sor_val:
         diffs.append({"field": "Value", "boq": boq_val, "sor": sor_val})
     return diffs
@@ -247,9 +224,11 @@ class BoQToSoROperator(*_IfcOperatorBase):
         global _state
         from bonsai import tool
 
-        schedule = tool.Ifc.get().by_id(int(context.scene.BIMCostProperties.active_cost_schedule_id))
-        all_items = _collect_leaf_items(schedule)
-        unique_items, conflicts = _build_unique_items(all_items)
+        file = tool.Ifc.get()
+        schedule = file.by_id(int(context.scene.BIMCostProperties.active_cost_schedule_id))
+        boq_valuation = schedule_valuation(file, schedule)
+        all_items = _collect_leaf_items(file, schedule)
+        unique_items, conflicts = _build_unique_items(all_items, boq_valuation)
 
         mode = context.scene.boq_to_sor_mode
         to_add = unique_items
@@ -261,9 +240,10 @@ class BoQToSoROperator(*_IfcOperatorBase):
         if mode == "UPDATE":
             target_id = context.scene.boq_to_sor_target_schedule
             if target_id and target_id != "0":
-                target_schedule = tool.Ifc.get().by_id(int(target_id))
+                target_schedule = file.by_id(int(target_id))
                 target_schedule_name = target_schedule.Name or f"#{target_id}"
-                sor_items = _collect_sor_items(target_schedule)
+                sor_valuation = schedule_valuation(file, target_schedule)
+                sor_items = _collect_sor_items(file, target_schedule)
                 sor_dict = {}
                 for key, item in sor_items:
                     if key not in sor_dict:
@@ -276,7 +256,7 @@ class BoQToSoROperator(*_IfcOperatorBase):
                     if key not in sor_dict:
                         to_add.append(boq_item)
                     else:
-                        diffs = _compare_cost_items(boq_item, sor_dict[key])
+                        diffs = _compare_cost_items(boq_item, sor_dict[key], boq_valuation, sor_valuation)
                         if diffs:
                             mismatched.append({"boq_item": boq_item, "sor_item": sor_dict[key], "diffs": diffs})
                         else:
@@ -294,7 +274,7 @@ class BoQToSoROperator(*_IfcOperatorBase):
                     if matches:
                         for sor_item in matches:
                             diffs = [{"field": "Name", "boq": boq_item.Name or "", "sor": sor_item.Name or ""}]
-                            diffs.extend(_compare_cost_items(boq_item, sor_item))
+                            diffs.extend(_compare_cost_items(boq_item, sor_item, boq_valuation, sor_valuation))
                             mismatched.append({"boq_item": boq_item, "sor_item": sor_item, "diffs": diffs})
                     else:
                         filtered_to_add.append(boq_item)
@@ -668,6 +648,7 @@ class BoQToSoRResolveOperator(bpy.types.Operator):
             modified += 1
 
         if modified:
+            touch_cost_trees()  # a plain operator: no transaction marks these edits
             bonsai.bim.module.cost.data.refresh()
             tool.Cost.load_cost_schedule_tree()
 
@@ -1,9 +1,18 @@
+import os
 import re
+import sys
 import json
 
 import bpy
 from bpy.types import Operator
 
+# the rate list loaded by RateListImporter is shared through its rate_catalog package
+_HERE = os.path.dirname(os.path.abspath(__file__))
+if _HERE not in sys.path:
+    sys.path.insert(0, _HERE)
+
+from rate_catalog import RateMatchIndex, loaded_catalog, schedule_valuation, touch_cost_trees
+
 try:
     from bonsai import tool as _bonsai_tool
     _IfcOperatorBase = (_bonsai_tool.Ifc.Operator, bpy.types.Operator)
@@ -16,94 +25,239 @@ except Exception:
 # Matching
 # ---------------------------------------------------------------------------
 
+_BRACKETED_CODE = re.compile(r'\[([^\]]+)\]')
+_EDITION_YEAR = re.compile(r'^([A-Z]+)\d{2}(-)')
+
+
 def _match_key(name, identification):
-    m = re.search(r'\[([^\]]+)\]', name or '')
+    m = _BRACKETED_CODE.search(name or '')
     if m:
         return m.group(1)
-    return re.sub(r'^([A-Z]+)\d{2}(-)', r'\1\2', identification or '')
+    return _EDITION_YEAR.sub(r'\1\2', identification or '')
 
 
 # ---------------------------------------------------------------------------
-# Value extraction + rate index
+# Rate index
 # ---------------------------------------------------------------------------
 
-def _get_cost_item_value(cost_item):
-    for cv in (cost_item.CostValues or []):
-        try:
-            v = cv.AppliedValue
-            if v is not None:
-                return float(v.wrappedValue if hasattr(v, 'wrappedValue') else v)
-        except Exception:
-            pass
-    return 0.0
+_rate_index = None  # (catalog version, match_key → row)
 
 
 def _build_rate_index(context):
-    """Returns dict: match_key → rate dict from the loaded rate list."""
+    """Returns (dict: match_key → row, rate(row) → rate dict) for the loaded rate list.
+
+    Keys come from the typed columns of the shared catalog and are kept
+    until another catalog is published; only the matched rows become dicts.
+    A list saved in the .blend without its catalog is decoded from the item
+    attributes instead.
+    """
+    global _rate_index
+    catalog, version = loaded_catalog()
+    if catalog is not None and len(catalog) == getattr(context.scene, "xml_rate_list_rates", -1):
+        if _rate_index is None or _rate_index[0] != version:
+            index = {}
+            for row in (~catalog.is_parent.astype(bool)).nonzero()[0].tolist():
+                key = _match_key(catalog.string("name", row), catalog.string("id", row))
+                if key and key not in index:
+                    index[key] = row
+            _rate_index = (version, index)
+        return _rate_index[1], catalog.__getitem__
+
     index = {}
-    for item in context.scene.xml_rate_list:
-        rate = json.loads(item.attributes)
-        if rate.get("is_parent"):
+    items = context.scene.xml_rate_list
+    for row, item in enumerate(items):
+        if item.is_parent:
             continue
+        rate = json.loads(item.attributes)
         key = _match_key(rate["name"], rate["id"])
         if key and key not in index:
-            index[key] = rate
-    return index
+            index[key] = row
+    return index, lambda row: json.loads(items[row].attributes)
+
+
+_match_index = None  # (catalog version, RateMatchIndex)
+
+
+def _get_match_index():
+    """RateMatchIndex over the rows of the rate index, rebuilt with it; None without a catalog."""
+    global _match_index
+    catalog, version = loaded_catalog()
+    if catalog is None or _rate_index is None or _rate_index[0] != version:
+        return None
+    if _match_index is None or _match_index[0] != version:
+        keys = list(_rate_index[1])
+        _match_index = (version, RateMatchIndex(catalog, [_rate_index[1][k] for k in keys], keys))
+    return _match_index[1]
+
+
+# ---------------------------------------------------------------------------
+# In-place value patching
+# ---------------------------------------------------------------------------
+
+def _value_shape(cost_item, with_labor):
+    """(cost value, base component, labor component) when cost_item already has the
+    structure the update writes, None when it has to be rebuilt.
+
+    Without labor that is one cost value without components; with labor one
+    ADD cost value whose two plain components are the rest and the Labor share.
+    """
+    values = cost_item.CostValues or []
+    if len(values) != 1 or values[0].UnitBasis is not None or values[0].Category:
+        return None
+    cost_value = values[0]
+    components = list(cost_value.Components or [])
+    if not with_labor:
+        return (cost_value, None, None) if not components else None
+    if len(components) != 2 or (cost_value.ArithmeticOperator or "ADD") != "ADD":
+        return None
+    if any(c.Components or c.UnitBasis is not None for c in components):
+        return None
+    labor = [c for c in components if c.Category == "Labor"]
+    base = [c for c in components if not c.Category]
+    if len(labor) != 1 or len(base) != 1:
+        return None
+    return cost_value, base[0], labor[0]
+
+
+def _set_applied_value(cost_value, value):
+    """Sets the monetary AppliedValue of cost_value; returns 1 if it changed, 0 if it already matched.
+
+    Goes through the api like the rest of the update, so the edit is part of its undo step.
+    """
+    from bonsai import tool
+    current = cost_value.AppliedValue
+    if current is not None and current.is_a("IfcMonetaryMeasure") and abs(current.wrappedValue - value) <= 1e-9:
+        return 0
+    tool.Ifc.run("cost.edit_cost_value", cost_value=cost_value, attributes={"AppliedValue": value})
+    return 1
 
 
 # ---------------------------------------------------------------------------
 # Diff computation
 # ---------------------------------------------------------------------------
 
-_preview = {"ordered": [], "to_update": []}
+_preview = {"ordered": [], "to_update": [], "summary": {}, "views": {}}
+
+PAGE_SIZE = 40
+
+
+def _set_rate(entry, rate):
+    """Matches entry to rate: new values, status and price change."""
+    new_value = float(rate["value"])
+    old_value = entry["old_value"]
+    entry["rate"] = rate
+    entry["new_identification"] = rate["id"]
+    entry["new_name"] = rate["name"]
+    entry["new_value"] = new_value
+    if abs(old_value - new_value) > 1e-6:
+        entry["status"] = "to_update"
+        entry["delta"] = new_value - old_value
+        entry["delta_pct"] = entry["delta"] / old_value * 100 if old_value else float("inf")
+    else:
+        entry["status"] = "unchanged"
+        entry["delta"] = entry["delta_pct"] = 0.0
+
+
+def _accepted_attributes(entry, rename):
+    """Cost item attributes that tie an accepted entry to its rate on the next match."""
+    rate = entry["rate"]
+    key = _match_key(rate["name"], rate["id"])
+    name = rate["name"] if rename else entry["name"]
+    if _match_key(name, rate["id"]) != key:
+        if _BRACKETED_CODE.search(name):
+            name = _BRACKETED_CODE.sub(lambda m: f"[{key}]", name, count=1)
+        else:
+            name = f"{name} [{key}]"
+    attributes = {"Identification": rate["id"]}
+    if name != entry["name"]:
+        attributes["Name"] = name
+    return attributes
+
+
+def _summarize(ordered):
+    """(entries to update, summary of counts and price changes) of the preview entries."""
+    to_update = []
+    counts = {"to_update": 0, "unchanged": 0, "not_found": 0}
+    rate_delta = amount_before = amount_after = 0.0
+    accepted = 0
+    for entry in ordered:
+        counts[entry["status"]] += 1
+        accepted += entry.get("accepted", False)
+        if entry["status"] == "to_update":
+            to_update.append(entry)
+            rate_delta += entry["delta"]
+            amount_before += entry["old_value"] * entry["quantity"]
+            amount_after += entry["new_value"] * entry["quantity"]
+    summary = {
+        "counts": counts,
+        "accepted": accepted,
+        "rate_delta": rate_delta,
+        "amount_before": amount_before,
+        "amount_after": amount_after,
+    }
+    return to_update, summary
 
 
 def _compute_diff(context):
     from bonsai import tool
-    import ifcopenshell.util.cost
     file = tool.Ifc.get()
     schedule_id = context.scene.BIMCostProperties.active_cost_schedule_id
-    schedule = file.by_id(int(schedule_id))
-    rate_index = _build_rate_index(context)
+    rate_index, rate_at = _build_rate_index(context)
 
     ordered = []
-    to_update = []
-
-    def traverse(cost_item):
+    valuation = schedule_valuation(file, int(schedule_id))
+    for cost_item, old_value, quantity in zip(
+        valuation.tree.items, valuation.rate.tolist(), valuation.quantity.tolist()
+    ):
         key = _match_key(cost_item.Name or '', cost_item.Identification or '')
-        if key:
-            old_value = _get_cost_item_value(cost_item)
-            entry = {
-                "ifc_item": cost_item,
-                "key": key,
-                "identification": cost_item.Identification or '',
-                "name": cost_item.Name or '',
-                "old_value": old_value,
-            }
-            if key in rate_index:
-                rate = rate_index[key]
-                new_value = float(rate["value"])
-                entry["rate"] = rate
-                entry["new_identification"] = rate["id"]
-                entry["new_name"] = rate["name"]
-                entry["new_value"] = new_value
-                if abs(old_value - new_value) > 1e-6:
-                    entry["status"] = "to_update"
-                    to_update.append(entry)
-                else:
-                    entry["status"] = "unchanged"
-            else:
-                entry["status"] = "not_found"
-            ordered.append(entry)
-
-        for rel in (cost_item.IsNestedBy or []):
-            for child in rel.RelatedObjects:
-                traverse(child)
-
-    for root_item in ifcopenshell.util.cost.get_root_cost_items(schedule):
-        traverse(root_item)
-
-    return {"ordered": ordered, "to_update": to_update}
+        if not key:
+            continue
+        entry = {
+            "index": len(ordered),
+            "ifc_item": cost_item,
+            "key": key,
+            "identification": cost_item.Identification or '',
+            "name": cost_item.Name or '',
+            "old_value": old_value,
+            "quantity": quantity,
+            "delta": 0.0,
+            "delta_pct": 0.0,
+        }
+        if key in rate_index:
+            _set_rate(entry, rate_at(rate_index[key]))
+        else:
+            entry["status"] = "not_found"
+        ordered.append(entry)
+
+    to_update, summary = _summarize(ordered)
+    return {"ordered": ordered, "to_update": to_update, "summary": summary, "views": {}}
+
+
+def _candidates(entry):
+    """Closest rates for a not found entry as [(catalog row, score)], looked up when first drawn."""
+    if "candidates" not in entry:
+        index = _get_match_index()
+        if index is None:
+            entry["candidates"] = []
+        else:
+            entry["candidates"] = index.candidates(entry["key"], entry["name"], entry["ifc_item"].Description or '')
+    return entry["candidates"]
+
+
+def _preview_view(status, sort):
+    """Entries of the preview with status (or all), in sort order; computed once per combination."""
+    views = _preview["views"]
+    view = views.get((status, sort))
+    if view is None:
+        entries = _preview["ordered"]
+        if status != "ALL":
+            entries = [e for e in entries if e["status"] == status]
+        if sort == "DELTA":
+            entries = sorted(entries, key=lambda e: abs(e["delta"]), reverse=True)
+        elif sort == "PERCENT":
+            entries = sorted(entries, key=lambda e: abs(e["delta_pct"]), reverse=True)
+        view = views[(status, sort)] = entries
+    return view
 
 
 # ---------------------------------------------------------------------------
@@ -126,28 +280,73 @@ class BulkUpdateCostSchedule(*_IfcOperatorBase):
         except Exception:
             return False
 
+    status_filter: bpy.props.EnumProperty(
+        name="Stato",
+        items=[
+            ("ALL", "Tutti", "All matched cost items"),
+            ("to_update", "Da aggiornare", "Cost items whose value changes"),
+            ("unchanged", "Non modificati", "Cost items already at the rate list value"),
+            ("not_found", "Non trovati", "Cost items without a rate in the list"),
+        ],
+        default="ALL",
+    )
+    sort_by: bpy.props.EnumProperty(
+        name="Ordina",
+        items=[
+            ("ORDER", "Computo", "Schedule order"),
+            ("DELTA", "Δ €", "Largest price change first"),
+            ("PERCENT", "Δ %", "Largest percentage change first"),
+        ],
+        default="ORDER",
+    )
+    page: bpy.props.IntProperty(name="Pagina", default=1, min=1)
+    rename_accepted: bpy.props.BoolProperty(
+        name="Rinomina voci accettate",
+        description="Also give the cost items of the accepted candidates the rate list name",
+        default=False,
+    )
+
     def invoke(self, context, event):
         global _preview
         _preview = _compute_diff(context)
+        self.page = 1
         return context.window_manager.invoke_props_dialog(self, width=560)
 
     def draw(self, context):
         layout = self.layout
-        ordered = _preview["ordered"]
-        to_update = _preview["to_update"]
-
-        n_update = sum(1 for e in ordered if e["status"] == "to_update")
-        n_unchanged = sum(1 for e in ordered if e["status"] == "unchanged")
-        n_not_found = sum(1 for e in ordered if e["status"] == "not_found")
+        summary = _preview["summary"]
+        counts = summary["counts"]
 
         row = layout.row()
-        row.label(text=f"Da aggiornare: {n_update}   Non modificati: {n_unchanged}   Non trovati: {n_not_found}")
+        row.label(text=f"Da aggiornare: {counts['to_update']}   Non modificati: {counts['unchanged']}"
+                       f"   Non trovati: {counts['not_found']}")
 
-        if not to_update:
+        if not _preview["to_update"] and not summary["accepted"]:
             layout.label(text="Nessuna modifica da applicare.", icon="INFO")
+        elif _preview["to_update"]:
+            impact = summary["amount_after"] - summary["amount_before"]
+            row = layout.row()
+            row.label(text=f"Δ prezzi unitari: {summary['rate_delta']:+.2f}")
+            row.label(text=f"Importo: {summary['amount_before']:.2f} → {summary['amount_after']:.2f} ({impact:+.2f})")
+
+        if summary["accepted"]:
+            row = layout.row()
+            row.label(text=f"Candidati accettati: {summary['accepted']}", icon="CHECKMARK")
+            row.prop(self, "rename_accepted")
+
+        row = layout.row(align=True)
+        row.prop(self, "status_filter", text="")
+        row.prop(self, "sort_by", text="")
+
+        view = _preview_view(self.status_filter, self.sort_by)
+        pages = max(1, -(-len(view) // PAGE_SIZE))
+        page = min(self.page, pages)
+        row = layout.row(align=True)
+        row.prop(self, "page")
+        row.label(text=f"di {pages}   ({len(view)} voci)")
 
         box = layout.box()
-        for entry in ordered:
+        for entry in view[(page - 1) * PAGE_SIZE:page * PAGE_SIZE]:
             split = box.split(factor=0.28)
             col_id = split.row()
             split2 = split.split(factor=0.52)
@@ -155,11 +354,13 @@ class BulkUpdateCostSchedule(*_IfcOperatorBase):
             col_val = split2.row()
 
             status = entry["status"]
-            col_id.label(text=entry["identification"][:24])
+            col_id.label(text=entry["identification"][:24], icon="CHECKMARK" if entry.get("accepted") else "NONE")
             col_name.label(text=entry["name"][:38])
 
             if status == "to_update":
-                col_val.label(text=f"{entry['old_value']:.2f} → {entry['new_value']:.2f}")
+                pct = entry["delta_pct"]
+                pct = f" ({pct:+.1f}%)" if pct != float("inf") else ""
+                col_val.label(text=f"{entry['old_value']:.2f} → {entry['new_value']:.2f}{pct}")
             elif status == "unchanged":
                 col_id.enabled = False
                 col_name.enabled = False
@@ -168,6 +369,16 @@ class BulkUpdateCostSchedule(*_IfcOperatorBase):
             else:
                 col_val.alert = True
                 col_val.label(text="non trovato")
+                catalog = loaded_catalog()[0]
+                for row_index, score in _candidates(entry):
+                    sub = box.split(factor=0.28)
+                    sub.label(text="")
+                    sub = sub.split(factor=0.82)
+                    sub.label(text=f"{catalog.string('id', row_index)}  {catalog.string('name', row_index)}"[:56],
+                              icon="RIGHTARROW_THIN")
+                    op = sub.operator(BulkUpdateAcceptCandidate.bl_idname, text=f"{score:.0%}", icon="CHECKMARK")
+                    op.entry = entry["index"]
+                    op.row = row_index
 
     def _execute(self, context):
         from bonsai import tool
@@ -177,35 +388,82 @@ class BulkUpdateCostSchedule(*_IfcOperatorBase):
                 remove_deep(cost_value, component)
             tool.Ifc.run("cost.remove_cost_value", parent=parent, cost_value=cost_value)
 
-        count = 0
+        count = created = edited = 0
         for entry in _preview["to_update"]:
             ifc_item = entry["ifc_item"]
             rate = entry["rate"]
+            value = float(rate["value"])
+            labor = float(rate["labor"])
+
+            shape = _value_shape(ifc_item, with_labor=labor != 0.0)
+            if shape is not None:
+                # same structure as the one written below: patch the amounts only
+                cost_value, base, labor_value = shape
+                edited += _set_applied_value(cost_value, value)
+                if labor_value is not None:
+                    edited += _set_applied_value(base, value - labor)
+                    edited += _set_applied_value(labor_value, labor)
+                count += 1
+                continue
 
             for cv in list(ifc_item.CostValues or []):
                 remove_deep(ifc_item, cv)
 
             cost_value = tool.Ifc.run("cost.add_cost_value", parent=ifc_item)
+            created += 1
 
-            if float(rate["labor"]) != 0.0:
+            if labor != 0.0:
                 tool.Ifc.run("cost.edit_cost_value", cost_value=cost_value, attributes={
-                    "AppliedValue": rate["value"],
+                    "AppliedValue": value,
                     "ArithmeticOperator": "ADD",
                 })
                 sub1 = tool.Ifc.run("cost.add_cost_value", parent=cost_value)
                 sub2 = tool.Ifc.run("cost.add_cost_value", parent=cost_value)
                 tool.Ifc.run("cost.edit_cost_value", cost_value=sub1,
-                    attributes={"AppliedValue": rate["value"] - rate["labor"]})
+                    attributes={"AppliedValue": value - labor})
                 tool.Ifc.run("cost.edit_cost_value", cost_value=sub2,
-                    attributes={"Category": "Labor", "AppliedValue": rate["labor"]})
+                    attributes={"Category": "Labor", "AppliedValue": labor})
+                created += 2
             else:
                 tool.Ifc.run("cost.edit_cost_value", cost_value=cost_value,
-                    attributes={"AppliedValue": rate["value"]})
+                    attributes={"AppliedValue": value})
 
             count += 1
 
+        # accepted candidates carry the rate id (and name) so the next match finds them by key
+        accepted = 0
+        for entry in _preview["ordered"]:
+            if entry.get("accepted"):
+                tool.Ifc.run("cost.edit_cost_item", cost_item=entry["ifc_item"],
+                    attributes=_accepted_attributes(entry, self.rename_accepted))
+                accepted += 1
+
+        touch_cost_trees()
         tool.Cost.load_cost_schedule_tree()
-        self.report({'INFO'}, f"Updated {count} cost items.")
+        self.report({'INFO'}, f"Updated {count} cost items: {edited} cost values edited, {created} created, "
+                              f"{accepted} accepted candidates linked.")
+
+
+class BulkUpdateAcceptCandidate(Operator):
+    """Use this rate for the cost item"""
+
+    bl_idname = "bim.bulk_update_accept_candidate"
+    bl_label = ""
+    bl_options = {"INTERNAL"}
+
+    entry: bpy.props.IntProperty()
+    row: bpy.props.IntProperty()
+
+    def execute(self, context):
+        catalog = loaded_catalog()[0]
+        if catalog is None or not 0 <= self.entry < len(_preview["ordered"]):
+            return {"CANCELLED"}
+        entry = _preview["ordered"][self.entry]
+        _set_rate(entry, catalog[self.row])
+        entry["accepted"] = True
+        _preview["to_update"], _preview["summary"] = _summarize(_preview["ordered"])
+        _preview["views"] = {}
+        return {"FINISHED"}
 
 
 # ---------------------------------------------------------------------------
@@ -230,6 +488,7 @@ class BulkUpdatePanel(bpy.types.Panel):
 
 classes = [
     BulkUpdateCostSchedule,
+    BulkUpdateAcceptCandidate,
     BulkUpdatePanel,
 ]
 
@@ -1,1034 +1,32 @@
-from typing import Union, List, TypedDict
-
 import bpy
 from bpy_extras.io_utils import ImportHelper
 from bpy.types import Operator
 
+import os
+import sys
 import textwrap
 import json
-
-
-class XmlRateItem(TypedDict):
-    index: int
-    level: int
-    is_parent: bool
-    parents: str
-    id: str
-    name: str
-    desc: str
-    unit: str
-    value: float
-    labor: float
-    equipment: float
-    materials: float
-    safety: float
-
-
-class PriceListParser:
-    title: str
-    desc: str
-    year: str
-    language: []
-    xml_rate_list: List[XmlRateItem]
-
-    def __init__(self):
-        self.xml_rate_list = []
-        self.title = ""
-        self.year = ""
-
-    @staticmethod
-    def get_xml_content(filename):
-        with open(filename, "r", errors="ignore", encoding="utf8") as file:
-            data = file.read()
-        return data
-
-    def parse_header(self, root):
-        # module to be implemented by each importer classes
-        pass
-
-    def parse_items(self, xml_content):
-        # module to be implemented by each importer classes
-        pass
-
-    def clean_xml_content(self, data):
-        import re
-
-        # clean non printable characters
-        return re.sub(r"[\x00-\x08\x0B\x0C\x0E-\x1F\x7F]", "", data)
-
-    def get_stripped_xml_namespaces_root(self, data):
-        import xml.etree.ElementTree as ET
-        from io import StringIO
-
-        it = ET.iterparse(StringIO(data))
-        for _, el in it:
-            if isinstance(el.tag, str) and "}" in el.tag:
-                el.tag = el.tag.rpartition("}")[-1]
-        return it.root
-
-    def get_root(self, data):
-        import xml.etree.ElementTree as ET
-        from io import StringIO
-
-        tree = ET.parse(StringIO(data))
-        return tree.getroot()
-
-    def clean_string(self, text):
-        # sistema_cose (da Leeno)
-        text = text.replace("\t", " ").replace("Ã¨", "è").replace("", "")
-        text = text.replace("Â°", "°").replace("Ã", "à").replace(" $", "")
-        text = text.replace("Ó", "à").replace("Þ", "é").replace("&#x13;", "")
-        text = text.replace("&#xD;&#xA;", "").replace("&#xA;", "")
-        text = text.replace("&apos;", "'").replace("&#x3;&#x1;", "")
-        text = text.replace("\n \n", "\n")
-        while "  " in text:
-            text = text.replace("  ", " ")
-        while "\n\n" in text:
-            text = text.replace("\n\n", "\n")
-        return text.strip()
-
-
-class ParserXmlVeneto(PriceListParser):
-    def parse_items(self, xml_content):
-        xml_content = self.clean_xml_content(xml_content)
-        root = self.get_stripped_xml_namespaces_root(xml_content)
-        index = 0
-        settori = root.findall("settore")
-        for settore in settori:
-            self.xml_rate_list.append(
-                {
-                    "index": index,
-                    "level": 0,
-                    "is_parent": True,
-                    "parents": "",
-                    "id": settore.attrib.get("cod", ""),
-                    "name": settore.attrib.get("desc", ""),
-                    "desc": "",
-                    "unit": "",
-                    "value": 0.0,
-                    "labor": 0.0,
-                    "equipment": 0.0,
-                    "materials": 0.0,
-                    "safety": 0.0,
-                }
-            )
-            n_settore = index
-            index += 1
-            for capitolo in settore.findall("capitolo"):
-                self.xml_rate_list.append(
-                    {
-                        "index": index,
-                        "level": 1,
-                        "is_parent": True,
-                        "parents": str(n_settore),
-                        "id": capitolo.attrib.get("cod", ""),
-                        "name": capitolo.attrib.get("desc", ""),
-                        "desc": "",
-                        "unit": "",
-                        "value": 0.0,
-                        "labor": 0.0,
-                        "equipment": 0.0,
-                        "materials": 0.0,
-                        "safety": 0.0,
-                    }
-                )
-                n_capitolo = index
-                index += 1
-                for paragrafo in capitolo.findall("paragrafo"):
-                    children = list(paragrafo)
-                    para_name = (children[0].text or "") if len(children) > 0 else ""
-                    para_desc = (children[1].text or "") if len(children) > 1 else ""
-                    self.xml_rate_list.append(
-                        {
-                            "index": index,
-                            "level": 2,
-                            "is_parent": True,
-                            "parents": str(n_settore) + "," + str(n_capitolo),
-                            "id": paragrafo.attrib.get("cod", ""),
-                            "name": para_name,
-                            "desc": para_desc,
-                            "unit": "",
-                            "value": 0.0,
-                            "labor": 0.0,
-                            "equipment": 0.0,
-                            "materials": 0.0,
-                            "safety": 0.0,
-                        }
-                    )
-                    prezzi = paragrafo.findall(".//prezzo")
-                    n_paragrafo = index
-                    index += 1
-                    for prezzo in prezzi:
-                        try:
-                            val = float(prezzo.attrib.get("val", 0))
-                        except (ValueError, TypeError):
-                            val = 0.0
-                        try:
-                            labor = float(prezzo.attrib.get("man", 0)) * val / 100
-                        except (ValueError, TypeError):
-                            labor = 0.0
-                        self.xml_rate_list.append(
-                            {
-                                "index": index,
-                                "level": 3,
-                                "is_parent": False,
-                                "parents": str(n_settore)
-                                + ","
-                                + str(n_capitolo)
-                                + ","
-                                + str(n_paragrafo),
-                                "id": prezzo.attrib.get("cod", ""),
-                                "name": prezzo.text or "",
-                                "desc": para_desc,
-                                "unit": prezzo.attrib.get("umi", ""),
-                                "value": val,
-                                "labor": labor,
-                                "equipment": 0.0,
-                                "materials": 0.0,
-                                "safety": 0.0,
-                            }
-                        )
-                        index += 1
-
-
-class ParserXmlBasilicata(PriceListParser):
-    """Parser per formato XML Basilicata (struttura gerarchica capitoli/categorie/voci/sottovoci)."""
-
-    def parse_items(self, xml_content):
-        xml_content = self.clean_xml_content(xml_content)
-        root = self.get_stripped_xml_namespaces_root(xml_content)
-
-        pdf_el = root.find('pdf')
-        if pdf_el is not None and pdf_el.text:
-            titolo = pdf_el.text
-            if titolo.endswith('.pdf'):
-                titolo = titolo[:-4]
-            self.title = ' '.join(titolo.split('_'))
-
-        capitoli = root.find('capitoli')
-        if capitoli is None:
-            return
-
-        index = 0
-
-        for capitolo in capitoli:
-            codice_sc = (capitolo.findtext('codice') or '').strip()
-            desc_sc = (capitolo.findtext('descrizione') or '').strip()
-            self.xml_rate_list.append({
-                "index": index, "level": 0, "is_parent": True, "parents": "",
-                "id": codice_sc, "name": desc_sc, "desc": "", "unit": "",
-                "value": 0.0, "labor": 0.0, "equipment": 0.0, "materials": 0.0, "safety": 0.0,
-            })
-            sc_idx = index
-            index += 1
-
-            categorie = capitolo.find('categorie')
-            if categorie is None:
-                continue
-
-            for categoria in categorie:
-                codice_cat_raw = (categoria.findtext('codice') or '').strip()
-                codice_cat = codice_sc + '.' + codice_cat_raw
-                desc_cat = (categoria.findtext('descrizione') or '').strip()
-                self.xml_rate_list.append({
-                    "index": index, "level": 1, "is_parent": True, "parents": str(sc_idx),
-                    "id": codice_cat, "name": desc_cat, "desc": "", "unit": "",
-                    "value": 0.0, "labor": 0.0, "equipment": 0.0, "materials": 0.0, "safety": 0.0,
-                })
-                cat_idx = index
-                index += 1
-
-                voci = categoria.find('voci')
-                if voci is None:
-                    continue
-
-                for voce in voci:
-                    codice_v = (voce.findtext('codice') or '').strip()
-                    codice_voce = codice_cat + '.' + codice_v
-                    voce_desc = (voce.findtext('descrizione') or '').strip()
-
-                    sottovoci = voce.find('sottovoci')
-                    if sottovoci is None:
-                        continue
-
-                    for sottovoce in sottovoci:
-                        codice_sv = (sottovoce.findtext('codice') or '').strip()
-                        sv_desc = (sottovoce.findtext('descrizione') or '').strip()
-                        codice = codice_voce + '.' + codice_sv
-                        desc = self.clean_string(voce_desc + ('\n- ' + sv_desc if sv_desc else ''))
-
-                        um_el = sottovoce.find('unitaMisura')
-                        um = ''
-                        if um_el is not None:
-                            um = (um_el.findtext('codice') or '').strip()
-
-                        prezzo = 0.0
-                        try:
-                            prezzo = float(sottovoce.findtext('prezzo') or 0)
-                        except (ValueError, TypeError):
-                            pass
-
-                        labor = 0.0
-                        try:
-                            labor = float(sottovoce.findtext('manodopera') or 0) * prezzo / 100
-                        except (ValueError, TypeError):
-                            pass
-
-                        self.xml_rate_list.append({
-                            "index": index, "level": 2, "is_parent": False,
-                            "parents": str(sc_idx) + ',' + str(cat_idx),
-                            "id": codice, "name": desc, "desc": desc, "unit": um,
-                            "value": prezzo, "labor": labor,
-                            "equipment": 0.0, "materials": 0.0, "safety": 0.0,
-                        })
-                        index += 1
-
-
-class ParserXmlToscana(PriceListParser):
-    """Parser per formato XML Toscana (PRT/EASY namespace variants).
-    Usato anche da Calabria, Campania, Sardegna."""
-
-    def parse_items(self, xml_content):
-        xml_content = self.clean_xml_content(xml_content)
-        xml_content = self._fix_namespace(xml_content)
-        root = self.get_stripped_xml_namespaces_root(xml_content)
-
-        intestazione = root.find('intestazione')
-        if intestazione is not None:
-            dettaglio = intestazione.find('dettaglio')
-            if dettaglio is not None:
-                anno = dettaglio.attrib.get('anno', '')
-                area = dettaglio.attrib.get('area', '')
-                self.title = f"{area} {anno}".strip()
-                self.year = anno
-
-        contenuto = root.find('Contenuto')
-        if contenuto is None:
-            return
-        articoli = contenuto.findall('Articolo')
-
-        index = 0
-        supercat_idx = {}
-        cat_idx = {}
-
-        for articolo in articoli:
-            codice = articolo.attrib.get('codice', '').strip()
-            if not codice:
-                continue
-            parts = codice.split('.')
-            if len(parts) < 2:
-                continue
-            codice_sc = parts[0]
-            codice_cat = parts[0] + '.' + parts[1]
-
-            supercat = (articolo.findtext('tipo') or articolo.findtext('livello1') or '').strip()
-            cat = (articolo.findtext('capitolo') or articolo.findtext('livello2') or '').strip()
-
-            if codice_sc not in supercat_idx:
-                self.xml_rate_list.append({
-                    "index": index, "level": 0, "is_parent": True, "parents": "",
-                    "id": codice_sc, "name": supercat or codice_sc, "desc": "", "unit": "",
-                    "value": 0.0, "labor": 0.0, "equipment": 0.0, "materials": 0.0, "safety": 0.0,
-                })
-                supercat_idx[codice_sc] = index
-                index += 1
-
-            if codice_cat not in cat_idx:
-                self.xml_rate_list.append({
-                    "index": index, "level": 1, "is_parent": True,
-                    "parents": str(supercat_idx[codice_sc]),
-                    "id": codice_cat, "name": cat or codice_cat, "desc": "", "unit": "",
-                    "value": 0.0, "labor": 0.0, "equipment": 0.0, "materials": 0.0, "safety": 0.0,
-                })
-                cat_idx[codice_cat] = index
-                index += 1
-
-            voce = (articolo.findtext('voce') or articolo.findtext('livello3') or '').strip()
-            art = (articolo.findtext('articolo') or articolo.findtext('livello4') or '').strip()
-            desc = self.clean_string(voce + ('\n' + art if art else ''))
-
-            um_el = articolo.find('um')
-            um = (um_el.text or '').strip() if um_el is not None else ''
-            prezzo = self._parse_price(articolo.findtext('prezzo') or '')
-
-            labor = 0.0
-            safety = 0.0
-            analisi = articolo.find('Analisi')
-            if analisi is not None:
-                try:
-                    safety = float(analisi.find('onerisicurezza').attrib.get('valore', 0))
-                except Exception:
-                    pass
-                try:
-                    labor = float(analisi.find('incidenzamanodopera').attrib.get('percentuale', 0)) * prezzo / 100
-                except Exception:
-                    pass
-
-            self.xml_rate_list.append({
-                "index": index, "level": 2, "is_parent": False,
-                "parents": str(supercat_idx[codice_sc]) + ',' + str(cat_idx[codice_cat]),
-                "id": codice, "name": desc, "desc": desc, "unit": um,
-                "value": prezzo, "labor": labor, "equipment": 0.0, "materials": 0.0, "safety": safety,
-            })
-            index += 1
-
-    @staticmethod
-    def _fix_namespace(data):
-        if '<EASY:' in data and 'xmlns:EASY=' not in data:
-            tag = '<EASY:Prezzario>'
-            pos = data.find(tag)
-            if pos >= 0:
-                ins = pos + len(tag) - 1
-                data = data[:ins] + ' xmlns:EASY="mynamespace"' + data[ins:]
-        if '<PRT:' in data and 'xmlns:PRT=' not in data:
-            tag = '<PRT:Prezzario>'
-            pos = data.find(tag)
-            if pos >= 0:
-                ins = pos + len(tag) - 1
-                data = data[:ins] + ' xmlns:PRT="mynamespace"' + data[ins:]
-        return data
-
-    @staticmethod
-    def _parse_price(text):
-        if not text:
-            return 0.0
-        text = text.strip().replace(',', '.')
-        parts = text.split('.')
-        if len(parts) > 2:
-            text = ''.join(parts[:-1]) + '.' + parts[-1]
-        try:
-            return float(text)
-        except ValueError:
-            return 0.0
-
-
-class ParserXmlLiguria(PriceListParser):
-    """Parser per formato XML Liguria (stessa struttura Toscana, differenze nei campi)."""
-
-    def parse_items(self, xml_content):
-        xml_content = self.clean_xml_content(xml_content)
-        root = self.get_stripped_xml_namespaces_root(xml_content)
-
-        intestazione = root.find('intestazione')
-        if intestazione is not None:
-            dettaglio = intestazione.find('dettaglio')
-            if dettaglio is not None:
-                anno = dettaglio.attrib.get('anno', '')
-                area = dettaglio.attrib.get('area', '')
-                self.title = f"{area} {anno}".strip()
-                self.year = anno
-
-        contenuto = root.find('Contenuto')
-        if contenuto is None:
-            return
-        articoli = contenuto.findall('Articolo')
-
-        index = 0
-        supercat_idx = {}
-        cat_idx = {}
-
-        for articolo in articoli:
-            codice = articolo.attrib.get('codice', '').strip()
-            if not codice:
-                continue
-            parts = codice.split('.')
-            if len(parts) < 2:
-                continue
-            codice_sc = parts[0]
-            codice_cat = parts[0] + '.' + parts[1]
-
-            tipo_el = articolo.find('tipo')
-            supercat = (tipo_el.text or '').strip() if tipo_el is not None else ''
-            cap_el = articolo.find('capitolo')
-            cat = (cap_el.text or '').strip() if cap_el is not None else ''
-
-            if codice_sc not in supercat_idx:
-                self.xml_rate_list.append({
-                    "index": index, "level": 0, "is_parent": True, "parents": "",
-                    "id": codice_sc, "name": supercat or codice_sc, "desc": "", "unit": "",
-                    "value": 0.0, "labor": 0.0, "equipment": 0.0, "materials": 0.0, "safety": 0.0,
-                })
-                supercat_idx[codice_sc] = index
-                index += 1
-
-            if codice_cat not in cat_idx:
-                self.xml_rate_list.append({
-                    "index": index, "level": 1, "is_parent": True,
-                    "parents": str(supercat_idx[codice_sc]),
-                    "id": codice_cat, "name": cat or codice_cat, "desc": "", "unit": "",
-                    "value": 0.0, "labor": 0.0, "equipment": 0.0, "materials": 0.0, "safety": 0.0,
-                })
-                cat_idx[codice_cat] = index
-                index += 1
-
-            voce_el = articolo.find('voce')
-            voce = (voce_el.text or '').strip() if voce_el is not None else ''
-            art_el = articolo.find('articolo')
-            art = (art_el.text or '').strip() if art_el is not None else ''
-            desc = self.clean_string(voce + ('\n- ' + art if art else ''))
-
-            um_el = articolo.find('um')
-            um = ''
-            if um_el is not None and um_el.text:
-                um = um_el.text.split('(')[-1].rstrip(')').strip()
-
-            prezzo_el = articolo.find('prezzo')
-            prezzo = 0.0
-            if prezzo_el is not None:
-                try:
-                    prezzo = float(prezzo_el.attrib.get('valore', 0))
-                except (ValueError, TypeError):
-                    pass
-
-            labor = 0.0
-            mo_el = articolo.find('mo')
-            if mo_el is not None and mo_el.text:
-                try:
-                    labor = float(mo_el.text) * prezzo / 100
-                except (ValueError, TypeError):
-                    pass
-
-            safety = 0.0
-            sic_el = articolo.find('sicurezza')
-            if sic_el is not None and sic_el.text:
-                try:
-                    safety = float(sic_el.text)
-                except (ValueError, TypeError):
-                    pass
-
-            self.xml_rate_list.append({
-                "index": index, "level": 2, "is_parent": False,
-                "parents": str(supercat_idx[codice_sc]) + ',' + str(cat_idx[codice_cat]),
-                "id": codice, "name": desc, "desc": desc, "unit": um,
-                "value": prezzo, "labor": labor, "equipment": 0.0, "materials": 0.0, "safety": safety,
-            })
-            index += 1
-
-
-class ParserXmlLombardia(PriceListParser):
-    def parse_items(self, xml_content):
-        xml_content = self.clean_xml_content(xml_content)
-        root = self.get_stripped_xml_namespaces_root(xml_content)
-        if root.find("voci/voci") is not None:
-            self._parse_format1(root)
-        else:
-            self._parse_format2(root)
-
-    def _parse_format1(self, root):
-        voci_voci = root.find("voci/voci")
-        rifvoce = voci_voci.find("riferimenti_voce") if voci_voci is not None else None
-        if rifvoce is not None:
-            import re
-            parts = [rifvoce.find(t) for t in ("autore", "invigore", "anno")]
-            self.title = " ".join(p.text for p in parts if p is not None and p.text)
-            anno = rifvoce.find("anno")
-            if anno is not None and anno.text:
-                m = re.search(r"\b(\d{4})\b", anno.text)
-                self.year = m.group(1) if m else ""
-
-        voci = root.find("voci")
-        if voci is None:
-            return
-
-        index = 0
-        level1_idx = {}   # codifica_I → list index
-        level2_idx = {}   # (codifica_I, codifica_II) → list index
-
-        for voce in voci:
-            children = list(voce)
-            if len(children) < 2:
-                continue
-            det = children[1]
-
-            codice = det.attrib.get("CMPcodifica_voce") or det.attrib.get("codice_voce", "")
-            desc_el = det.find("declaratoria_voce")
-            desc = self.clean_string(desc_el.text if desc_el is not None else "")
-            um = det.attrib.get("udm_voce") or det.attrib.get("unita_misura_voce", "")
-
-            try:
-                prezzo = float(det.attrib.get("prezzo_voce", 0))
-            except ValueError:
-                prezzo = 0.0
-
-            labor = 0.0
-            try:
-                labor = float(det.attrib.get("rapporto_RU_voce", 0)) * prezzo / 100
-            except ValueError:
-                pass
-            if not labor:
-                risorse = det.find("risorse")
-                if risorse is not None:
-                    for el in risorse:
-                        if el.attrib.get("tipologia_risorsa") == "MANODOPERA":
-                            try:
-                                labor = float(el.attrib.get("perc_importo_tipo_risorsa", 0)) * prezzo / 100
-                            except ValueError:
-                                pass
-                            break
-
-            lvl1_cod = det.attrib.get("codifica_I_livello_voce", "")
-            lvl1_des = det.attrib.get("declaratoria_I_livello_voce", "")
-            lvl2_cod = det.attrib.get("codifica_II_livello_voce", "")
-            lvl2_des = det.attrib.get("declaratoria_II_livello_voce", "")
-
-            if lvl1_cod and lvl1_cod not in level1_idx:
-                self.xml_rate_list.append({
-                    "index": index, "level": 0, "is_parent": True, "parents": "",
-                    "id": lvl1_cod, "name": lvl1_des, "desc": "", "unit": "",
-                    "value": 0.0, "labor": 0.0, "equipment": 0.0, "materials": 0.0, "safety": 0.0,
-                })
-                level1_idx[lvl1_cod] = index
-                index += 1
-
-            key2 = (lvl1_cod, lvl2_cod)
-            if lvl2_cod and lvl2_cod != lvl1_cod and key2 not in level2_idx:
-                sp_parent = str(level1_idx[lvl1_cod]) if lvl1_cod in level1_idx else ""
-                self.xml_rate_list.append({
-                    "index": index, "level": 1 if sp_parent else 0,
-                    "is_parent": True, "parents": sp_parent,
-                    "id": lvl2_cod, "name": lvl2_des, "desc": "", "unit": "",
-                    "value": 0.0, "labor": 0.0, "equipment": 0.0, "materials": 0.0, "safety": 0.0,
-                })
-                level2_idx[key2] = index
-                index += 1
-
-            parents_parts = []
-            if lvl1_cod in level1_idx:
-                parents_parts.append(str(level1_idx[lvl1_cod]))
-            if key2 in level2_idx:
-                parents_parts.append(str(level2_idx[key2]))
-
-            self.xml_rate_list.append({
-                "index": index, "level": len(parents_parts), "is_parent": False,
-                "parents": ",".join(parents_parts),
-                "id": codice, "name": desc, "desc": desc, "unit": um,
-                "value": prezzo, "labor": labor,
-                "equipment": 0.0, "materials": 0.0, "safety": 0.0,
-            })
-            index += 1
-
-    def _parse_format2(self, root):
-        try:
-            attrs = root.items()
-            if attrs:
-                self.title = attrs[0][-1].split(".")[0].replace(":", "_")
-        except Exception:
-            pass
-
-        index = 0
-        madre_index = None
-
-        for voce in list(root):
-            codice_el = voce.find("Codice")
-            if codice_el is None:
-                continue
-            codice = (codice_el.text or "").split(" - ")[0].strip()
-
-            desc_el = voce.find("Declaratoria")
-            desc = self.clean_string(desc_el.text if desc_el is not None else "")
-
-            um_el = voce.find("UM")
-            um = (um_el.text or "").strip() if um_el is not None else ""
-
-            if not um:
-                self.xml_rate_list.append({
-                    "index": index, "level": 0, "is_parent": True, "parents": "",
-                    "id": codice, "name": desc, "desc": desc, "unit": "",
-                    "value": 0.0, "labor": 0.0, "equipment": 0.0, "materials": 0.0, "safety": 0.0,
-                })
-                madre_index = index
-                index += 1
-            else:
-                prezzo = 0.0
-                try:
-                    t = voce.find("Prezzo").text.strip().replace(" €", "").replace(".", "").replace(",", ".")
-                    prezzo = float(t) if t else 0.0
-                except Exception:
-                    pass
-
-                labor = 0.0
-                try:
-                    t = voce.find("Rapporto_RU").text.strip().replace(" €", "").replace(".", "").replace(",", ".")
-                    labor = float(t) if t else 0.0
-                except Exception:
-                    pass
-
-                parents = str(madre_index) if madre_index is not None else ""
-                self.xml_rate_list.append({
-                    "index": index, "level": 1 if parents else 0, "is_parent": False,
-                    "parents": parents,
-                    "id": codice, "name": desc, "desc": desc, "unit": um,
-                    "value": prezzo, "labor": labor,
-                    "equipment": 0.0, "materials": 0.0, "safety": 0.0,
-                })
-                index += 1
-
-
-
-
-class ParserXpwe(PriceListParser):
-    """Parser per formato XPWE (Primus e compatibili)."""
-
-    @staticmethod
-    def _text(elem, path, default=""):
-        try:
-            found = elem.find(path)
-            return (found.text or default) if found is not None else default
-        except Exception:
-            return default
-
-    @staticmethod
-    def _float(text):
-        if not text:
-            return 0.0
-        try:
-            return float(text.replace(",", "."))
-        except (ValueError, TypeError):
-            return 0.0
-
-    def parse_items(self, xml_content):
-        xml_content = self.clean_xml_content(xml_content)
-        root = self.get_root(xml_content)
-
-        dati = root.find("PweDatiGenerali")
-        if dati is None:
-            try:
-                dati = list(root)[0].find("PweDatiGenerali")
-            except Exception:
-                return
-
-        self._parse_header(dati)
-        supercaps, caps = self._read_categories(dati)
-
-        misurazioni = root.find("PweMisurazioni")
-        if misurazioni is None:
-            try:
-                misurazioni = list(root)[0].find("PweMisurazioni")
-            except Exception:
-                return
-        if misurazioni is None or len(list(misurazioni)) == 0:
-            return
-
-        ep_root = list(misurazioni)[0]  # PweElencoPrezzi
-        ep_elements = ep_root.findall("EPItem")
-
-        index = 0
-        spcap_to_index = {}  # SuperCapitolo ID → list index
-        cap_to_index = {}    # (id_spcap, id_cap) → list index
-
-        for ep in ep_elements:
-            if not ep.get("ID"):
-                continue
-
-            tariffa = self._text(ep, "Tariffa")
-            if self._text(ep, "Flags") == "134217728":
-                tariffa = "VDS_" + tariffa
-
-            name = self.clean_string(self._text(ep, "DesBreve") or self._text(ep, "DesRidotta"))
-            desc = self.clean_string(self._text(ep, "DesEstesa"))
-            unit = self._text(ep, "UnMisura")
-            prezzo_raw = self._text(ep, "Prezzo1")
-            prezzo = self._float(prezzo_raw) if prezzo_raw and prezzo_raw != "0" else 0.0
-
-            def incidenza(tag):
-                val = self._float(self._text(ep, tag))
-                return round(val * prezzo / 100, 6) if val else 0.0
-
-            id_spcap = self._text(ep, "IDSpCap")
-            id_cap = self._text(ep, "IDCap")
-
-            # create SuperCapitolo on first encounter
-            if id_spcap and id_spcap not in spcap_to_index:
-                sc = supercaps.get(id_spcap, {})
-                self.xml_rate_list.append({
-                    "index": index, "level": 0, "is_parent": True, "parents": "",
-                    "id": sc.get("codice", ""), "name": sc.get("desc", ""),
-                    "desc": "", "unit": "", "value": 0.0,
-                    "labor": 0.0, "equipment": 0.0, "materials": 0.0, "safety": 0.0,
-                })
-                spcap_to_index[id_spcap] = index
-                index += 1
-
-            # create Capitolo on first encounter
-            cap_key = (id_spcap, id_cap)
-            if id_cap and cap_key not in cap_to_index:
-                cap = caps.get(id_cap, {})
-                sp_parent = str(spcap_to_index[id_spcap]) if id_spcap in spcap_to_index else ""
-                self.xml_rate_list.append({
-                    "index": index, "level": 1 if sp_parent else 0,
-                    "is_parent": True, "parents": sp_parent,
-                    "id": cap.get("codice", ""), "name": cap.get("desc", ""),
-                    "desc": "", "unit": "", "value": 0.0,
-                    "labor": 0.0, "equipment": 0.0, "materials": 0.0, "safety": 0.0,
-                })
-                cap_to_index[cap_key] = index
-                index += 1
-
-            # build parents list for EPItem
-            parents_parts = []
-            if id_spcap in spcap_to_index:
-                parents_parts.append(str(spcap_to_index[id_spcap]))
-            if cap_key in cap_to_index:
-                parents_parts.append(str(cap_to_index[cap_key]))
-
-            self.xml_rate_list.append({
-                "index": index,
-                "level": len(parents_parts),
-                "is_parent": False,
-                "parents": ",".join(parents_parts),
-                "id": tariffa,
-                "name": name,
-                "desc": desc,
-                "unit": unit,
-                "value": prezzo,
-                "labor": incidenza("IncMDO"),
-                "equipment": incidenza("IncATTR"),
-                "materials": incidenza("IncMAT"),
-                "safety": incidenza("IncSIC"),
-            })
-            index += 1
-
-    def _parse_header(self, dati):
-        try:
-            child = list(dati)[0]
-            content = list(child)[0] if list(child) else child
-            oggetto = self._text(content, "Oggetto")
-            if oggetto:
-                self.title = self.clean_string(oggetto)
-        except Exception:
-            pass
-
-    @staticmethod
-    def _read_categories(dati):
-        supercaps = {}
-        caps = {}
-        try:
-            cap_cat = dati.find("PweDGCapitoliCategorie")
-            if cap_cat is None:
-                return supercaps, caps
-
-            sc_found = cap_cat.find("PweDGSuperCapitoli")
-            if sc_found is not None:
-                for elem in sc_found:
-                    sc_id = elem.get("ID")
-                    if sc_id:
-                        supercaps[sc_id] = {
-                            "codice": ParserXpwe._text(elem, "Codice"),
-                            "desc": ParserXpwe._text(elem, "DesSintetica"),
-                        }
-
-            cap_found = cap_cat.find("PweDGCapitoli")
-            if cap_found is not None:
-                for elem in cap_found:
-                    cap_id = elem.get("ID")
-                    if cap_id:
-                        desc = ParserXpwe._text(elem, "DesSintetica")
-                        if desc == "Nuova voce":
-                            desc = ParserXpwe._text(elem, "DesEstesa")
-                        caps[cap_id] = {
-                            "codice": ParserXpwe._text(elem, "Codice"),
-                            "desc": desc,
-                        }
-        except Exception:
-            pass
-        return supercaps, caps
-
-
-class ParserXmlSix(PriceListParser):
-    """Parser per formato XML SIX."""
-
-    def __init__(self, language=None):
-        super().__init__()
-        self.language = language
-        self.default_list_id = None
-
-    def parse_items(self, xml_content):
-        xml_content = self.clean_xml_content(xml_content)
-        root = self.get_stripped_xml_namespaces_root(xml_content)
-        prezzario = root.find("prezzario")
-        if prezzario is None:
-            return
-
-        prz_desc = prezzario.find("przDescrizione")
-        if prz_desc is not None:
-            self.title = self.clean_string(prz_desc.attrib.get("breve", ""))
-
-        self.default_list_id = self._get_default_quotazione_id(prezzario)
-        units = self.get_units(prezzario)
-        products = prezzario.findall("prodotto")
-
-        # sort by prdId ensures parents are always processed before their children
-        products = sorted(products, key=lambda p: p.attrib.get("prdId", ""))
-
-        index = 0
-        prdId_to_index = {}
-
-        for product in products:
-            prdId = product.attrib.get("prdId", "")
-            level = self.get_level_from_prdId(product)
-            is_parent = self.is_parent(product)
-
-            if is_parent:
-                prdId_to_index[prdId] = str(index)
-
-            # build parents as comma-separated ancestor indices from root to immediate parent
-            parts = prdId.split(".")
-            ancestors = [".".join(parts[:i]) for i in range(1, len(parts))]
-            parents = ",".join(prdId_to_index[p] for p in ancestors if p in prdId_to_index)
-
-            desc = product.find("prdDescrizione")
-            name = self.clean_string(desc.attrib.get("breve", "")) if desc is not None else ""
-            description = self.clean_string(desc.attrib.get("estesa", "")) if desc is not None else ""
-            cost_value = self.get_value(product)
-
-            self.xml_rate_list.append({
-                "index": index,
-                "level": level,
-                "is_parent": is_parent,
-                "parents": parents,
-                "id": prdId,
-                "name": name,
-                "desc": description,
-                "unit": self.get_unit(units, product),
-                "value": cost_value,
-                "labor": self.get_value_component(product, cost_value, "incidenzaManodopera"),
-                "equipment": self.get_value_component(product, cost_value, "incidenzaAttrezzatura"),
-                "materials": self.get_value_component(product, cost_value, "incidenzaMateriali"),
-                "safety": self._get_safety(product, cost_value),
-            })
-            index += 1
-
-    def _get_default_quotazione_id(self, prezzario):
-        lista = prezzario.find("listaQuotazione")
-        if lista is not None:
-            return lista.attrib.get("listaQuotazioneId")
-        return None
-
-    @staticmethod
-    def _get_safety(product, cost_value):
-        try:
-            return float(product.attrib.get("onereSicurezza", 0)) * cost_value / 100
-        except (ValueError, TypeError):
-            return 0.0
-
-    @staticmethod
-    def get_units(prezzario):
-        units = {}
-        umList = prezzario.findall("unitaDiMisura")
-        for um in umList:
-            attr = um.attrib
-            try:
-                sym = attr.get("simbolo", attr.get("udmId", ""))
-                units[attr["unitaDiMisuraId"]] = sym
-            except KeyError:
-                pass
-        return units
-
-    @staticmethod
-    def get_unit(units, product):
-        try:
-            return units.get(product.attrib.get("unitaDiMisuraId", ""), "")
-        except Exception:
-            return ""
-
-    def get_value(self, product):
-        prezzo = 0.0
-        quotazioni = product.findall("prdQuotazione")
-        if not quotazioni:
-            return 0.0
-
-        for el in quotazioni:
-            if self.default_list_id and el.attrib.get("listaQuotazioneId") == self.default_list_id:
-                try:
-                    return float(el.attrib.get("valore", 0.0))
-                except ValueError:
-                    return 0.0
-
-        try:
-            return float(quotazioni[0].attrib.get("valore", 0.0))
-        except ValueError:
-            return 0.0
-
-    @staticmethod
-    def get_value_component(product, cost_value, component_type):
-        if component_type not in ("incidenzaManodopera", "incidenzaMateriali", "incidenzaAttrezzatura"):
-            return 0.0
-        component_ratio = product.find(component_type)
-        try:
-            return float(getattr(component_ratio, "text", 0.0)) * cost_value / 100
-        except Exception:
-            return 0.0
-
-    @staticmethod
-    def get_level_from_prdId(product):
-        return len(product.attrib.get("prdId", "").split(".")) - 1
-
-    @staticmethod
-    def is_parent(product):
-        quotazioni = product.findall("prdQuotazione")
-        if not quotazioni:
-            return True
-        return all(float(q.attrib.get("valore", 0)) == 0.0 for q in quotazioni)
-
-
-class ParserIfcCostSchedule(PriceListParser):
-    """Parser per IfcCostSchedule — progetto corrente o file IFC esterno."""
-
-    def parse_schedule(self, file, schedule_id):
-        import ifcopenshell.util.cost as cost_util
-        schedule = file.by_id(int(schedule_id))
-        self.title = schedule.Name or f"Schedule {schedule_id}"
-        root_items = cost_util.get_root_cost_items(schedule)
-        index = 0
-
-        def _val(cost_item):
-            for cv in (cost_item.CostValues or []):
-                try:
-                    v = cv.AppliedValue
-                    if v is not None:
-                        return float(v.wrappedValue if hasattr(v, 'wrappedValue') else v)
-                except Exception:
-                    pass
-            return 0.0
-
-        def _labor(cost_item):
-            for cv in (cost_item.CostValues or []):
-                for sub in (getattr(cv, 'Components', None) or []):
-                    if getattr(sub, 'Category', None) == 'Labor':
-                        try:
-                            v = sub.AppliedValue
-                            return float(v.wrappedValue if hasattr(v, 'wrappedValue') else v)
-                        except Exception:
-                            pass
-            return 0.0
-
-        def traverse(cost_item, level, parent_indices):
-            nonlocal index
-            has_children = bool(cost_item.IsNestedBy)
-            self.xml_rate_list.append({
-                "index": index,
-                "ifc_id": cost_item.id(),
-                "level": level,
-                "is_parent": has_children,
-                "parents": ",".join(str(p) for p in parent_indices),
-                "id": cost_item.Identification or "",
-                "name": cost_item.Name or "",
-                "desc": cost_item.Description or "",
-                "unit": "",
-                "value": _val(cost_item),
-                "labor": _labor(cost_item),
-                "equipment": 0.0,
-                "materials": 0.0,
-                "safety": 0.0,
-            })
-            current_index = index
-            index += 1
-            for rel in (cost_item.IsNestedBy or []):
-                for child in rel.RelatedObjects:
-                    traverse(child, level + 1, parent_indices + [current_index])
-
-        for root_item in root_items:
-            traverse(root_item, 0, [])
+import numpy as np
+
+# the bpy-free parsers and catalog live in the rate_catalog package next to this script
+_HERE = os.path.dirname(os.path.abspath(__file__))
+if _HERE not in sys.path:
+    sys.path.insert(0, _HERE)
+
+from rate_catalog import (
+    PriceListParser,
+    ParserIfcCostSchedule,
+    ParseCancelled,
+    RateCatalog,
+    RateSearchIndex,
+    cache_load,
+    cache_lookup,
+    cache_store,
+    parse_catalog,
+    publish_catalog,
+    read_catalog,
+    subtree_ends,
+)
 
 
 # ---------------------------------------------------------------------------
@@ -1090,7 +88,25 @@ def _on_recent_select(self, context):
         return
     path = self.xml_rate_recent_path
     if path and path != '__NONE__':
-        _do_import(path, context)
+        _start_import(path, context)
+
+
+# ---------------------------------------------------------------------------
+# Parsed rate list cache
+# ---------------------------------------------------------------------------
+
+def _cache_dir():
+    import os
+    return os.path.join(bpy.utils.user_resource('CONFIG'), 'RateListImporter_cache')
+
+
+def _cache_load(filepath):
+    """Returns the cached RateCatalog for filepath, or None on a miss."""
+    return cache_load(_cache_dir(), filepath)
+
+
+def _cache_store(filepath, catalog):
+    cache_store(_cache_dir(), filepath, catalog)
 
 
 # ---------------------------------------------------------------------------
@@ -1133,7 +149,7 @@ def _on_source_mode_change(self, context):
     if self.rate_source_mode == 'FILE':
         path = context.scene.xml_rate_recent_path
         if path and path != '__NONE__':
-            _do_import(path, context)
+            _start_import(path, context)
         else:
             context.scene.xml_rate_list.clear()
     else:
@@ -1145,71 +161,188 @@ def _on_source_mode_change(self, context):
             context.scene.xml_rate_list.clear()
 
 
+# ---------------------------------------------------------------------------
+# Quotation lists (SIX files can price each product in several lists)
+# ---------------------------------------------------------------------------
+
+_price_lists_cache = []  # module-level: prevents GC of enum item strings
+
+
+def _refresh_price_lists_cache(context):
+    global _price_lists_cache, _importing
+    columns = _catalog.value_columns if _catalog is not None else {}
+    _price_lists_cache = [(name, name, f"Prezzi della lista {name}") for name in columns]
+    if _catalog is not None and _catalog.active_value_column in columns:
+        _importing = True
+        try:
+            context.scene.xml_rate_price_list = _catalog.active_value_column
+        finally:
+            _importing = False
+
+
+def _get_price_lists(self, context):
+    return _price_lists_cache or [('__NONE__', '— listino unico —', '')]
+
+
+def _on_price_list_select(self, context):
+    if _importing or _catalog is None:
+        return
+    name = self.xml_rate_price_list
+    if name == _catalog.active_value_column or name not in _catalog.value_columns:
+        return
+    # the columns are already in memory: only the rows serialized for a save keep copies of the prices
+    _catalog.select_value_column(name)
+    context.scene.xml_rate_price_list_name = name
+    items = context.scene.xml_rate_list
+    for item, row in zip(items, _tree_arrays(items)[4].tolist()):
+        if not item.is_parent and item.attributes:
+            item.attributes = json.dumps(_catalog[row])
+    if len(context.scene.xml_rate_list) > 0:
+        RateListPanel.rate_list_selection_callback(None, context)
+
+
 # ---------------------------------------------------------------------------
 # Core parser detection and import logic
 # ---------------------------------------------------------------------------
 
-def _find_xml_parser(xml_content):
-    """From Leeno (thanks Giuserpe): pre-scans the XML to pick the right parser."""
-    parsers = {
-        "PweDatiGenerali": ParserXpwe,
-        'xmlns="six.xsd"': ParserXmlSix,
-        'autore="Regione Toscana"': ParserXmlToscana,
-        'autore="Regione Calabria"': ParserXmlToscana,
-        'autore="Regione Campania"': ParserXmlToscana,
-        'autore="Regione Sardegna"': ParserXmlToscana,
-        'autore="Regione Liguria"': ParserXmlLiguria,
-        "rks=": ParserXmlVeneto,
-        "<settore cod=": ParserXmlVeneto,
-        "<pdf>Prezzario_Regione_Basilicata": ParserXmlBasilicata,
-        "<autore>Regione Lombardia": ParserXmlLombardia,
-        "<autore>LOM": ParserXmlLombardia,
-    }
-    for pattern, parser_class in parsers.items():
-        if pattern in xml_content:
-            return parser_class
-    return None
+_catalog = None  # RateCatalog of the rate list currently loaded in the scene
+
+_search_index = None  # RateSearchIndex of _catalog, built on the first search
+
+
+def _scene_catalog(scene):
+    """The loaded catalog when the scene list comes from it, else None (e.g. a list saved in the .blend)."""
+    if _catalog is None or _catalog.source_digest != scene.xml_rate_source_digest \
+            or len(_catalog) != scene.xml_rate_list_rates:
+        return None
+    return _catalog
+
+
+def _item_row(scene, index):
+    """Catalog row of the scene list item at index."""
+    return int(_tree_arrays(scene.xml_rate_list)[4][index])
+
 
+def _item_rate(scene, index):
+    """XmlRateItem of the scene list item at index.
 
-def _populate_list_from_parser(parser, context):
+    Read from the catalog arrays; the attributes JSON is only decoded for
+    a list saved in a .blend whose catalog is not loaded.
+    """
+    catalog = _scene_catalog(scene)
+    if catalog is None:
+        return json.loads(scene.xml_rate_list[index].attributes)
+    return catalog[_item_row(scene, index)]
+
+
+def _get_search_index(scene):
+    """Search index of the catalog behind the scene list, or None."""
+    global _search_index
+    if _scene_catalog(scene) is None:
+        return None
+    if _search_index is None or _search_index.catalog is not _catalog:
+        _search_index = RateSearchIndex(_catalog)
+    return _search_index
+
+
+def _add_rate_item(items, row, rate):
+    item = items.add()
+    if rate["is_parent"] and rate["name"].startswith("Group "):
+        item.name = rate["id"]
+    else:
+        item.name = (rate["id"] + " - " + rate["name"]).strip(" -") or f"Item {rate['index']}"
+    item.row = row
+    item.level = rate["level"]
+    item.is_parent = rate["is_parent"]
+    item.parents = rate["parents"]
+    if item.is_parent:
+        item.is_expanded = False
+
+
+def _clear_list(context):
+    context.scene.xml_rate_list.clear()
+    context.scene.xml_rate_list_rates = 0  # no catalog behind the list until it is filled again
+    _mark_list_changed()
+
+
+def _populate_list_from_parser(parser, context, rates=None):
+    # rates defaults to parser.xml_rate_list; pass parser.iter_items(...) to stream
+    items = context.scene.xml_rate_list
+    _clear_list(context)
+    catalog = parser.xml_rate_list
+    if rates is None and context.scene.xml_rate_lazy_rows and isinstance(catalog, RateCatalog):
+        # chapters only: the rest is added on expand or search, see _materialize_rows
+        for row in catalog.children(-1).tolist():
+            _add_rate_item(items, row, catalog[row])
+        context.scene.xml_rate_list_rates = len(catalog)
+    else:
+        for row, rate in enumerate(catalog if rates is None else rates):
+            _add_rate_item(items, row, rate)
+        context.scene.xml_rate_list_rates = len(items)
+    _finish_list(parser, context)
+
+
+def _finish_list(parser, context):
     context.scene.xml_rate_title = parser.title
     context.scene.xml_rate_year = parser.year
-    context.scene.xml_rate_list.clear()
-    for rate in parser.xml_rate_list:
-        item = context.scene.xml_rate_list.add()
-        if rate["is_parent"] and rate["name"].startswith("Group "):
-            item.name = rate["id"]
-        else:
-            item.name = (rate["id"] + " - " + rate["name"]).strip(" -") or f"Item {rate['index']}"
-        item.level = rate["level"]
-        item.is_parent = rate["is_parent"]
-        item.parents = rate["parents"]
-        item.attributes = json.dumps(rate)
-        if item.is_parent:
-            item.is_expanded = False
     if len(context.scene.xml_rate_list) > 0:
         context.scene.xml_rate_list_active_index = 0
+    _tree_arrays(context.scene.xml_rate_list)  # subtree ends, once per import
 
 
-def _do_import(filepath, context, report=None):
-    import os, re
-    xml_content = PriceListParser.get_xml_content(filepath)
-    parser_class = _find_xml_parser(xml_content)
-    if parser_class is None:
+def _parse_file_into_scene(filepath, context, report=None):
+    """Parses filepath into the scene list and the cache; returns the parser or None.
+
+    On return parser.xml_rate_list holds the RateCatalog of the parsed rates.
+    """
+    warn = (lambda message: report({'WARNING'}, message)) if report else None
+    lazy = context.scene.xml_rate_lazy_rows
+    parser = parse_catalog(
+        filepath,
+        consume=None if lazy else lambda parser, rates: _populate_list_from_parser(parser, context, rates),
+        warn=warn,
+    )
+    if parser is None:
         if report:
             report({'ERROR'}, "Cannot automatically find a parser for selected file")
-        return False
+        return None
+    if lazy:
+        _populate_list_from_parser(parser, context)
+    _cache_store(filepath, parser.xml_rate_list)
+    return parser
+
+
+def _do_import(filepath, context, report=None):
+    catalog = _cache_load(filepath)
+    if catalog is not None:
+        parser = PriceListParser()
+        parser.xml_rate_list = catalog
+        _populate_list_from_parser(parser, context)
+    else:
+        parser = _parse_file_into_scene(filepath, context, report)
+        if parser is None:
+            return False
+    _finish_import(filepath, parser, context)
+    return True
 
-    parser = parser_class()
-    parser.parse_items(xml_content)
 
+def _finish_import(filepath, parser, context):
+    """Makes parser, whose rates are in the scene list, the loaded price list."""
+    import os, re
+
+    global _catalog
     filename = os.path.basename(filepath)
     name = os.path.splitext(filename)[0]
     match = re.search(r'\b(\d{4})\b', name)
     parser.year = match.group(1) if match else ""
     parser.title = name
-
-    _populate_list_from_parser(parser, context)
+    _catalog = parser.xml_rate_list
+    publish_catalog(_catalog)
+    _refresh_price_lists_cache(context)
+    context.scene.xml_rate_title = parser.title
+    context.scene.xml_rate_year = parser.year
+    _set_catalog_reference(context.scene, _catalog, filepath)
+    context.scene.xml_rate_status = ""
 
     _save_recent(filepath, parser.title, parser.year)
     _refresh_recent_cache()
@@ -1219,7 +352,6 @@ def _do_import(filepath, context, report=None):
         context.scene.xml_rate_recent_path = filepath
     finally:
         _importing = False
-    return True
 
 
 def _do_import_ifc(schedule_id, context, report=None):
@@ -1235,20 +367,381 @@ def _do_import_ifc(schedule_id, context, report=None):
             report({'ERROR'}, str(e))
         return False
 
+    global _catalog
     parser = ParserIfcCostSchedule()
     parser.parse_schedule(file, schedule_id)
+    parser.xml_rate_list = _catalog = RateCatalog.from_rates(parser.xml_rate_list)
+    publish_catalog(_catalog)
+    _set_catalog_reference(context.scene, _catalog, "")  # nothing to rehydrate from: the list is saved
+    context.scene.xml_rate_status = ""
+    _refresh_price_lists_cache(context)
     _populate_list_from_parser(parser, context)
     return True
 
 
+# ---------------------------------------------------------------------------
+# Background import: parsing in a worker thread, the scene list filled by a modal timer
+# ---------------------------------------------------------------------------
+
+_RESTART = object()  # queued when consume starts over: the rows so far are void
+_import_job = None  # the running _ImportJob, one at a time
+
+
+class _ImportJob:
+    """Loads filepath from the cache or parses it in a worker thread.
+
+    bpy is never touched from the thread: when stream is set the parsed rates
+    wait in a bounded queue, in lists, for the main thread to add them.
+    """
+
+    chunk = 500
+
+    def __init__(self, filepath, cache_dir, stream):
+        import queue, threading
+
+        self.filepath = filepath
+        self.cache_dir = cache_dir
+        self.stream = stream
+        self.queue = queue.Queue(maxsize=64)
+        self.cancelled = threading.Event()
+        self.done = threading.Event()
+        self.fraction = 0.0
+        self.parser = None
+        self.error = None
+        self.warnings = []
+        self.thread = threading.Thread(target=self._run, name="RateListImport", daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def _run(self):
+        try:
+            catalog = cache_load(self.cache_dir, self.filepath)
+            if catalog is not None:
+                parser = PriceListParser()
+                parser.xml_rate_list = catalog
+                if self.stream:
+                    self._consume(parser, catalog)
+            else:
+                parser = parse_catalog(
+                    self.filepath,
+                    consume=self._consume if self.stream else None,
+                    warn=self.warnings.append,
+                    progress=self._progress,
+                )
+                if parser is not None:
+                    cache_store(self.cache_dir, self.filepath, parser.xml_rate_list)
+            self.parser = parser
+        except ParseCancelled:
+            pass
+        except Exception as e:
+            self.error = e
+        finally:
+            self.done.set()
+
+    def _progress(self, done, total):
+        if self.cancelled.is_set():
+            raise ParseCancelled()
+        self.fraction = done / total if total else 1.0
+
+    def _put(self, entry):
+        import queue
+
+        while True:
+            if self.cancelled.is_set():
+                raise ParseCancelled()
+            try:
+                self.queue.put(entry, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def _consume(self, parser, rates):
+        self._put(_RESTART)
+        batch = []
+        for rate in rates:
+            batch.append(rate)
+            if len(batch) == self.chunk:
+                self._put(batch)
+                batch = []
+        if batch:
+            self._put(batch)
+
+
+class ImportRateListBackground(Operator):
+    """Import a price list without blocking Blender; Esc cancels."""
+
+    bl_idname = "xml_rate_list_ui.import_background"
+    bl_label = "Import Rate List in Background"
+
+    filepath: bpy.props.StringProperty(subtype="FILE_PATH", options={"HIDDEN"})
+
+    # time spent adding rows per timer tick, so the UI keeps redrawing
+    budget = 0.03
+
+    def execute(self, context):
+        # no event loop to drive the modal operator, e.g. in background mode
+        return {"FINISHED"} if _do_import(self.filepath, context, self.report) else {"CANCELLED"}
+
+    def invoke(self, context, event):
+        import os
+
+        global _import_job
+        if context.window is None:
+            return self.execute(context)
+        if _import_job is not None and not _import_job.done.is_set():
+            # also while a cancelled job winds down: it may still be writing the cache
+            self.report({'WARNING'}, "A price list is already being imported")
+            return {"CANCELLED"}
+        _import_job = self.job = _ImportJob(self.filepath, _cache_dir(), not context.scene.xml_rate_lazy_rows)
+        self.rows = 0
+        self.name = os.path.basename(self.filepath)
+        self.job.start()
+        wm = context.window_manager
+        self.timer = wm.event_timer_add(0.1, window=context.window)
+        wm.progress_begin(0, 100)
+        wm.modal_handler_add(self)
+        self._status(context)
+        return {"RUNNING_MODAL"}
+
+    def _status(self, context):
+        context.workspace.status_text_set(
+            f"Importing {self.name}: {self.job.fraction:.0%}, {self.rows} rates listed (Esc to cancel)"
+        )
+        context.window_manager.progress_update(int(self.job.fraction * 100))
+
+    def _drain(self, context):
+        import queue, time
+
+        items = context.scene.xml_rate_list
+        deadline = time.perf_counter() + self.budget
+        while time.perf_counter() < deadline:
+            try:
+                entry = self.job.queue.get_nowait()
+            except queue.Empty:
+                return True
+            if entry is _RESTART:
+                _clear_list(context)
+                self.rows = 0
+                continue
+            for rate in entry:
+                _add_rate_item(items, self.rows, rate)
+                self.rows += 1
+        return False
+
+    def modal(self, context, event):
+        if event.type == "ESC" and event.value == "PRESS":
+            self.job.cancel()
+            if self.job.stream:
+                _clear_list(context)  # what was listed so far is a fraction of the file
+            self._end(context)
+            self.report({'INFO'}, "Price list import cancelled")
+            return {"CANCELLED"}
+        if event.type != "TIMER":
+            return {"PASS_THROUGH"}
+
+        drained = self._drain(context)
+        if not (drained and self.job.done.is_set()):
+            self._status(context)
+            return {"RUNNING_MODAL"}
+
+        self._end(context)
+        job = self.job
+        if job.error is not None:
+            self.report({'ERROR'}, f"Cannot import {self.name}: {job.error}")
+            return {"CANCELLED"}
+        if job.parser is None:
+            self.report({'ERROR'}, "Cannot automatically find a parser for selected file")
+            return {"CANCELLED"}
+        for message in job.warnings:
+            self.report({'WARNING'}, message)
+        if job.stream:
+            context.scene.xml_rate_list_rates = self.rows
+            _finish_list(job.parser, context)
+        else:
+            _populate_list_from_parser(job.parser, context)
+        _finish_import(self.filepath, job.parser, context)
+        return {"FINISHED"}
+
+    def _end(self, context):
+        global _import_job
+        if self.job.done.is_set():
+            _import_job = None  # a cancelled job is kept until its thread returns
+        wm = context.window_manager
+        wm.event_timer_remove(self.timer)
+        wm.progress_end()
+        context.workspace.status_text_set(None)
+        for area in context.screen.areas:
+            area.tag_redraw()
+
+
+def _start_import(filepath, context):
+    """Imports filepath in the background when there is a window to show the progress in."""
+    if context.window is None:
+        _do_import(filepath, context)
+    else:
+        bpy.ops.xml_rate_list_ui.import_background("INVOKE_DEFAULT", filepath=filepath)
+
+
+# ---------------------------------------------------------------------------
+# Rate lists kept out of the .blend: a catalog reference, rehydrated on load
+# ---------------------------------------------------------------------------
+
+_emptied_for_save = None  # catalog of the list emptied while the .blend is written
+
+
+def _set_catalog_reference(scene, catalog, filepath):
+    """Records where the scene list comes from: the price list path and the digest of its cached catalog.
+
+    The digest is stamped on catalog too, so _scene_catalog can tell it from
+    another price list with as many rates.
+    """
+    scene.xml_rate_source_path = filepath
+    digest = (cache_lookup(_cache_dir(), filepath) or "") if filepath else ""
+    scene.xml_rate_source_digest = catalog.source_digest = digest
+    scene.xml_rate_price_list_name = catalog.active_value_column or ""
+
+
+def _restore_price_list(scene, catalog):
+    """Selects in catalog the quotation list recorded in the scene, which the cached catalog does not keep."""
+    name = scene.xml_rate_price_list_name
+    if name in catalog.value_columns and name != catalog.active_value_column:
+        catalog.select_value_column(name)
+
+
+def _list_state(scene):
+    """Catalog rows of the expanded parents and of the active item of the scene list."""
+    items = scene.xml_rate_list
+    rows = _tree_arrays(items)[4]
+    expanded = np.zeros(len(items), dtype=bool)
+    items.foreach_get("is_expanded", expanded)
+    is_parent = np.zeros(len(items), dtype=bool)
+    items.foreach_get("is_parent", is_parent)
+    active = scene.xml_rate_list_active_index
+    return rows[expanded & is_parent].tolist(), int(rows[active]) if 0 <= active < len(rows) else -1
+
+
+def _rehydrate(context, catalog):
+    """Lists catalog in the scene again, with the expanded items and the selection saved in the scene."""
+    global _catalog
+    scene = context.scene
+    _catalog = catalog
+    publish_catalog(catalog)
+    _refresh_price_lists_cache(context)
+    parser = PriceListParser()
+    parser.xml_rate_list = catalog
+    parser.title = scene.xml_rate_title
+    parser.year = scene.xml_rate_year
+    _populate_list_from_parser(parser, context)
+
+    items = scene.xml_rate_list
+    expanded = [int(row) for row in scene.xml_rate_expanded_rows.split(",") if row]
+    if expanded and len(items) < len(catalog):
+        _materialize_rows(items, np.concatenate([catalog.children(row) for row in expanded]))
+    for row in expanded:
+        index = _scene_index(items, row)
+        if index >= 0:
+            items[index].is_expanded = True
+    _mark_expand_changed()
+    active = _scene_index(items, scene.xml_rate_active_row)
+    if active >= 0:
+        scene.xml_rate_list_active_index = active
+
+
+def _serialize_rows(scene):
+    """Writes the attributes JSON of the rows that lack it, for a list saved with its rows.
+
+    Such a list may be opened where its catalog cannot be loaded, e.g. one
+    read from an IFC cost schedule; _item_rate then decodes the JSON instead.
+    """
+    items = scene.xml_rate_list
+    for item, row in zip(items, _tree_arrays(items)[4].tolist()):
+        if not item.attributes:
+            item.attributes = json.dumps(_catalog[row])
+
+
+@bpy.app.handlers.persistent
+def _on_save_pre(*args):
+    # with a catalog reference the .blend gets it and the UI state, not the rows
+    global _emptied_for_save
+    scene = bpy.context.scene
+    if _scene_catalog(scene) is None:
+        return
+    if not (scene.xml_rate_external and scene.xml_rate_source_digest):
+        _serialize_rows(scene)
+        return
+    expanded, active = _list_state(scene)
+    scene.xml_rate_expanded_rows = ",".join(str(row) for row in expanded)
+    scene.xml_rate_active_row = active
+    _emptied_for_save = _catalog
+    _clear_list(bpy.context)
+
+
+@bpy.app.handlers.persistent
+def _on_save_post(*args):
+    global _emptied_for_save
+    catalog, _emptied_for_save = _emptied_for_save, None
+    if catalog is not None:
+        _rehydrate(bpy.context, catalog)
+
+
+@bpy.app.handlers.persistent
+def _on_load_rehydrate(*args):
+    """Fills a list saved as a reference from the cached catalog, or from the price list when evicted."""
+    import os
+
+    global _catalog
+    scene = bpy.context.scene
+    digest = scene.xml_rate_source_digest
+    scene.xml_rate_status = ""
+    if _catalog is not None and (not digest or _catalog.source_digest != digest):
+        # the catalog of the previous file: it must not stand behind this list
+        _catalog = None
+        publish_catalog(None)
+        _refresh_price_lists_cache(bpy.context)
+    if not digest:
+        return
+    catalog = _catalog
+    if catalog is None:
+        try:
+            catalog = read_catalog(os.path.join(_cache_dir(), digest + ".rates"))
+            catalog.source_digest = digest
+        except Exception:
+            catalog = None
+    if catalog is not None:
+        _restore_price_list(scene, catalog)
+    if len(scene.xml_rate_list):
+        # saved with its rows: only put the catalog back behind them
+        if catalog is not None and len(catalog) == scene.xml_rate_list_rates:
+            if catalog is not _catalog:
+                _catalog = catalog
+                publish_catalog(catalog)
+            _refresh_price_lists_cache(bpy.context)
+        return
+    if catalog is None and os.path.exists(scene.xml_rate_source_path):
+        parser = parse_catalog(scene.xml_rate_source_path)
+        if parser is not None:
+            catalog = parser.xml_rate_list
+            _cache_store(scene.xml_rate_source_path, catalog)
+            _restore_price_list(scene, catalog)
+            _set_catalog_reference(scene, catalog, scene.xml_rate_source_path)
+    if catalog is None:
+        scene.xml_rate_status = f"Price list not found: {scene.xml_rate_source_path or digest}"
+        return
+    _rehydrate(bpy.context, catalog)
+
+
 class ImportRateList(Operator, ImportHelper):
-    """Import an Italian regional price list (prezzario) in XML or XPWE format."""
+    """Import an Italian regional price list (prezzario) in XML or XPWE format, or the cost schedules of an IFC file."""
 
     bl_idname = "import.rate_list"
     bl_label = "Import Rate List"
     filename_ext = ".xml"
     filter_glob: bpy.props.StringProperty(
-        default="*.xml;*.xpwe",
+        default="*.xml;*.xpwe;*.ifc",
         options={"HIDDEN"},
         maxlen=255,
     )
@@ -1275,23 +768,28 @@ class ImportRateList(Operator, ImportHelper):
         box.label(text="")
 
     def execute(self, context):
-        success = _do_import(self.filepath, context, self.report)
-        return {"FINISHED"} if success else {"CANCELLED"}
+        if context.window is None:
+            success = _do_import(self.filepath, context, self.report)
+            return {"FINISHED"} if success else {"CANCELLED"}
+        bpy.ops.xml_rate_list_ui.import_background("INVOKE_DEFAULT", filepath=self.filepath)
+        return {"FINISHED"}
 
 
-def get_parent_desc(selected_rate):
-    rate_attrib = json.loads(selected_rate.attributes)
-    parent_indices = [p for p in rate_attrib.get("parents", "").split(",") if p.strip()]
+def get_parent_desc(rate):
+    parent_indices = [p for p in rate.get("parents", "").split(",") if p.strip()]
     if not parent_indices:
         return ""
-    parent_idx = int(parent_indices[-1])
-    items = bpy.context.scene.xml_rate_list
-    if parent_idx < len(items):
-        return json.loads(items[parent_idx].attributes).get("desc", "")
+    parent_row = int(parent_indices[-1])
+    catalog = _scene_catalog(bpy.context.scene)
+    if catalog is not None:
+        return catalog.string("desc", parent_row)
+    parent_idx = _scene_index(bpy.context.scene.xml_rate_list, parent_row)
+    if parent_idx >= 0:
+        return json.loads(bpy.context.scene.xml_rate_list[parent_idx].attributes).get("desc", "")
     return ""
 
 
-def create_cost_item(file, selected_rate, create_new_item=True, combine_desc=False):
+def create_cost_item(file, rate_attrib, create_new_item=True, combine_desc=False):
     from bonsai import tool
     import ifcopenshell.util.cost
     import bonsai.bim.module.cost.data
@@ -1314,9 +812,8 @@ def create_cost_item(file, selected_rate, create_new_item=True, combine_desc=Fal
             for cost_value in list(cost_item.CostValues):
                 tool.Ifc.run("cost.remove_cost_value", parent=cost_item, cost_value=cost_value)
 
-    rate_attrib = json.loads(selected_rate.attributes)
     if combine_desc:
-        parent_desc = get_parent_desc(selected_rate)
+        parent_desc = get_parent_desc(rate_attrib)
         desc = (parent_desc + "\n" + rate_attrib["desc"]).strip() if parent_desc else rate_attrib["desc"]
     else:
         desc = rate_attrib["desc"]
@@ -1390,9 +887,9 @@ class UpdateActiveCostItem(*_IfcOperatorBase):
 
     def _execute(self, context):
         from bonsai import tool
-        selected_rate = bpy.context.scene.xml_rate_list[bpy.context.scene.xml_rate_list_active_index]
+        selected_rate = _item_rate(context.scene, context.scene.xml_rate_list_active_index)
         file = tool.Ifc.get()
-        create_cost_item(file, selected_rate=selected_rate, create_new_item=False,
+        create_cost_item(file, selected_rate, create_new_item=False,
             combine_desc=context.scene.xml_rate_combine_desc)
 
 
@@ -1417,12 +914,22 @@ class ImportRateToActiveCostSchedule(*_IfcOperatorBase):
 
     def _execute(self, context):
         from bonsai import tool
-        selected_rate = bpy.context.scene.xml_rate_list[bpy.context.scene.xml_rate_list_active_index]
+        selected_rate = _item_rate(context.scene, context.scene.xml_rate_list_active_index)
         file = tool.Ifc.get()
-        create_cost_item(file, selected_rate=selected_rate, create_new_item=True,
+        create_cost_item(file, selected_rate, create_new_item=True,
             combine_desc=context.scene.xml_rate_combine_desc)
 
 
+def _item_ifc_id(scene, index):
+    """IFC id of the cost item behind the scene list item at index, 0 for price list rates."""
+    catalog = _scene_catalog(scene)
+    if catalog is None:
+        return json.loads(scene.xml_rate_list[index].attributes).get("ifc_id", 0)
+    if catalog.ifc_id is None:
+        return 0
+    return int(catalog.ifc_id[_item_row(scene, index)])
+
+
 class AssignRateValue(*_IfcOperatorBase):
     """Assign the selected rate as the cost value of the active cost item."""
 
@@ -1440,8 +947,7 @@ class AssignRateValue(*_IfcOperatorBase):
                 return False
             if props.active_cost_schedule_id == 0 or props.active_cost_item is None:
                 return False
-            selected = context.scene.xml_rate_list[context.scene.xml_rate_list_active_index]
-            return json.loads(selected.attributes).get("ifc_id", 0) != 0
+            return _item_ifc_id(context.scene, context.scene.xml_rate_list_active_index) != 0
         except:
             return False
 
@@ -1449,8 +955,7 @@ class AssignRateValue(*_IfcOperatorBase):
         from bonsai import tool
         from bonsai.core import cost as cost_core
         import bonsai.bim.module.cost.data
-        selected = context.scene.xml_rate_list[context.scene.xml_rate_list_active_index]
-        ifc_id = json.loads(selected.attributes).get("ifc_id", 0)
+        ifc_id = _item_ifc_id(context.scene, context.scene.xml_rate_list_active_index)
         file = tool.Ifc.get()
         cost_item = file.by_id(context.scene.BIMCostProperties.active_cost_item.ifc_definition_id)
         cost_rate = file.by_id(ifc_id)
@@ -1459,6 +964,249 @@ class AssignRateValue(*_IfcOperatorBase):
         tool.Cost.load_cost_schedule_tree()
 
 
+# ---------------------------------------------------------------------------
+# Rate list visibility
+# ---------------------------------------------------------------------------
+
+_list_version = 0  # bumped whenever the scene rate list is rebuilt
+_expand_version = 0  # bumped whenever is_expanded changes
+_tree = None  # (list_version, level, subtree end, parent rows, catalog rows) of the scene list
+_filter_cache = None  # flags of the last filter_items call and what they were computed from
+
+
+def _mark_list_changed():
+    global _list_version
+    _list_version += 1
+
+
+def _mark_expand_changed():
+    global _expand_version
+    _expand_version += 1
+
+
+@bpy.app.handlers.persistent
+def _on_undo_redo_load(*args):
+    # undo and file loads change the list and the IFC data behind our back
+    _mark_list_changed()
+    _mark_expand_changed()
+
+
+def _tree_arrays(items):
+    """level, subtree end, parent rows and catalog rows of the scene list; computed once per list, at import.
+
+    A collapsed item hides the rows i + 1 .. end[i] - 1, those below it with a higher level.
+    """
+    global _tree
+    if _tree is None or _tree[0] != _list_version or len(_tree[1]) != len(items):
+        level = np.zeros(len(items), dtype=np.int32)
+        items.foreach_get("level", level)
+        is_parent = np.zeros(len(items), dtype=bool)
+        items.foreach_get("is_parent", is_parent)
+        rows = np.zeros(len(items), dtype=np.int32)
+        items.foreach_get("row", rows)
+        if len(rows) and rows[0] < 0:
+            rows = np.arange(len(items), dtype=np.int32)  # saved before lazy rows: every rate is there
+        _tree = (_list_version, level, subtree_ends(level).tolist(), np.flatnonzero(is_parent), rows)
+    return _tree
+
+
+def _scene_index(items, row):
+    """Index in the scene list of catalog row, -1 when it is not materialized."""
+    rows = _tree_arrays(items)[4]
+    index = int(np.searchsorted(rows, row))
+    return index if index < len(rows) and rows[index] == row else -1
+
+
+def _visible_rows(end, shown, expanded, start, stop):
+    """Visible rows in [start, stop), jumping over collapsed and filtered out subtrees.
+
+    Costs one step per visible row: shown always holds the parents of its
+    rows, so nothing below a row that is not shown can be visible either.
+    """
+    rows = []
+    i = start
+    while i < stop:
+        if shown[i]:
+            rows.append(i)
+            i = i + 1 if expanded[i] else end[i]
+        else:
+            i = end[i]
+    return rows
+
+
+def _search_mask(ui_list, items):
+    """Rows matching the search box, with their parents."""
+    if not ui_list.filter_name:
+        return np.ones(len(items), dtype=bool)
+    index = _get_search_index(bpy.context.scene)
+    if index is not None:
+        # id, name and description through the catalog index
+        hits = index.search(ui_list.filter_name)
+        rows = _tree_arrays(items)[4]
+        if len(rows) < len(index.catalog):
+            _schedule_materialize(hits[:_SEARCH_MATERIALIZE_LIMIT])
+        return index.with_ancestors(hits)[rows]
+    # Use Blender's built-in search functionality
+    flags = bpy.types.UI_UL_list.filter_items_by_name(
+        ui_list.filter_name,
+        ui_list.bitflag_filter_item,
+        items,
+        "name",
+        reverse=ui_list.use_filter_sort_reverse,
+    )
+    shown = np.array([bool(f & ui_list.bitflag_filter_item) for f in flags], dtype=bool)
+    # make sure hierarchy is shown during item search
+    for i in np.flatnonzero(shown).tolist():
+        for parent_row in [int(p) for p in items[i].parents.split(",") if p.strip()]:
+            parent_idx = _scene_index(items, parent_row)
+            if parent_idx >= 0:
+                shown[parent_idx] = True
+    return shown
+
+
+def _filter_flags(ui_list, items):
+    """filter_items flags, recomputed only when the search, the list or an expand state changed."""
+    global _filter_cache
+    key = (ui_list.filter_name, _list_version, _expand_version, len(items))
+    cache = _filter_cache
+    if cache is not None and cache["key"] == key:
+        return cache["flags"]
+
+    tree = _tree_arrays(items)
+    if cache is not None and (cache["key"][:2], cache["key"][3]) == (key[:2], key[3]):
+        shown = cache["shown"]  # only expand states changed
+    else:
+        shown = _search_mask(ui_list, items).tolist()
+    expanded = np.zeros(len(items), dtype=bool)
+    items.foreach_get("is_expanded", expanded)
+    expanded = expanded.tolist()
+    bit = ui_list.bitflag_filter_item
+    flags = [0] * len(items)
+    for i in _visible_rows(tree[2], shown, expanded, 0, len(items)):
+        flags[i] = bit
+    _filter_cache = {"key": key, "bit": bit, "flags": flags, "shown": shown, "expanded": expanded}
+    return flags
+
+
+def _on_item_toggled(index, is_expanded):
+    """Updates the cached flags of the visible rows of the toggled subtree only."""
+    global _expand_version
+    cache = _filter_cache
+    current = cache is not None and cache["key"][1:3] == (_list_version, _expand_version)
+    _expand_version += 1
+    if not current or _tree is None or _tree[0] != _list_version:
+        return
+    end = _tree[2]
+    flags, shown, expanded = cache["flags"], cache["shown"], cache["expanded"]
+    if flags[index] and expanded[index] != is_expanded:
+        # the rows visible under the item before collapsing it, or after expanding it;
+        # under a hidden item everything stays hidden either way
+        bit = cache["bit"] if is_expanded else 0
+        for i in _visible_rows(end, shown, expanded, index + 1, end[index]):
+            flags[i] = bit
+    expanded[index] = is_expanded
+    key = cache["key"]
+    cache["key"] = (key[0], key[1], _expand_version, key[3])
+
+
+def _expand_parents(items, below_level):
+    """Expands the parents with level < below_level and collapses the others.
+
+    Touches the parent rows only, and of those just the ones changing state.
+    """
+    catalog = _scene_catalog(bpy.context.scene)
+    if catalog is not None and len(items) < len(catalog):
+        # every row whose parent gets expanded must be there first
+        parent_level = np.where(catalog.parent >= 0, catalog.level[catalog.parent], -1)
+        _materialize_rows(items, np.flatnonzero(parent_level < below_level))
+    _, level, _, parents, _ = _tree_arrays(items)
+    cache = _filter_cache
+    if cache is not None and cache["key"][1:3] == (_list_version, _expand_version):
+        expanded = np.array(cache["expanded"], dtype=bool)
+    else:
+        expanded = np.zeros(len(items), dtype=bool)
+        items.foreach_get("is_expanded", expanded)
+    target = level[parents] < below_level
+    changed = target != expanded[parents]
+    for i, state in zip(parents[changed].tolist(), target[changed].tolist()):
+        items[i].is_expanded = state
+    _mark_expand_changed()
+
+
+# ---------------------------------------------------------------------------
+# Lazy rows: big lists start with their chapters only
+# ---------------------------------------------------------------------------
+
+# above this many new rows re-adding the tail of the list is cheaper than one move per row
+_MOVE_LIMIT = 1000
+# search hits added per query; the others come in when their parent is expanded
+_SEARCH_MATERIALIZE_LIMIT = 5000
+
+_pending_rows = None  # rows waiting for _materialize_pending
+
+
+def _materialize_rows(items, rows):
+    """Adds the catalog rows missing from the scene list, with their parents; returns how many.
+
+    The scene list always holds the rows of a set closed under parents, in
+    catalog order, so every item sits right below its parent as in a full list.
+    """
+    catalog = _catalog
+    _, _, _, _, present = _tree_arrays(items)
+    wanted = catalog.with_ancestors(np.asarray(rows, dtype=np.int64))
+    wanted[present] = False
+    new = np.flatnonzero(wanted)
+    if not len(new):
+        return 0
+
+    scene = bpy.context.scene
+    active = scene.xml_rate_list_active_index
+    active_row = int(present[active]) if 0 <= active < len(present) else -1
+    positions = np.searchsorted(present, new) + np.arange(len(new))
+    if len(new) <= _MOVE_LIMIT:
+        for position, row in zip(positions.tolist(), new.tolist()):
+            _add_rate_item(items, row, catalog[row])
+            items.move(len(items) - 1, position)
+    else:
+        start = int(positions[0])
+        expanded = np.zeros(len(items), dtype=bool)
+        items.foreach_get("is_expanded", expanded)
+        was_expanded = dict(zip(present[start:].tolist(), expanded[start:].tolist()))
+        for index in range(len(items) - 1, start - 1, -1):
+            items.remove(index)
+        for row in np.union1d(present[start:], new).tolist():
+            _add_rate_item(items, row, catalog[row])
+            if row in was_expanded:
+                items[-1].is_expanded = was_expanded[row]
+    _mark_list_changed()
+    if active_row >= 0 and positions[0] <= active:
+        scene.xml_rate_list_active_index = _scene_index(items, active_row)  # same rate, new index
+    return len(new)
+
+
+def _materialize_pending():
+    global _pending_rows
+    rows, _pending_rows = _pending_rows, None
+    scene = bpy.context.scene
+    if rows is None or _scene_catalog(scene) is None:
+        return None
+    if _materialize_rows(scene.xml_rate_list, rows):
+        for window in bpy.context.window_manager.windows:
+            for area in window.screen.areas:
+                area.tag_redraw()
+    return None
+
+
+def _schedule_materialize(rows):
+    """Adds rows to the scene list from a timer: filter_items runs while drawing, which cannot edit data."""
+    global _pending_rows
+    if not len(rows):
+        return
+    if _pending_rows is None:
+        bpy.app.timers.register(_materialize_pending, first_interval=0.0)
+    _pending_rows = rows
+
+
 class XmlRateCustomUIList(bpy.types.UIList):
     def draw_filter(self, context, layout):
         # Only show search box, no other filter options
@@ -1468,9 +1216,8 @@ class XmlRateCustomUIList(bpy.types.UIList):
         self, context, layout, data, item, icon, active_data, active_propname, index
     ):
         # Add indentation based on level
-        rate_attrib = json.loads(item.attributes)
         layout.alignment = "LEFT"
-        if rate_attrib["is_parent"]:
+        if item.is_parent:
             # Parent with expand/collapse
             icon_expand = "DOWNARROW_HLT" if item.is_expanded else "RIGHTARROW"
             row = layout.row()
@@ -1488,82 +1235,7 @@ class XmlRateCustomUIList(bpy.types.UIList):
 
     def filter_items(self, context, data, propname):
         items = getattr(data, propname)
-        flt_flags = []
-        flt_neworder = []
-
-        # Get search filter from UIList
-        if self.filter_name:
-            # Use Blender's built-in search functionality
-            flt_flags = bpy.types.UI_UL_list.filter_items_by_name(
-                self.filter_name,
-                self.bitflag_filter_item,
-                items,
-                "name",
-                reverse=self.use_filter_sort_reverse,
-            )
-            # make sure hierarchy is shown during item search
-            search_filtered_flags = flt_flags[:]
-            for i, item in enumerate(items):
-                if flt_flags[i] & self.bitflag_filter_item:
-                    for parent_idx in [int(p) for p in item.parents.split(",") if p.strip()]:
-                        search_filtered_flags[parent_idx] = self.bitflag_filter_item
-            flt_flags = search_filtered_flags
-            
-            # Apply expand/collapse logic on top of search filter
-            final_flags = []
-            hide_next = False
-            hide_level = 10
-            for i, item in enumerate(items):
-                show_item = (flt_flags[i] & self.bitflag_filter_item) != 0
-                
-                if show_item:
-                    if hide_next:
-                        if item.level <= hide_level:
-                            show_item = True
-                            if item.is_expanded:
-                                hide_next = False
-                            else:
-                                hide_next = True
-                                hide_level = item.level
-                        else:
-                            show_item = False
-                    else:
-                        show_item = True
-                        if item.is_expanded:
-                            hide_next = False
-                        else:
-                            hide_next = True
-                            hide_level = item.level
-                
-                final_flags.append(self.bitflag_filter_item if show_item else 0)
-            flt_flags = final_flags
-
-        else:
-            hide_next = False
-            hide_level = 10
-            for item in items:
-                show_item = True
-                if hide_next:
-                    if item.level <= hide_level:
-                        show_item = True
-                        if item.is_expanded:
-                            hide_next = False
-                        else:
-                            hide_next = True
-                            hide_level = item.level
-                    else:
-                        show_item = False
-                else:
-                    show_item = True
-                    if item.is_expanded:
-                        hide_next = False
-                    else:
-                        hide_next = True
-                        hide_level = item.level
-
-                flt_flags.append(self.bitflag_filter_item if show_item else 0)
-
-        return flt_flags, flt_neworder
+        return _filter_flags(self, items), []
 
 
 class CUSTOM_OT_toggle(Operator):
@@ -1573,8 +1245,15 @@ class CUSTOM_OT_toggle(Operator):
     index: bpy.props.IntProperty()
 
     def execute(self, context):
-        item = context.scene.xml_rate_list[self.index]
+        items = context.scene.xml_rate_list
+        item = items[self.index]
+        catalog = _scene_catalog(context.scene)
+        if not item.is_expanded and catalog is not None and len(items) < len(catalog):
+            # lazy list: the children go in right below the item, which keeps its index
+            if _materialize_rows(items, catalog.children(item.row)):
+                item = items[self.index]
         item.is_expanded = not item.is_expanded
+        _on_item_toggled(self.index, item.is_expanded)
         # keep the list order while expanding/collapsing by updating the active index to the toggled item
         context.scene.xml_rate_list_active_index = self.index
         return {"FINISHED"}
@@ -1585,10 +1264,7 @@ class CUSTOM_OT_collapse_to_level_0(Operator):
     bl_label = "Collapse to Level 0"
 
     def execute(self, context):
-        items = context.scene.xml_rate_list
-        for item in items:
-            if item.is_parent:
-                item.is_expanded = item.level < 0
+        _expand_parents(context.scene.xml_rate_list, 0)
         return {"FINISHED"}
 
 
@@ -1597,10 +1273,7 @@ class CUSTOM_OT_collapse_to_level_1(Operator):
     bl_label = "Collapse to Level 1"
 
     def execute(self, context):
-        items = context.scene.xml_rate_list
-        for item in items:
-            if item.is_parent:
-                item.is_expanded = item.level < 1
+        _expand_parents(context.scene.xml_rate_list, 1)
         return {"FINISHED"}
 
 
@@ -1609,10 +1282,7 @@ class CUSTOM_OT_expand_all(Operator):
     bl_label = "Expand All"
 
     def execute(self, context):
-        items = context.scene.xml_rate_list
-        for item in items:
-            if item.is_parent:
-                item.is_expanded = True
+        _expand_parents(context.scene.xml_rate_list, sys.maxsize)
         return {"FINISHED"}
 
 
@@ -1621,8 +1291,9 @@ class RateListPropGroup(bpy.types.PropertyGroup):
     level: bpy.props.IntProperty()
     is_parent: bpy.props.BoolProperty()
     parents: bpy.props.StringProperty()
-    attributes: bpy.props.StringProperty()
+    attributes: bpy.props.StringProperty()  # XmlRateItem JSON, only in lists saved with their rows
     is_expanded: bpy.props.BoolProperty(default=True)
+    row: bpy.props.IntProperty(default=-1)  # catalog row; -1 in lists saved before lazy rows
 
 
 class RateListPanel(bpy.types.Panel):
@@ -1637,10 +1308,7 @@ class RateListPanel(bpy.types.Panel):
         return RateListPanel.active_item_info
 
     def rate_list_selection_callback(self, context):
-        selected_rate = bpy.context.scene.xml_rate_list.items()[
-            bpy.context.scene.xml_rate_list_active_index
-        ][1]
-        attrib = json.loads(selected_rate.attributes)
+        attrib = _item_rate(bpy.context.scene, bpy.context.scene.xml_rate_list_active_index)
         new_label = ""
         new_label += attrib["id"] + "\n"
         new_label += attrib["name"] + "\n"
@@ -1668,10 +1336,16 @@ class RateListPanel(bpy.types.Panel):
         else:
             row.prop(context.scene, "ifc_rate_source_schedule", text="")
             row.operator(IFC_OT_rate_source_refresh.bl_idname, text="", icon="FILE_REFRESH")
+        if context.scene.xml_rate_status:
+            layout.label(text=context.scene.xml_rate_status, icon="ERROR")
+        if len(_price_lists_cache) > 1:
+            layout.prop(context.scene, "xml_rate_price_list", text="Quotazione")
         row = layout.row()
         row.operator(CUSTOM_OT_collapse_to_level_0.bl_idname, text="Collapse")
         row.operator(CUSTOM_OT_collapse_to_level_1.bl_idname, text="To Level 1")
         row.operator(CUSTOM_OT_expand_all.bl_idname, text="Expand All")
+        row.prop(context.scene, "xml_rate_lazy_rows", text="", icon="SORTTIME")
+        row.prop(context.scene, "xml_rate_external", text="", icon="EXTERNAL_DRIVE")
         layout.template_list(
             "XmlRateCustomUIList",
             "",
@@ -1736,6 +1410,7 @@ classes = [
     CUSTOM_OT_collapse_to_level_1,
     CUSTOM_OT_expand_all,
     IFC_OT_rate_source_refresh,
+    ImportRateListBackground,
     UpdateActiveCostItem,
     ImportRateToActiveCostSchedule,
     AssignRateValue,
@@ -1754,6 +1429,23 @@ def register():
     bpy.types.Scene.xml_rate_list_active_index = bpy.props.IntProperty(
         update=RateListPanel.rate_list_selection_callback
     )
+    bpy.types.Scene.xml_rate_list_rates = bpy.props.IntProperty(name="Rates", default=0)
+    bpy.types.Scene.xml_rate_lazy_rows = bpy.props.BoolProperty(
+        name="Load Rows on Demand",
+        description="List only the chapters at import and add the rates when a chapter is expanded or searched",
+        default=True,
+    )
+    bpy.types.Scene.xml_rate_external = bpy.props.BoolProperty(
+        name="Keep List out of .blend",
+        description="Save only a reference to the cached price list and rebuild the list when the file is opened",
+        default=True,
+    )
+    bpy.types.Scene.xml_rate_source_path = bpy.props.StringProperty(name="Price List Path", subtype="FILE_PATH")
+    bpy.types.Scene.xml_rate_source_digest = bpy.props.StringProperty(name="Price List Digest")
+    bpy.types.Scene.xml_rate_price_list_name = bpy.props.StringProperty(name="Selected Price List")
+    bpy.types.Scene.xml_rate_expanded_rows = bpy.props.StringProperty(name="Expanded Rows")
+    bpy.types.Scene.xml_rate_active_row = bpy.props.IntProperty(name="Active Row", default=-1)
+    bpy.types.Scene.xml_rate_status = bpy.props.StringProperty(name="Rate List Status")
     bpy.types.Scene.xml_rate_title = bpy.props.StringProperty(name="Rate Title", default="")
     bpy.types.Scene.xml_rate_year = bpy.props.StringProperty(name="Rate Year", default="")
     bpy.types.Scene.xml_rate_combine_desc = bpy.props.BoolProperty(
@@ -1767,6 +1459,12 @@ def register():
         items=_get_recent_items,
         update=_on_recent_select,
     )
+    bpy.types.Scene.xml_rate_price_list = bpy.props.EnumProperty(
+        name="Price List",
+        description="Quotation list whose prices are shown and applied",
+        items=_get_price_lists,
+        update=_on_price_list_select,
+    )
     bpy.types.Scene.rate_source_mode = bpy.props.EnumProperty(
         name="Source",
         items=[
@@ -1784,16 +1482,41 @@ def register():
     )
     _refresh_recent_cache()
     _refresh_ifc_schedules_cache()
+    for handlers in (bpy.app.handlers.undo_post, bpy.app.handlers.redo_post, bpy.app.handlers.load_post):
+        handlers.append(_on_undo_redo_load)
+    bpy.app.handlers.load_post.append(_on_load_rehydrate)
+    bpy.app.handlers.save_pre.append(_on_save_pre)
+    bpy.app.handlers.save_post.append(_on_save_post)
 
 
 def unregister():
+    for handlers in (bpy.app.handlers.undo_post, bpy.app.handlers.redo_post, bpy.app.handlers.load_post):
+        if _on_undo_redo_load in handlers:
+            handlers.remove(_on_undo_redo_load)
+    for handlers, handler in (
+        (bpy.app.handlers.load_post, _on_load_rehydrate),
+        (bpy.app.handlers.save_pre, _on_save_pre),
+        (bpy.app.handlers.save_post, _on_save_post),
+    ):
+        if handler in handlers:
+            handlers.remove(handler)
     class_unregister()
     del bpy.types.Scene.xml_rate_list
     del bpy.types.Scene.xml_rate_list_active_index
+    del bpy.types.Scene.xml_rate_list_rates
+    del bpy.types.Scene.xml_rate_lazy_rows
+    del bpy.types.Scene.xml_rate_external
+    del bpy.types.Scene.xml_rate_source_path
+    del bpy.types.Scene.xml_rate_source_digest
+    del bpy.types.Scene.xml_rate_price_list_name
+    del bpy.types.Scene.xml_rate_expanded_rows
+    del bpy.types.Scene.xml_rate_active_row
+    del bpy.types.Scene.xml_rate_status
     del bpy.types.Scene.xml_rate_title
     del bpy.types.Scene.xml_rate_year
     del bpy.types.Scene.xml_rate_combine_desc
     del bpy.types.Scene.xml_rate_recent_path
+    del bpy.types.Scene.xml_rate_price_list
     del bpy.types.Scene.rate_source_mode
     del bpy.types.Scene.ifc_rate_source_schedule
 
@@ -0,0 +1,175 @@
+"""Benchmark parse_items of every parser on synthetic price lists.
+
+For each format in synthetic.GENERATORS and each size it writes a file,
+detects its parser like the importer does and times parse_items in a fresh
+process, recording items/second and peak memory. Results go to a JSON file;
+--compare flags the cases slower than a previous run. Needs no Blender:
+
+    python RateListImporter/benchmarks/bench_parsers.py --sizes 10k,100k,1m
+    python RateListImporter/benchmarks/bench_parsers.py --compare bench_parsers.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, os.pardir))
+sys.path.insert(0, HERE)
+
+from synthetic import GENERATORS  # noqa: E402
+
+SIZES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+
+
+def _peak_rss():
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    scale = 1 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+def _run_case(path, parser_name, repeat, trace_memory):
+    """Runs in a fresh process, so peak RSS belongs to this case alone."""
+    import tracemalloc
+    import rate_catalog
+
+    parser_class = getattr(rate_catalog, parser_name)
+    baseline = _peak_rss()
+    best = None
+    for _ in range(repeat):
+        parser = parser_class()
+        with rate_catalog.CleanXmlSource(path) as source:
+            start = time.perf_counter()
+            parser.parse_items(source)
+            elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+        rates = len(parser.xml_rate_list)
+        del parser
+    result = {"rates": rates, "seconds": best}
+    peak = _peak_rss()
+    if peak is not None:
+        result["peak_rss_bytes"] = peak
+        result["rss_growth_bytes"] = peak - baseline
+    if trace_memory:
+        tracemalloc.start()
+        parser = parser_class()
+        with rate_catalog.CleanXmlSource(path) as source:
+            parser.parse_items(source)
+        result["traced_peak_bytes"] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return result
+
+
+def run(formats, sizes, workdir, repeat=3, trace_memory=True):
+    import multiprocessing
+    import rate_catalog
+
+    context = multiprocessing.get_context("spawn")
+    for size_name in sizes:
+        items = SIZES[size_name]
+        for name in formats:
+            write, extension = GENERATORS[name]
+            path = os.path.join(workdir, f"{name}-{size_name}{extension}")
+            if not os.path.exists(path):
+                write(path, items)
+            with rate_catalog.CleanXmlSource(path) as source:
+                parser_class, _ = rate_catalog.sniff_xml_parser(source)
+            with context.Pool(1) as pool:
+                result = pool.apply(_run_case, (path, parser_class.__name__, repeat, trace_memory))
+            result.update({
+                "format": name,
+                "size": size_name,
+                "items": items,
+                "parser": parser_class.__name__,
+                "file_bytes": os.path.getsize(path),
+                "items_per_second": items / result["seconds"],
+            })
+            yield result
+
+
+def _git_commit():
+    import subprocess
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=HERE, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def _mib(n):
+    return f"{n / (1024 * 1024):8.1f} MiB" if n is not None else "           -"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--formats", default=",".join(GENERATORS), help="comma separated, default: all")
+    parser.add_argument("--sizes", default="10k,100k", help="comma separated among " + ", ".join(SIZES))
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per case, the best is kept")
+    parser.add_argument("--no-trace-memory", action="store_true", help="skip the tracemalloc run")
+    parser.add_argument("--workdir", help="keep and reuse the generated files here")
+    parser.add_argument("--output", default="bench_parsers.json", help="JSON results file")
+    parser.add_argument("--compare", help="previous JSON results to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.1, help="slowdown reported as regression")
+    args = parser.parse_args(argv)
+
+    formats = args.formats.split(",")
+    sizes = args.sizes.lower().split(",")
+    for name in formats:
+        if name not in GENERATORS:
+            parser.error(f"unknown format {name}")
+    for size in sizes:
+        if size not in SIZES:
+            parser.error(f"unknown size {size}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = args.workdir or tmp
+        os.makedirs(workdir, exist_ok=True)
+        results = []
+        print(f"{'format':14s} {'size':>5s} {'parser':20s} {'items/s':>10s} {'seconds':>8s} {'rss growth':>12s} {'traced':>12s}")
+        for result in run(formats, sizes, workdir, args.repeat, not args.no_trace_memory):
+            results.append(result)
+            print(
+                f"{result['format']:14s} {result['size']:>5s} {result['parser']:20s}"
+                f" {result['items_per_second']:10.0f} {result['seconds']:8.2f}"
+                f" {_mib(result.get('rss_growth_bytes'))} {_mib(result.get('traced_peak_bytes'))}",
+                flush=True,
+            )
+
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": _git_commit(),
+        "python": sys.version.split()[0],
+        "platform": sys.platform,
+        "cpus": os.cpu_count(),
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf8") as f:
+        json.dump(report, f, indent=1)
+    print(f"results written to {args.output}")
+
+    if not args.compare:
+        return 0
+    with open(args.compare, encoding="utf8") as f:
+        previous = {(r["format"], r["size"]): r for r in json.load(f)["results"]}
+    regressions = 0
+    for result in results:
+        before = previous.get((result["format"], result["size"]))
+        if before is None:
+            continue
+        ratio = result["items_per_second"] / before["items_per_second"]
+        if ratio < 1 - args.threshold:
+            regressions += 1
+            print(f"REGRESSION {result['format']} {result['size']}: {ratio:.0%} of the previous items/s")
+    print(f"{regressions} regressions against {args.compare}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
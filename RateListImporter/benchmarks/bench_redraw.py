@@ -0,0 +1,128 @@
+"""Benchmark the per-redraw rate reads of the RateListImporter panel.
+
+Every redraw of the panel draws the visible rows of the list, polls the
+buttons of the selected rate and, on a new selection, rebuilds its label.
+The bulk update also reads every rate once. This times those reads as they
+were, decoding the JSON attributes string of each scene item, and as they
+are now, reading the typed columns of the RateCatalog by row. Needs no
+Blender:
+
+    python RateListImporter/benchmarks/bench_redraw.py --format toscana_prt --size 100000
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import tempfile
+import timeit
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, os.pardir))
+sys.path.insert(0, HERE)
+
+from synthetic import GENERATORS  # noqa: E402
+
+
+def _match_key(name, identification):
+    # as BulkUpdateCostSchedule._match_key
+    m = re.search(r'\[([^\]]+)\]', name or '')
+    if m:
+        return m.group(1)
+    return re.sub(r'^([A-Z]+)\d{2}(-)', r'\1\2', identification or '')
+
+
+def cases(catalog, rows, active):
+    """(name, before, after) callables doing the same reads both ways."""
+    attributes = [json.dumps(rate) for rate in catalog]  # the scene item strings
+    is_parent = catalog.is_parent.astype(bool).tolist()  # stands for the native item property
+    window = range(active, min(active + rows, len(catalog)))
+
+    def draw_before():
+        for i in window:
+            json.loads(attributes[i])["is_parent"]
+
+    def draw_after():
+        for i in window:
+            is_parent[i]
+
+    def poll_before():
+        json.loads(attributes[active]).get("ifc_id", 0)
+
+    def poll_after():
+        int(catalog.ifc_id[active]) if catalog.ifc_id is not None else 0
+
+    def select_before():
+        json.loads(attributes[active])
+
+    def select_after():
+        catalog[active]
+
+    def index_before():
+        index = {}
+        for row, text in enumerate(attributes):
+            rate = json.loads(text)
+            if not rate["is_parent"]:
+                index.setdefault(_match_key(rate["name"], rate["id"]), row)
+
+    def index_after():
+        index = {}
+        for row in (~catalog.is_parent.astype(bool)).nonzero()[0].tolist():
+            index.setdefault(_match_key(catalog.string("name", row), catalog.string("id", row)), row)
+
+    return [
+        (f"draw {len(window)} rows", draw_before, draw_after),
+        ("poll", poll_before, poll_after),
+        ("selection label", select_before, select_after),
+        ("bulk update index", index_before, index_after),
+    ]
+
+
+def _best(function, repeat):
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat, number)) / number
+
+
+def main(argv=None):
+    import rate_catalog
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--format", default="toscana_prt", choices=sorted(GENERATORS))
+    parser.add_argument("--size", type=int, default=100_000, help="priced items in the synthetic list")
+    parser.add_argument("--rows", type=int, default=30, help="visible rows of the list")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per case, the best is kept")
+    parser.add_argument("--output", help="JSON results file")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        write, extension = GENERATORS[args.format]
+        path = os.path.join(tmp, args.format + extension)
+        write(path, args.size)
+        catalog = rate_catalog.parse_catalog(path).xml_rate_list
+
+    active = len(catalog) // 2
+    results = []
+    print(f"{len(catalog)} rates, {args.format}")
+    print(f"{'case':20s} {'JSON':>12s} {'catalog':>12s} {'speedup':>8s}")
+    for name, before, after in cases(catalog, args.rows, active):
+        repeat = 1 if name == "bulk update index" else args.repeat
+        seconds_before = _best(before, repeat)
+        seconds_after = _best(after, repeat)
+        results.append({"case": name, "json_seconds": seconds_before, "catalog_seconds": seconds_after})
+        print(
+            f"{name:20s} {seconds_before * 1e6:9.1f} us {seconds_after * 1e6:9.1f} us"
+            f" {seconds_before / seconds_after:7.1f}x",
+            flush=True,
+        )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf8") as f:
+            json.dump({"format": args.format, "rates": len(catalog), "rows": args.rows, "results": results}, f, indent=1)
+        print(f"results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
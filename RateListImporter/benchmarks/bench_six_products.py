@@ -0,0 +1,185 @@
+"""Benchmark ParserXmlSix product decoding against the previous implementation.
+
+Builds a synthetic SIX file with ~200k products, once in natural order and
+once with the products shuffled, and times parse_items of the current parser
+and of the pre single-pass version (two findall per product, one find per
+incidenza, global sort). Both sides put the products in the same natural
+prdId order, and the runs alternate between them so drift in the machine
+load hits both alike; the median and the best of the repeats are printed.
+Needs no Blender:
+
+    python RateListImporter/benchmarks/bench_six_products.py [repeats]
+"""
+
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def load_importer():
+    sys.path.insert(0, os.path.join(HERE, os.pardir))
+    import rate_catalog
+    return rate_catalog
+
+
+def write_six(path, chapters=20, subchapters=100, items=99, shuffle=False):
+    products = []
+    for a in range(1, chapters + 1):
+        products.append(f'<prodotto prdId="B{a}"><prdDescrizione breve="Capitolo {a}" estesa=""/></prodotto>\n')
+        for b in range(1, subchapters + 1):
+            products.append(f'<prodotto prdId="B{a}.{b}"><prdDescrizione breve="Sotto {b}" estesa=""/></prodotto>\n')
+            for c in range(1, items + 1):
+                products.append(
+                    f'<prodotto prdId="B{a}.{b}.{c}" unitaDiMisuraId="1" onereSicurezza="2.5">'
+                    f'<prdDescrizione breve="Voce {c}" estesa="Voce estesa {a}.{b}.{c}"/>'
+                    f'<prdQuotazione listaQuotazioneId="L1" valore="{c * 1.25:.2f}"/>'
+                    f'<incidenzaManodopera>31.5</incidenzaManodopera>'
+                    f'<incidenzaMateriali>40</incidenzaMateriali></prodotto>\n'
+                )
+    if shuffle:
+        random.Random(0).shuffle(products)
+    with open(path, "w", encoding="utf8") as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n<PrezzarioSix xmlns="six.xsd">\n<prezzario>\n')
+        f.write('<przDescrizione breve="Benchmark" estesa="Benchmark"/>\n')
+        f.write('<listaQuotazione listaQuotazioneId="L1"/>\n<unitaDiMisura unitaDiMisuraId="1" simbolo="m2"/>\n')
+        f.writelines(products)
+        f.write("</prezzario>\n</PrezzarioSix>\n")
+
+
+def legacy_parser(module):
+    class LegacyParserXmlSix(module.ParserXmlSix):
+        def parse_items(self, xml_content):
+            xml_content = self.clean_xml_content(xml_content)
+            prezzario = self.get_stripped_xml_namespaces_root(xml_content).find("prezzario")
+            self.default_list_id = self._get_default_quotazione_id(prezzario)
+            self._product_items(prezzario)
+
+        def _product_items(self, prezzario):
+            units = self.get_units(prezzario)
+            # the natural prdId order the current parser yields, so both do the same ordering work
+            products = sorted(prezzario.findall("prodotto"), key=lambda p: self._natural_key(p.attrib.get("prdId", "")))
+            index = 0
+            prdId_to_index = {}
+            for product in products:
+                prdId = product.attrib.get("prdId", "")
+                is_parent = self.is_parent(product)
+                if is_parent:
+                    prdId_to_index[prdId] = str(index)
+                parts = prdId.split(".")
+                ancestors = [".".join(parts[:i]) for i in range(1, len(parts))]
+                desc = product.find("prdDescrizione")
+                cost_value = self.get_value(product)
+                self.xml_rate_list.append({
+                    "index": index,
+                    "level": len(parts) - 1,
+                    "is_parent": is_parent,
+                    "parents": ",".join(prdId_to_index[p] for p in ancestors if p in prdId_to_index),
+                    "id": prdId,
+                    "name": self.clean_string(desc.attrib.get("breve", "")) if desc is not None else "",
+                    "desc": self.clean_string(desc.attrib.get("estesa", "")) if desc is not None else "",
+                    "unit": units.get(product.attrib.get("unitaDiMisuraId", ""), ""),
+                    "value": cost_value,
+                    "labor": self.get_value_component(product, cost_value, "incidenzaManodopera"),
+                    "equipment": self.get_value_component(product, cost_value, "incidenzaAttrezzatura"),
+                    "materials": self.get_value_component(product, cost_value, "incidenzaMateriali"),
+                    "safety": self._float(product.attrib.get("onereSicurezza", 0)) * cost_value / 100,
+                })
+                index += 1
+            return self.xml_rate_list
+
+        def get_value(self, product):
+            quotazioni = product.findall("prdQuotazione")
+            if not quotazioni:
+                return 0.0
+            for el in quotazioni:
+                if self.default_list_id and el.attrib.get("listaQuotazioneId") == self.default_list_id:
+                    return self._float(el.attrib.get("valore", 0.0))
+            return self._float(quotazioni[0].attrib.get("valore", 0.0))
+
+        @staticmethod
+        def get_value_component(product, cost_value, component_type):
+            try:
+                return float(getattr(product.find(component_type), "text", 0.0)) * cost_value / 100
+            except Exception:
+                return 0.0
+
+        @staticmethod
+        def is_parent(product):
+            quotazioni = product.findall("prdQuotazione")
+            if not quotazioni:
+                return True
+            return all(float(q.attrib.get("valore", 0)) == 0.0 for q in quotazioni)
+
+    return LegacyParserXmlSix
+
+
+def current_product_items(parser, prezzario):
+    units = parser.get_units(prezzario)
+    return list(parser._iter_product_items(prezzario.findall("prodotto"), units))
+
+
+def timed(cases, repeat):
+    """Runs cases round-robin repeat times; returns {label: (median, best, count)}."""
+    times = {label: [] for label, _ in cases}
+    counts = {}
+    for _ in range(repeat):
+        for label, run in cases:
+            start = time.perf_counter()
+            counts[label] = run()
+            times[label].append(time.perf_counter() - start)
+    return {label: (statistics.median(t), min(t), counts[label]) for label, t in times.items()}
+
+
+def bench(module, path, repeat):
+    xml_content = module.PriceListParser.get_xml_content(path)
+    legacy = legacy_parser(module)
+    helper = module.ParserXmlSix()
+    prezzario = helper.get_stripped_xml_namespaces_root(helper.clean_xml_content(xml_content)).find("prezzario")
+
+    def products(parser_class, items):
+        def run():
+            parser = parser_class()
+            parser.default_list_id = parser._get_default_quotazione_id(prezzario)
+            return len(items(parser, prezzario))
+        return run
+
+    def parse(parser_class):
+        def run():
+            parser = parser_class()
+            parser.parse_items(xml_content)
+            return len(parser.xml_rate_list)
+        return run
+
+    first, second = legacy(), module.ParserXmlSix()
+    first.parse_items(xml_content)
+    second.parse_items(xml_content)
+    assert [r["id"] for r in first.xml_rate_list] == [r["id"] for r in second.xml_rate_list]
+
+    cases = (
+        ("products, legacy", products(legacy, lambda p, z: p._product_items(z))),
+        ("products, current", products(module.ParserXmlSix, current_product_items)),
+        ("parse_items, legacy", parse(legacy)),
+        ("parse_items, current", parse(module.ParserXmlSix)),
+    )
+    for label, (median, best, count) in timed(cases, repeat).items():
+        print(f"{label:22s} {count} rates  median {median:.2f} s  best {best:.2f} s  {count / median:,.0f} items/s")
+
+
+def main():
+    module = load_importer()
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    with tempfile.TemporaryDirectory() as tmp:
+        for shuffle in (False, True):
+            path = os.path.join(tmp, "bench_six.xml")
+            write_six(path, shuffle=shuffle)
+            print("shuffled products" if shuffle else "products in natural order")
+            bench(module, path, repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,288 @@
+"""Synthetic price lists in every format rate_catalog parses, for benchmarks.
+
+Each writer produces a valid file with the given number of priced items
+(leaf rates), grouped in chapters of 10 categories of 100 items, carrying
+the signature _XML_SIGNATURES uses to detect its format:
+
+    from synthetic import GENERATORS
+    write, extension = GENERATORS["toscana_prt"]
+    write("toscana" + extension, 100_000)
+
+Values are deterministic, so two runs write identical files.
+"""
+
+from xml.sax.saxutils import escape
+
+CATEGORIES = 10
+ITEMS = 100
+
+UNITS = ("m", "m2", "m3", "kg", "cad", "h")
+
+
+def _tree(items):
+    """Yields (chapter, category, item, n) for items leaves, 1-based; n counts leaves from 0."""
+    n = 0
+    chapter = 0
+    while n < items:
+        chapter += 1
+        for category in range(1, CATEGORIES + 1):
+            for item in range(1, ITEMS + 1):
+                if n >= items:
+                    return
+                yield chapter, category, item, n
+                n += 1
+
+
+def _price(n):
+    return round(1 + (n * 7919 % 100000) / 100, 2)
+
+
+def _text(n, words=12):
+    # some variety in length and vocabulary, with XML special characters
+    vocabulary = ("scavo", "calcestruzzo", "armatura", "muratura", "intonaco", "posa",
+                  "fornitura", "compreso", "trasporto", "à", "è", "&", "<", "°C")
+    return escape(" ".join(vocabulary[(n + i * i) % len(vocabulary)] for i in range(words + n % 7)))
+
+
+def write_veneto(path, items):
+    with open(path, "w", encoding="utf8") as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n<prezzario rks="synthetic">\n')
+        last = (None, None)
+        for a, b, c, n in _tree(items):
+            if (a, b) != last:
+                if last[1] is not None:
+                    f.write("</prezzi></paragrafo></capitolo>\n")
+                if a != last[0]:
+                    if last[0] is not None:
+                        f.write("</settore>\n")
+                    f.write(f'<settore cod="S{a}" desc="Settore {a}">\n')
+                f.write(f'<capitolo cod="S{a}.{b:02d}" desc="Capitolo {a}.{b}">'
+                        f'<paragrafo cod="S{a}.{b:02d}.001"><nome>Paragrafo {a}.{b}</nome>'
+                        f'<descrizione>{_text(n)}</descrizione><prezzi>\n')
+                last = (a, b)
+            f.write(f'<prezzo cod="S{a}.{b:02d}.001.{c:03d}" umi="{UNITS[n % 6]}" val="{_price(n)}" '
+                    f'man="{n % 60}">{_text(n, 4)}</prezzo>\n')
+        if last[0] is not None:
+            f.write("</prezzi></paragrafo></capitolo>\n</settore>\n")
+        f.write("</prezzario>\n")
+
+
+def write_basilicata(path, items):
+    with open(path, "w", encoding="utf8") as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n<prezzario>\n'
+                '<pdf>Prezzario_Regione_Basilicata_2024.pdf</pdf>\n<capitoli>\n')
+        last = (None, None)
+        for a, b, c, n in _tree(items):
+            if (a, b) != last:
+                if last[1] is not None:
+                    f.write("</sottovoci></voce></voci></categoria>\n")
+                if a != last[0]:
+                    if last[0] is not None:
+                        f.write("</categorie></capitolo>\n")
+                    f.write(f"<capitolo><codice>B{a}</codice><descrizione>Capitolo {a}</descrizione><categorie>\n")
+                f.write(f"<categoria><codice>{b:02d}</codice><descrizione>Categoria {a}.{b}</descrizione><voci>"
+                        f"<voce><codice>001</codice><descrizione>{_text(n)}</descrizione><sottovoci>\n")
+                last = (a, b)
+            f.write(f"<sottovoce><codice>{c:03d}</codice><descrizione>{_text(n, 3)}</descrizione>"
+                    f"<unitaMisura><codice>{UNITS[n % 6]}</codice></unitaMisura>"
+                    f"<prezzo>{_price(n)}</prezzo><manodopera>{n % 60}</manodopera></sottovoce>\n")
+        if last[0] is not None:
+            f.write("</sottovoci></voce></voci></categoria>\n</categorie></capitolo>\n")
+        f.write("</capitoli>\n</prezzario>\n")
+
+
+def _write_toscana(path, items, prefix, region):
+    ns = prefix + ":" if prefix else ""
+    with open(path, "w", encoding="utf8") as f:
+        # Toscana files use their EASY/PRT prefix without declaring it
+        f.write(f'<?xml version="1.0" encoding="UTF-8"?>\n<{ns}Prezzario>\n'
+                f'<{ns}intestazione><{ns}dettaglio anno="2024" area="{region}" autore="Regione {region}"/>'
+                f'</{ns}intestazione>\n<{ns}Contenuto>\n')
+        for a, b, c, n in _tree(items):
+            if region == "Liguria":
+                body = (f'<{ns}um>metro quadrato ({UNITS[n % 6]})</{ns}um><{ns}prezzo valore="{_price(n)}"/>'
+                        f'<{ns}mo>{n % 60}</{ns}mo><{ns}sicurezza>{n % 5}.5</{ns}sicurezza>')
+            else:
+                price = f"{_price(n):.2f}".replace(".", ",")  # Toscana writes decimal commas
+                body = (f'<{ns}um>{UNITS[n % 6]}</{ns}um><{ns}prezzo>{price}</{ns}prezzo>'
+                        f'<{ns}Analisi><{ns}onerisicurezza valore="{n % 5}.5"/>'
+                        f'<{ns}incidenzamanodopera percentuale="{n % 60}"/></{ns}Analisi>')
+            f.write(f'<{ns}Articolo codice="T{a:02d}.A{b:02d}.{c:03d}.001"><{ns}tipo>Tipologia {a}</{ns}tipo>'
+                    f'<{ns}capitolo>Capitolo {a}.{b}</{ns}capitolo><{ns}voce>{_text(n)}</{ns}voce>'
+                    f'<{ns}articolo>{_text(n, 3)}</{ns}articolo>{body}</{ns}Articolo>\n')
+        f.write(f"</{ns}Contenuto>\n</{ns}Prezzario>\n")
+
+
+def write_toscana_prt(path, items):
+    _write_toscana(path, items, "PRT", "Toscana")
+
+
+def write_toscana_easy(path, items):
+    _write_toscana(path, items, "EASY", "Toscana")
+
+
+def write_liguria(path, items):
+    _write_toscana(path, items, "", "Liguria")
+
+
+def write_lombardia_1(path, items):
+    with open(path, "w", encoding="utf8") as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n<prezzario>\n<voci>\n')
+        for a, b, c, n in _tree(items):
+            f.write(f"<voci><riferimenti_voce><autore>Regione Lombardia</autore><invigore>gennaio</invigore>"
+                    f"<anno>2024</anno></riferimenti_voce>"
+                    f'<dettaglio_voce CMPcodifica_voce="1C.{a:02d}.{b:03d}.{c:04d}" udm_voce="{UNITS[n % 6]}" '
+                    f'prezzo_voce="{_price(n)}" rapporto_RU_voce="{n % 60}" '
+                    f'codifica_I_livello_voce="1C.{a:02d}" declaratoria_I_livello_voce="Livello {a}" '
+                    f'codifica_II_livello_voce="1C.{a:02d}.{b:03d}" declaratoria_II_livello_voce="Livello {a}.{b}">'
+                    f"<declaratoria_voce>{_text(n)}</declaratoria_voce></dettaglio_voce></voci>\n")
+        f.write("</voci>\n</prezzario>\n")
+
+
+def write_lombardia_2(path, items):
+    with open(path, "w", encoding="utf8") as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n<Prezzario file="LOM_2024.xml">\n'
+                "<autore>LOM</autore>\n")
+        last = None
+        for a, b, c, n in _tree(items):
+            if (a, b) != last:
+                f.write(f"<Voce><Codice>L{a:02d}.{b:03d} - Gruppo</Codice>"
+                        f"<Declaratoria>Gruppo {a}.{b}</Declaratoria><UM></UM></Voce>\n")
+                last = (a, b)
+            price = f"{_price(n):,.2f}".replace(",", " ").replace(".", ",").replace(" ", ".")
+            f.write(f"<Voce><Codice>L{a:02d}.{b:03d}.{c:04d}</Codice><Declaratoria>{_text(n)}</Declaratoria>"
+                    f"<UM>{UNITS[n % 6]}</UM><Prezzo>{price} €</Prezzo>"
+                    f"<Rapporto_RU>{n % 60},00</Rapporto_RU></Voce>\n")
+        f.write("</Prezzario>\n")
+
+
+def write_xpwe(path, items):
+    chapters = -(-items // (CATEGORIES * ITEMS))
+    with open(path, "w", encoding="utf8") as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n<PweDocumento>\n<PweDatiGenerali>'
+                "<PweDGProgetto><PweDGDatiGenerali><Oggetto>Elenco prezzi sintetico</Oggetto>"
+                "</PweDGDatiGenerali></PweDGProgetto>\n<PweDGCapitoliCategorie><PweDGSuperCapitoli>\n")
+        for a in range(1, chapters + 1):
+            f.write(f'<DGSuperCapitoliItem ID="{a}"><Codice>SC{a}</Codice>'
+                    f"<DesSintetica>Supercapitolo {a}</DesSintetica></DGSuperCapitoliItem>\n")
+        f.write("</PweDGSuperCapitoli><PweDGCapitoli>\n")
+        for a in range(1, chapters + 1):
+            for b in range(1, CATEGORIES + 1):
+                f.write(f'<DGCapitoliItem ID="{a * 100 + b}"><Codice>C{a}.{b}</Codice>'
+                        f"<DesSintetica>Capitolo {a}.{b}</DesSintetica></DGCapitoliItem>\n")
+        f.write("</PweDGCapitoli></PweDGCapitoliCategorie>\n</PweDatiGenerali>\n"
+                "<PweMisurazioni><PweElencoPrezzi>\n")
+        for a, b, c, n in _tree(items):
+            price = _price(n)
+            f.write(f'<EPItem ID="{n + 1}"><Tariffa>E{a}.{b}.{c:03d}</Tariffa><DesRidotta>{_text(n, 3)}</DesRidotta>'
+                    f"<DesEstesa>{_text(n)}</DesEstesa><UnMisura>{UNITS[n % 6]}</UnMisura>"
+                    f"<Prezzo1>{price}</Prezzo1><IncSIC>{n % 5}</IncSIC><IncMDO>{n % 60},5</IncMDO>"
+                    f"<IncMAT>20</IncMAT><IncATTR>0</IncATTR>"
+                    f"<IDSpCap>{a}</IDSpCap><IDCap>{a * 100 + b}</IDCap></EPItem>\n")
+        f.write("</PweElencoPrezzi></PweMisurazioni>\n</PweDocumento>\n")
+
+
+def write_six(path, items):
+    with open(path, "w", encoding="utf8") as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n<PrezzarioSix xmlns="six.xsd">\n<prezzario>\n'
+                '<przDescrizione breve="Prezzario sintetico" estesa="Prezzario sintetico"/>\n'
+                '<listaQuotazione listaQuotazioneId="L1"/>\n<listaQuotazione listaQuotazioneId="L2"/>\n')
+        for i, unit in enumerate(UNITS):
+            f.write(f'<unitaDiMisura unitaDiMisuraId="{i}" simbolo="{unit}"/>\n')
+        last = (None, None)
+        for a, b, c, n in _tree(items):
+            if a != last[0]:
+                f.write(f'<prodotto prdId="P{a}"><prdDescrizione breve="Capitolo {a}" estesa=""/></prodotto>\n')
+            if (a, b) != last:
+                f.write(f'<prodotto prdId="P{a}.{b}"><prdDescrizione breve="Categoria {a}.{b}" estesa=""/></prodotto>\n')
+                last = (a, b)
+            price = _price(n)
+            f.write(f'<prodotto prdId="P{a}.{b}.{c}" unitaDiMisuraId="{n % 6}" onereSicurezza="{n % 5}.5">'
+                    f'<prdDescrizione breve="{_text(n, 3)}" estesa="{_text(n)}"/>'
+                    f'<prdQuotazione listaQuotazioneId="L1" valore="{price}"/>'
+                    f'<prdQuotazione listaQuotazioneId="L2" valore="{price * 1.1:.2f}"/>'
+                    f"<incidenzaManodopera>{n % 60}</incidenzaManodopera>"
+                    f"<incidenzaMateriali>20</incidenzaMateriali></prodotto>\n")
+        f.write("</prezzario>\n</PrezzarioSix>\n")
+
+
+def _step_text(n, words=12):
+    # STEP string literal: quotes doubled, non-ASCII as \X2\ escapes
+    text = " ".join(("scavo", "calcestruzzo", "l'armatura", "muratura", "posa", "à", "è", "°C")[(n + i * i) % 8]
+                    for i in range(words + n % 7))
+    text = "".join(c if ord(c) < 128 else f"\\X2\\{ord(c):04X}\\X0\\" for c in text)
+    return "'" + text.replace("'", "''") + "'"
+
+
+def write_ifc(path, items, filler=20):
+    """IFC4 model with one schedule of rates, plus filler geometry records per item to skip."""
+    counter = iter(range(1, 1 << 62))
+
+    def record(f, text):
+        instance = next(counter)
+        f.write(f"#{instance}={text};\n")
+        return instance
+
+    def guid(instance):
+        return f"'{instance:022d}'"
+
+    with open(path, "w", encoding="utf8") as f:
+        f.write("ISO-10303-21;\nHEADER;\nFILE_DESCRIPTION(('ViewDefinition [DesignTransferView]'),'2;1');\n"
+                "FILE_NAME('synthetic.ifc','2024-01-01T00:00:00',(''),(''),'synthetic','synthetic','');\n"
+                "FILE_SCHEMA(('IFC4'));\nENDSEC;\nDATA;\n")
+        schedule = record(f, "IFCCOSTSCHEDULE('0000000000000000000000',$,'Elenco prezzi sintetico',$,$,'EP',"
+                             ".SCHEDULEOFRATES.,$,$,$)")
+        roots = []
+        chapter = category = None
+        chapter_children = []
+        category_children = []
+
+        def close_category():
+            if category is not None:
+                record(f, f"IFCRELNESTS({guid(category)},$,$,$,#{category},({','.join(f'#{i}' for i in category_children)}))")
+
+        def close_chapter():
+            close_category()
+            if chapter is not None:
+                record(f, f"IFCRELNESTS({guid(chapter)},$,$,$,#{chapter},({','.join(f'#{i}' for i in chapter_children)}))")
+
+        last = (None, None)
+        for a, b, c, n in _tree(items):
+            if a != last[0]:
+                close_chapter()
+                chapter = record(f, f"IFCCOSTITEM({guid(n)},$,'Capitolo {a}',$,$,'E{a}',$,$,$)")
+                roots.append(chapter)
+                chapter_children = []
+                category = None
+            if (a, b) != last:
+                close_category()
+                category = record(f, f"IFCCOSTITEM({guid(n)},$,'Categoria {a}.{b}',{_step_text(n, 4)},$,'E{a}.{b}',$,$,$)")
+                chapter_children.append(category)
+                category_children = []
+                last = (a, b)
+            price = _price(n)
+            labor = record(f, f"IFCCOSTVALUE($,$,IFCMONETARYMEASURE({price * (n % 60) / 100:.2f}),$,$,$,'Labor',$,$,$)")
+            value = record(f, f"IFCCOSTVALUE($,$,IFCMONETARYMEASURE({price}),$,$,$,$,$,.ADD.,(#{labor}))")
+            category_children.append(record(
+                f, f"IFCCOSTITEM({guid(n)},$,{_step_text(n, 3)},{_step_text(n)},$,'E{a}.{b}.{c:03d}',$,(#{value}),$)"
+            ))
+            for i in range(filler):
+                record(f, f"IFCCARTESIANPOINT(({n}.,{i}.,{(n * i) % 97}.5))")
+        close_chapter()
+        record(f, f"IFCRELASSIGNSTOCONTROL({guid(schedule)},$,$,$,({','.join(f'#{i}' for i in roots)}),$,#{schedule})")
+        f.write("ENDSEC;\nEND-ISO-10303-21;\n")
+
+
+# format name -> (writer, file extension)
+GENERATORS = {
+    "veneto": (write_veneto, ".xml"),
+    "basilicata": (write_basilicata, ".xml"),
+    "toscana_prt": (write_toscana_prt, ".xml"),
+    "toscana_easy": (write_toscana_easy, ".xml"),
+    "liguria": (write_liguria, ".xml"),
+    "lombardia_1": (write_lombardia_1, ".xml"),
+    "lombardia_2": (write_lombardia_2, ".xml"),
+    "xpwe": (write_xpwe, ".xpwe"),
+    "six": (write_six, ".xml"),
+    "ifc": (write_ifc, ".ifc"),
+}
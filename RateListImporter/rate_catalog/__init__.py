@@ -0,0 +1,30 @@
+"""Price list parsing and rate catalogs, without Blender.
+
+Everything RateListImporter needs to turn a prezzario into a RateCatalog
+lives here so it can run, be profiled and be batched outside Blender;
+`python -m rate_catalog` converts a file from the command line and
+`python -m rate_catalog.batch` pre-fills the cache from whole directories.
+"""
+
+from .cache import CACHE_MAX_BYTES, cache_load, cache_lookup, cache_store, read_catalog, write_catalog
+from .catalog import RateCatalog, RateCatalogBuilder, XmlRateItem, subtree_ends
+from .cost_tree import CostTree, cost_tree, touch_cost_trees
+from .matching import RateMatchIndex, code_similarity
+from .loader import PARALLEL_THRESHOLD, STREAM_THRESHOLD, ParseCancelled, parse_catalog
+from .parsers import (
+    ParserIfcCostSchedule,
+    ParserXmlBasilicata,
+    ParserXmlLiguria,
+    ParserXmlLombardia,
+    ParserXmlSix,
+    ParserXmlToscana,
+    ParserXmlVeneto,
+    ParserXpwe,
+    PriceListParser,
+)
+from .search import RateSearchIndex, fold
+from .shared import loaded_catalog, publish_catalog
+from .sniff import SNIFF_WINDOW, find_xml_parser, sniff_xml_parser
+from .source import CleanXmlSource
+from .step import ParserIfcStep
+from .valuation import ScheduleValuation, cost_value_amount, schedule_valuation
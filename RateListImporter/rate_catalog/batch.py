@@ -0,0 +1,143 @@
+"""Batch ingestion of price lists into the RateListImporter cache.
+
+    python -m rate_catalog.batch PREZZARI_DIR... --cache-dir DIR [--workers N]
+
+Finds every .xml/.xpwe file under the given directories, parses them in a
+pool of worker processes and stores each catalog in the cache directory,
+so Blender loads them without parsing. In Blender the cache directory is
+RateListImporter_cache inside bpy.utils.user_resource('CONFIG').
+"""
+
+import argparse
+import json
+import sys
+import time
+
+from .cache import add_cache_entries, cache_lookup, write_cache_entry
+from .loader import parse_catalog
+
+EXTENSIONS = (".xml", ".xpwe", ".ifc")  # as ImportRateList.filter_glob
+
+
+def discover(paths):
+    """Price list files in paths (files or directories, searched recursively), largest first."""
+    import os
+
+    found = set()
+    for path in paths:
+        if os.path.isfile(path):
+            found.add(os.path.abspath(path))
+            continue
+        for folder, _, files in os.walk(path):
+            found.update(
+                os.path.abspath(os.path.join(folder, name))
+                for name in files
+                if name.lower().endswith(EXTENSIONS)
+            )
+    # big files first, so one of them does not end up alone at the tail of the pool
+    return sorted(found, key=lambda p: (-os.path.getsize(p), p))
+
+
+def _ingest_file(task):
+    """Pool worker: parses one file and writes its catalog; returns a result dict, never raises."""
+    import os
+
+    cache_dir, filepath = task
+    result = {"file": filepath, "status": "failed", "bytes": 0, "rates": 0, "seconds": 0.0}
+    start = time.perf_counter()
+    try:
+        result["bytes"] = os.path.getsize(filepath)
+        parser = parse_catalog(filepath, workers=1)  # already one file per process
+        if parser is None:
+            result["error"] = "unknown price list format"
+        else:
+            result["parser"] = type(parser).__name__
+            result["rates"] = len(parser.xml_rate_list)
+            result["record"] = write_cache_entry(cache_dir, filepath, parser.xml_rate_list)
+            result["status"] = "parsed"
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+
+def ingest(paths, cache_dir, workers=None, force=False):
+    """Parses the price lists in paths into cache_dir, yielding one result dict per file as it completes.
+
+    Files already cached are reported as "cached" unless force is set. The
+    cache index is updated once every file is done.
+    """
+    import multiprocessing
+    import os
+
+    files = discover(paths)
+    tasks = []
+    for filepath in files:
+        if not force and cache_lookup(cache_dir, filepath):
+            yield {"file": filepath, "status": "cached", "bytes": os.path.getsize(filepath), "rates": 0, "seconds": 0.0}
+        else:
+            tasks.append((cache_dir, filepath))
+    if not tasks:
+        return
+
+    records = []
+    workers = min(workers or os.cpu_count() or 1, len(tasks))
+    try:
+        if workers > 1:
+            with multiprocessing.Pool(workers) as pool:
+                for result in pool.imap_unordered(_ingest_file, tasks):
+                    if "record" in result:
+                        records.append(result.pop("record"))
+                    yield result
+        else:
+            for task in tasks:
+                result = _ingest_file(task)
+                if "record" in result:
+                    records.append(result.pop("record"))
+                yield result
+    finally:
+        if records:
+            add_cache_entries(cache_dir, records)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m rate_catalog.batch", description=__doc__.splitlines()[0])
+    parser.add_argument("paths", nargs="+", help="price list files or directories")
+    parser.add_argument("--cache-dir", required=True, help="RateListImporter cache directory to fill")
+    parser.add_argument("--workers", type=int, help="worker processes (default: one per core)")
+    parser.add_argument("--force", action="store_true", help="parse again files already in the cache")
+    parser.add_argument("--json", action="store_true", help="print one JSON object per file")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    totals = {"parsed": 0, "cached": 0, "failed": 0}
+    parsed_bytes = 0
+    for result in ingest(args.paths, args.cache_dir, args.workers, args.force):
+        totals[result["status"]] += 1
+        if args.json:
+            print(json.dumps(result), flush=True)
+            continue
+        if result["status"] == "parsed":
+            parsed_bytes += result["bytes"]
+            seconds = max(result["seconds"], 1e-9)
+            print(
+                f"ok      {result['file']}: {result['parser']}, {result['rates']} rates in {seconds:.2f} s"
+                f" ({result['bytes'] / seconds / 1e6:.1f} MB/s, {result['rates'] / seconds:.0f} rates/s)",
+                flush=True,
+            )
+        elif result["status"] == "cached":
+            print(f"cached  {result['file']}", flush=True)
+        else:
+            print(f"FAILED  {result['file']}: {result['error']}", flush=True)
+
+    elapsed = time.perf_counter() - start
+    if not args.json:
+        print(
+            f"{totals['parsed']} parsed, {totals['cached']} already cached, {totals['failed']} failed"
+            f" in {elapsed:.1f} s ({parsed_bytes / max(elapsed, 1e-9) / 1e6:.1f} MB/s overall)"
+        )
+    return 1 if totals["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
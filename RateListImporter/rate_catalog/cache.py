@@ -0,0 +1,157 @@
+"""On-disk cache of parsed rate lists, keyed by a fingerprint of the source file.
+
+A cache directory holds one <digest>.rates file per parsed price list (the
+zlib-compressed RateCatalog.to_bytes) and an index.json mapping source paths
+to (size, mtime_ns, digest) and digests to their size and last use.
+"""
+
+import json
+
+from .catalog import RateCatalog
+
+CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+
+def _write_atomic(path, data):
+    """Writes data to a temporary file of its own next to path, then renames it into place.
+
+    Concurrent writers of the same path never share the temporary file, so
+    the last rename wins with a complete file.
+    """
+    import os, tempfile
+    fd, tmp = tempfile.mkstemp(prefix=os.path.basename(path) + '.', suffix='.tmp', dir=os.path.dirname(path) or '.')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def write_catalog(path, catalog):
+    """Writes catalog to path atomically; returns the number of bytes written."""
+    import zlib
+    blob = zlib.compress(catalog.to_bytes(), 1)
+    _write_atomic(path, blob)
+    return len(blob)
+
+
+def read_catalog(path):
+    import zlib
+    with open(path, 'rb') as f:
+        return RateCatalog.from_bytes(zlib.decompress(f.read()))
+
+
+def load_cache_index(cache_dir):
+    import os
+    try:
+        with open(os.path.join(cache_dir, 'index.json'), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception:
+        return {'paths': {}, 'entries': {}}
+
+
+def save_cache_index(cache_dir, index):
+    import os
+    try:
+        _write_atomic(os.path.join(cache_dir, 'index.json'), json.dumps(index).encode('utf-8'))
+    except Exception:
+        pass
+
+
+def file_digest(filepath):
+    import hashlib
+    digest = hashlib.blake2b(digest_size=16)
+    with open(filepath, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _cache_digest(filepath, index, stat):
+    """Content hash of filepath, re-hashing only when size or mtime no longer match the index."""
+    known = index['paths'].get(filepath)
+    if known and known[0] == stat.st_size and known[1] == stat.st_mtime_ns:
+        return known[2]
+    if not any(e['size'] == stat.st_size for e in index['entries'].values()):
+        return None  # no entry could match: skip hashing until store time
+    return file_digest(filepath)
+
+
+def cache_load(cache_dir, filepath):
+    """Returns the cached RateCatalog for filepath, or None on a miss."""
+    import os, time
+    try:
+        stat = os.stat(filepath)
+        index = load_cache_index(cache_dir)
+        digest = _cache_digest(filepath, index, stat)
+        if digest is None or digest not in index['entries']:
+            return None
+        catalog = read_catalog(os.path.join(cache_dir, digest + '.rates'))
+    except Exception:
+        return None
+    index['paths'][filepath] = [stat.st_size, stat.st_mtime_ns, digest]
+    index['entries'][digest]['last_used'] = time.time()
+    save_cache_index(cache_dir, index)
+    return catalog
+
+
+def cache_lookup(cache_dir, filepath):
+    """Digest under which filepath is cached, or None when it is not (without reading the catalog)."""
+    import os
+    try:
+        index = load_cache_index(cache_dir)
+        digest = _cache_digest(filepath, index, os.stat(filepath))
+    except OSError:
+        return None
+    return digest if digest in index['entries'] else None
+
+
+def write_cache_entry(cache_dir, filepath, catalog):
+    """Writes the catalog file of filepath; returns the index record for add_cache_entries.
+
+    Safe to call from several processes at once: only add_cache_entries
+    touches index.json.
+    """
+    import os
+    os.makedirs(cache_dir, exist_ok=True)
+    stat = os.stat(filepath)
+    digest = file_digest(filepath)
+    size = write_catalog(os.path.join(cache_dir, digest + '.rates'), catalog)
+    return filepath, stat.st_size, stat.st_mtime_ns, digest, size
+
+
+def add_cache_entries(cache_dir, records, max_bytes=CACHE_MAX_BYTES):
+    """Indexes records from write_cache_entry and evicts least recently used entries above max_bytes."""
+    import os, time
+    index = load_cache_index(cache_dir)
+    now = time.time()
+    for filepath, size, mtime_ns, digest, nbytes in records:
+        index['paths'][filepath] = [size, mtime_ns, digest]
+        index['entries'][digest] = {'size': size, 'bytes': nbytes, 'last_used': now}
+    fresh = {record[3] for record in records}
+
+    total = sum(e['bytes'] for e in index['entries'].values())
+    for old in sorted(index['entries'], key=lambda d: index['entries'][d]['last_used']):
+        if total <= max_bytes or old in fresh:
+            break
+        total -= index['entries'].pop(old)['bytes']
+        try:
+            os.remove(os.path.join(cache_dir, old + '.rates'))
+        except OSError:
+            pass
+    index['paths'] = {p: v for p, v in index['paths'].items() if v[2] in index['entries']}
+    save_cache_index(cache_dir, index)
+
+
+def cache_store(cache_dir, filepath, catalog, max_bytes=CACHE_MAX_BYTES):
+    """Writes catalog for filepath and evicts least recently used entries above max_bytes."""
+    try:
+        record = write_cache_entry(cache_dir, filepath, catalog)
+    except Exception:
+        return
+    add_cache_entries(cache_dir, [record], max_bytes)
@@ -0,0 +1,273 @@
+"""Rate records and the compact, array-backed RateCatalog built from them."""
+
+from typing import TypedDict
+
+import numpy as np
+
+
+class XmlRateItem(TypedDict):
+    index: int
+    level: int
+    is_parent: bool
+    parents: str
+    id: str
+    name: str
+    desc: str
+    unit: str
+    value: float
+    labor: float
+    equipment: float
+    materials: float
+    safety: float
+
+
+class RateCatalog:
+    """Read-only, column-oriented store of XmlRateItem records.
+
+    Numbers live in NumPy arrays, the hierarchy in an int32 array of
+    immediate parents (-1 for roots) and id/name/desc/unit as references
+    into one deduplicated UTF-8 blob. Indexing and iteration build plain
+    XmlRateItem dicts on demand, so a catalog can stand in for xml_rate_list.
+
+    value_columns holds one price array per quotation list when the source
+    has several (SIX); select_value_column switches value and its components
+    to one of them without touching the file. source_digest is the cache
+    digest of the file the catalog was parsed from, "" when unknown.
+    """
+
+    NUMERIC_FIELDS = ("value", "labor", "equipment", "materials", "safety")
+    STRING_FIELDS = ("id", "name", "desc", "unit")
+    _FORMAT = 2
+
+    def __init__(self, level, is_parent, parent, numeric, refs, offsets, blob, ifc_id=None, value_columns=None):
+        self.level = level
+        self.is_parent = is_parent
+        self.parent = parent
+        self.numeric = numeric
+        self.refs = refs
+        self.offsets = offsets
+        self.blob = blob
+        self.ifc_id = ifc_id
+        self.value_columns = value_columns or {}
+        self.active_value_column = None
+        self.source_digest = ""
+        self._parsed_numeric = dict(numeric)
+        self._children = None
+
+    def select_value_column(self, name):
+        """Makes value and its components follow quotation list name; None restores the parsed ones.
+
+        Components scale with the price, as they are percentages of it; rates
+        without a parsed price keep zero components.
+        """
+        parsed = self._parsed_numeric
+        if name not in self.value_columns:
+            name = None
+        if name is None:
+            self.numeric = dict(parsed)
+        else:
+            value = self.value_columns[name]
+            scale = np.divide(value, parsed["value"], out=np.zeros_like(value), where=parsed["value"] != 0)
+            self.numeric = {f: value if f == "value" else parsed[f] * scale for f in self.NUMERIC_FIELDS}
+        self.active_value_column = name
+
+    @classmethod
+    def from_rates(cls, rates):
+        builder = RateCatalogBuilder()
+        for rate in rates:
+            builder.add(rate)
+        return builder.build()
+
+    def __len__(self):
+        return len(self.level)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        rate = {
+            "index": index,
+            "level": int(self.level[index]),
+            "is_parent": bool(self.is_parent[index]),
+            "parents": self.parents(index),
+        }
+        for field in self.STRING_FIELDS:
+            rate[field] = self.string(field, index)
+        for field in self.NUMERIC_FIELDS:
+            rate[field] = float(self.numeric[field][index])
+        if self.ifc_id is not None:
+            rate["ifc_id"] = int(self.ifc_id[index])
+        return rate
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def string(self, field, index):
+        ref = self.refs[field][index]
+        return self.blob[self.offsets[ref]:self.offsets[ref + 1]].decode("utf8")
+
+    def parent_chain(self, index):
+        chain = []
+        index = self.parent[index]
+        while index >= 0:
+            chain.append(int(index))
+            index = self.parent[index]
+        chain.reverse()
+        return chain
+
+    def parents(self, index):
+        return ",".join(str(p) for p in self.parent_chain(index))
+
+    def children(self, index):
+        """Rows whose immediate parent is index (-1 for the roots), in catalog order."""
+        if self._children is None:
+            order = np.argsort(self.parent, kind="stable")
+            offsets = np.zeros(len(self) + 2, dtype=np.int64)
+            np.cumsum(np.bincount(self.parent + 1, minlength=len(self) + 1), out=offsets[1:])
+            self._children = (order.astype(np.int32), offsets)
+        order, offsets = self._children
+        return order[offsets[index + 1]:offsets[index + 2]]
+
+    def with_ancestors(self, rows):
+        """Boolean mask of rows and all their parents."""
+        mask = np.zeros(len(self), dtype=bool)
+        mask[rows] = True
+        current = np.asarray(rows)
+        while len(current):
+            # one level up per pass; a mask instead of np.unique keeps it linear
+            found = self.parent[current]
+            level = np.zeros_like(mask)
+            level[found[found >= 0]] = True
+            level &= ~mask
+            mask |= level
+            current = np.flatnonzero(level)
+        return mask
+
+    @property
+    def nbytes(self):
+        arrays = [self.level, self.is_parent, self.parent, self.offsets]
+        arrays += list(self.numeric.values()) + list(self.refs.values())
+        if self.ifc_id is not None:
+            arrays.append(self.ifc_id)
+        arrays += list(self.value_columns.values())
+        return sum(a.nbytes for a in arrays) + len(self.blob)
+
+    def to_bytes(self):
+        import marshal
+        columns = {"level": self.level, "is_parent": self.is_parent, "parent": self.parent, "offsets": self.offsets}
+        columns.update(("num_" + f, a) for f, a in self._parsed_numeric.items())
+        columns.update(("val_" + name, a) for name, a in self.value_columns.items())
+        columns.update(("ref_" + f, a) for f, a in self.refs.items())
+        if self.ifc_id is not None:
+            columns["ifc_id"] = self.ifc_id
+        return marshal.dumps((
+            self._FORMAT,
+            {name: (a.dtype.str, a.tobytes()) for name, a in columns.items()},
+            self.blob,
+            self.active_value_column,
+        ))
+
+    @classmethod
+    def from_bytes(cls, data):
+        import marshal
+        fmt, columns, blob, active_value_column = marshal.loads(data)
+        if fmt != cls._FORMAT:
+            raise ValueError(f"Unsupported rate catalog format {fmt}")
+        arrays = {name: np.frombuffer(buf, dtype=np.dtype(dtype)) for name, (dtype, buf) in columns.items()}
+        catalog = cls(
+            arrays["level"], arrays["is_parent"], arrays["parent"],
+            {f: arrays["num_" + f] for f in cls.NUMERIC_FIELDS},
+            {f: arrays["ref_" + f] for f in cls.STRING_FIELDS},
+            arrays["offsets"], blob, arrays.get("ifc_id"),
+            {name[4:]: a for name, a in arrays.items() if name.startswith("val_")},
+        )
+        catalog.select_value_column(active_value_column)
+        return catalog
+
+
+class RateCatalogBuilder:
+    """Accumulates XmlRateItem records into compact buffers and builds a RateCatalog."""
+
+    def __init__(self):
+        from array import array
+
+        self._level = array("h")
+        self._is_parent = array("b")
+        self._parent = array("i")
+        self._numeric = {f: array("d") for f in RateCatalog.NUMERIC_FIELDS}
+        self._refs = {f: array("i") for f in RateCatalog.STRING_FIELDS}
+        self._ifc_id = array("q")
+        self._values = {}
+        self._pool = {}
+        self._chunks = []
+        self._offsets = array("q", [0])
+
+    def add(self, rate):
+        parents = rate["parents"]
+        self._level.append(rate["level"])
+        self._is_parent.append(bool(rate["is_parent"]))
+        self._parent.append(int(parents.rpartition(",")[2]) if parents else -1)
+        for field, column in self._numeric.items():
+            column.append(rate[field])
+        for field, column in self._refs.items():
+            column.append(self._intern(rate[field]))
+        self._ifc_id.append(rate.get("ifc_id", 0))
+        values = rate.get("values")
+        if values or self._values:
+            values = values or {}
+            for name in values:
+                if name not in self._values:
+                    # the rows added before the list appeared fall back to their parsed value too
+                    self._values[name] = self._numeric["value"][:-1]
+            for name, column in self._values.items():
+                # a list without a price for this rate falls back to the parsed value
+                column.append(values.get(name, rate["value"]))
+
+    def collect(self, rates):
+        # pass rates through unchanged while adding them to the catalog
+        for rate in rates:
+            self.add(rate)
+            yield rate
+
+    def _intern(self, text):
+        ref = self._pool.get(text)
+        if ref is None:
+            ref = self._pool[text] = len(self._chunks)
+            encoded = text.encode("utf8")
+            self._chunks.append(encoded)
+            self._offsets.append(self._offsets[-1] + len(encoded))
+        return ref
+
+    def build(self):
+        def to_numpy(buf, dtype):
+            return np.frombuffer(buf, dtype=buf.typecode).astype(dtype)
+
+        return RateCatalog(
+            to_numpy(self._level, np.int16),
+            to_numpy(self._is_parent, np.bool_),
+            to_numpy(self._parent, np.int32),
+            {f: to_numpy(a, np.float64) for f, a in self._numeric.items()},
+            {f: to_numpy(a, np.int32) for f, a in self._refs.items()},
+            to_numpy(self._offsets, np.int64),
+            b"".join(self._chunks),
+            to_numpy(self._ifc_id, np.int64) if any(self._ifc_id) else None,
+            {name: to_numpy(a, np.float64) for name, a in self._values.items()},
+        )
+
+
+def subtree_ends(level):
+    """Row after the last descendant of each row of a depth-first list, given the row levels.
+
+    Descendants are the rows that follow with a higher level, so a
+    collapsed row i hides exactly the rows i + 1 .. end[i] - 1.
+    """
+    levels = np.asarray(level).tolist()
+    end = [len(levels)] * len(levels)
+    stack = []
+    for i, lvl in enumerate(levels):
+        while stack and levels[stack[-1]] >= lvl:
+            end[stack.pop()] = i
+        stack.append(i)
+    return np.array(end, dtype=np.int32)
@@ -0,0 +1,105 @@
+"""Command line conversion of a prezzario to the cached RateCatalog format.
+
+    python -m rate_catalog prezzario.xml [-o prezzario.rates] [--cache-dir DIR]
+
+Prints how long each step took and how much memory the conversion needed;
+--json prints the same figures as one JSON object, for CI benchmarks.
+"""
+
+import argparse
+import json
+import sys
+import time
+
+from .cache import cache_store, write_catalog
+from .loader import parse_catalog
+
+
+def _peak_rss():
+    """Peak resident set size of this process and of its finished workers, in bytes (None if unknown)."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    scale = 1 if sys.platform == "darwin" else 1024  # ru_maxrss is in KiB on Linux
+    return (
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale,
+    )
+
+
+def _mib(n):
+    return f"{n / (1024 * 1024):.1f} MiB"
+
+
+def convert(filepath, output=None, cache_dir=None, workers=None, trace_memory=False):
+    """Parses filepath, writes the catalog and returns a dict of statistics."""
+    import os
+    import tracemalloc
+
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    parser = parse_catalog(filepath, warn=lambda message: print(message, file=sys.stderr), workers=workers)
+    if parser is None:
+        raise ValueError(f"Cannot automatically find a parser for {filepath}")
+    parsed = time.perf_counter()
+    catalog = parser.xml_rate_list
+
+    output = output or os.path.splitext(filepath)[0] + ".rates"
+    written = write_catalog(output, catalog)
+    if cache_dir:
+        cache_store(cache_dir, os.path.abspath(filepath), catalog)
+    done = time.perf_counter()
+
+    stats = {
+        "file": filepath,
+        "parser": type(parser).__name__,
+        "title": parser.title,
+        "input_bytes": os.path.getsize(filepath),
+        "rates": len(catalog),
+        "catalog_bytes": catalog.nbytes,
+        "output": output,
+        "output_bytes": written,
+        "parse_seconds": parsed - start,
+        "write_seconds": done - parsed,
+        "total_seconds": done - start,
+        "rates_per_second": len(catalog) / max(parsed - start, 1e-9),
+    }
+    if trace_memory:
+        stats["traced_peak_bytes"] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    rss = _peak_rss()
+    if rss is not None:
+        stats["peak_rss_bytes"], stats["workers_peak_rss_bytes"] = rss
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m rate_catalog", description=__doc__.splitlines()[0])
+    parser.add_argument("prezzario", help="price list file (XML or XPWE)")
+    parser.add_argument("-o", "--output", help="catalog file to write (default: next to the input, .rates)")
+    parser.add_argument("--cache-dir", help="also store the catalog in this RateListImporter cache directory")
+    parser.add_argument("--workers", type=int, help="process pool size for parsers that support it (1: none)")
+    parser.add_argument("--trace-memory", action="store_true", help="measure Python allocations (slower)")
+    parser.add_argument("--json", action="store_true", help="print the statistics as JSON")
+    args = parser.parse_args(argv)
+
+    try:
+        stats = convert(args.prezzario, args.output, args.cache_dir, args.workers, args.trace_memory)
+    except (OSError, ValueError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+
+    if args.json:
+        print(json.dumps(stats))
+        return 0
+    print(f"{stats['file']}: {stats['parser']}, {stats['rates']} rates")
+    print(f"  parse   {stats['parse_seconds']:.3f} s ({stats['rates_per_second']:.0f} rates/s)")
+    print(f"  write   {stats['write_seconds']:.3f} s -> {stats['output']} ({_mib(stats['output_bytes'])})")
+    print(f"  catalog {_mib(stats['catalog_bytes'])} in memory, input {_mib(stats['input_bytes'])}")
+    if "traced_peak_bytes" in stats:
+        print(f"  traced  {_mib(stats['traced_peak_bytes'])} peak")
+    if "peak_rss_bytes" in stats:
+        print(f"  rss     {_mib(stats['peak_rss_bytes'])} peak, workers {_mib(stats['workers_peak_rss_bytes'])}")
+    return 0
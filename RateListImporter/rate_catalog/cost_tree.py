@@ -0,0 +1,124 @@
+"""Index of the cost items of an IfcCostSchedule, shared by every tool that walks a schedule.
+
+One pass over the IfcRelNests of the file maps each cost item to its
+children; a schedule then becomes its items in depth-first order with
+parent, depth and leaf arrays, built without recursion. Trees are kept
+until the file changes, so the parser, the bulk update and the BoQ tools
+walk a schedule once between edits.
+"""
+
+import numpy as np
+
+from .catalog import subtree_ends
+
+_trees = {}
+_nests = None  # (file, stamp, {cost item id: [children]})
+_revision = 0  # bumped by touch_cost_trees, part of the stamp
+
+
+class CostTree:
+    """Cost items of one schedule in depth-first order, as get_root_cost_items and IsNestedBy give them.
+
+    items[row] is the IfcCostItem of a row; parent holds the row of its
+    immediate parent (-1 for roots), depth its nesting level, is_leaf
+    whether it has no children and end the row after its last descendant.
+    valuation caches the ScheduleValuation of the tree.
+    """
+
+    def __init__(self, items, parent, depth):
+        self.items = items
+        self.ids = np.array([item.id() for item in items], dtype=np.int64)
+        self.parent = np.array(parent, dtype=np.int32)
+        self.depth = np.array(depth, dtype=np.int16)
+        self.end = subtree_ends(self.depth)
+        self.is_leaf = self.end == np.arange(1, len(items) + 1)
+        self.valuation = None
+        self._rows = None
+
+    def __len__(self):
+        return len(self.items)
+
+    def row(self, item):
+        """Row of a cost item (or its id) in the tree, None when it is not in the schedule."""
+        if self._rows is None:
+            self._rows = {ifc_id: row for row, ifc_id in enumerate(self.ids.tolist())}
+        return self._rows.get(item if isinstance(item, int) else item.id())
+
+    def children(self, row):
+        """Rows of the immediate children of row (-1 for the roots)."""
+        if row < 0:
+            return np.flatnonzero(self.parent == -1)
+        below = np.arange(row + 1, self.end[row])
+        return below[self.parent[below] == row]
+
+    def leaves(self):
+        """Cost items without children, in depth-first order."""
+        return [self.items[row] for row in np.flatnonzero(self.is_leaf).tolist()]
+
+
+def _stamp(file):
+    # bonsai edits end in a transaction of the file history, undo and redo
+    # move it; counts catch scripted edits and the revision attribute edits
+    history = getattr(file, "history", None) or [None]
+    return (
+        id(history[-1]),
+        len(getattr(file, "future", None) or ()),
+        len(file.by_type("IfcRelNests")),
+        len(file.by_type("IfcCostItem")),
+        _revision,
+    )
+
+
+def _nested(file, stamp):
+    global _nests
+    if _nests is not None and _nests[0] is file and _nests[1] == stamp:
+        return _nests[2]
+    children = {}
+    for rel in file.by_type("IfcRelNests"):
+        relating = rel.RelatingObject
+        if relating is not None and relating.is_a("IfcCostItem"):
+            children.setdefault(relating.id(), []).extend(
+                item for item in rel.RelatedObjects if item.is_a("IfcCostItem")
+            )
+    _nests = (file, stamp, children)
+    return children
+
+
+def cost_tree(file, schedule):
+    """CostTree of schedule (an IfcCostSchedule or its id), memoized until the file changes."""
+    import ifcopenshell.util.cost
+
+    if isinstance(schedule, int):
+        schedule = file.by_id(schedule)
+    stamp = _stamp(file)
+    key = (id(file), schedule.id())
+    cached = _trees.get(key)
+    if cached is not None and cached[0] is file and cached[1] == stamp:
+        return cached[2]
+
+    nested = _nested(file, stamp)
+    items, parent, depth = [], [], []
+    # depth first without recursion: deep schedules cannot hit the recursion limit
+    stack = [(item, -1, 0) for item in reversed(ifcopenshell.util.cost.get_root_cost_items(schedule))]
+    while stack:
+        item, parent_row, level = stack.pop()
+        row = len(items)
+        items.append(item)
+        parent.append(parent_row)
+        depth.append(level)
+        stack.extend((child, row, level + 1) for child in reversed(nested.get(item.id(), ())))
+    tree = CostTree(items, parent, depth)
+    if any(entry[0] is not file for entry in _trees.values()):
+        _trees.clear()  # another file was loaded, its trees can go
+    _trees[key] = (file, stamp, tree)
+    return tree
+
+
+def touch_cost_trees():
+    """Marks the memoized trees stale after cost items or values were edited.
+
+    An attribute edit adds no entity, and until the operator ends it adds no
+    transaction either, so writers call this once they are done.
+    """
+    global _revision
+    _revision += 1
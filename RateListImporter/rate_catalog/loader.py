@@ -0,0 +1,78 @@
+"""From a price list file on disk to a RateCatalog, picking the cheapest parse path."""
+
+from .catalog import RateCatalog, RateCatalogBuilder
+from .parsers import PriceListParser
+from .sniff import sniff_xml_parser
+from .source import CleanXmlSource
+
+# files at least this big are streamed with iter_items instead of building the tree
+STREAM_THRESHOLD = 32 * 1024 * 1024
+# files at least this big are decoded in a process pool by parsers that support it
+PARALLEL_THRESHOLD = 8 * 1024 * 1024
+
+
+class ParseCancelled(Exception):
+    """Raised by a parse_catalog progress callback to stop parsing."""
+
+
+def _drain(parser, rates):
+    for _ in rates:
+        pass
+
+
+def parse_catalog(filepath, consume=None, warn=None, workers=None, progress=None):
+    """Parses filepath; returns the parser, with xml_rate_list holding the RateCatalog, or None.
+
+    consume(parser, rates) receives the rates while they are parsed, e.g. to
+    fill a UI list as the file streams; it is called again from scratch if
+    the fast path fails and the file is re-read as text. warn(message) is
+    told when the format was picked with low confidence. workers caps the
+    process pool (None: one per core, 1: no pool). progress(done, total) is
+    called with the bytes of the file read so far, whichever path parses it,
+    and may raise ParseCancelled to stop.
+    """
+    import os
+    import xml.etree.ElementTree as ET
+
+    consume = consume or _drain
+    report = progress or (lambda done, total: None)
+    builder = RateCatalogBuilder()
+    with CleanXmlSource(filepath) as source:
+        parser_class, confidence = sniff_xml_parser(source)
+        if parser_class is None:
+            return None
+        if confidence < 0.5 and warn:
+            warn(f"{parser_class.__name__} picked with low confidence ({confidence:.0%})")
+
+        parser = parser_class()
+        size = os.path.getsize(filepath)
+        report(0, size)
+        source.progress = progress
+        workers = workers or os.cpu_count() or 1
+        parallel = parser.parallel and size >= PARALLEL_THRESHOLD and workers > 1
+        streamed = parallel or parser.streamable and size >= STREAM_THRESHOLD
+        try:
+            if parallel:
+                rates = parser.iter_items_parallel(source, workers)
+            elif streamed:
+                rates = parser.iter_items(source)
+            if streamed:
+                consume(parser, builder.collect(rates))
+            else:
+                parser.parse_items(source)
+        except ET.ParseError:
+            # e.g. invalid UTF-8 bytes: retry on the decoded text, which drops them
+            parser = parser_class()
+            builder = RateCatalogBuilder()
+            streamed = False
+            parser.parse_items(PriceListParser.get_xml_content(filepath))
+
+    if streamed:
+        parser.xml_rate_list = builder.build()
+    else:
+        report(size, size)
+        parser.xml_rate_list = RateCatalog.from_rates(parser.xml_rate_list)
+        consume(parser, parser.xml_rate_list)
+    parser.xml_rate_list.select_value_column(getattr(parser, "default_list_id", None))
+    report(size, size)
+    return parser
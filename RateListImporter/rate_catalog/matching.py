@@ -0,0 +1,126 @@
+"""Candidate rates for a cost item whose code is not in the catalog any more.
+
+Between editions of a prezzario codes shift (a category renumbered, an
+item split in two) while names stay close. RateMatchIndex proposes the
+rates that look most alike: trigram postings of the names and the start
+of the descriptions pick a short list of candidates, which alone are then
+scored, so a query never compares against the whole catalog.
+"""
+
+import re
+
+import numpy as np
+
+from .search import fold
+
+_SEGMENT = re.compile(r"[a-z0-9]+")
+# description characters indexed after the name: enough to tell items apart
+DESC_CHARS = 120
+
+
+def _text(name, desc):
+    return " ".join(fold(f"{name} {desc[:DESC_CHARS]}").split())
+
+
+def _trigram_codes(text):
+    data = np.frombuffer(text.encode("ascii", "ignore"), dtype=np.uint8).astype(np.int64)
+    if len(data) < 3:
+        return np.zeros(0, dtype=np.int64)
+    return np.unique((data[:-2] << 16) | (data[1:-1] << 8) | data[2:])
+
+
+def code_segments(code):
+    """Alphanumeric runs of a code: "TOS.A03.001" -> ["tos", "a03", "001"]."""
+    return _SEGMENT.findall(fold(code))
+
+
+def code_similarity(a, b):
+    """Share of code segments equal at the same position, from the left."""
+    a, b = code_segments(a), code_segments(b)
+    if not a or not b:
+        return 0.0
+    return sum(x == y for x, y in zip(a, b)) / max(len(a), len(b))
+
+
+class RateMatchIndex:
+    """Trigram and code-family index over chosen rows of a RateCatalog.
+
+    rows are the rates that can be proposed (the priced ones) and codes
+    their match keys, which default to the catalog ids. Trigrams are kept
+    as sorted (trigram, row) postings; codes are grouped by their prefix
+    without the last segment, so the siblings of a renumbered item are
+    candidates too.
+    """
+
+    # trigrams found in more rows than this share (and than COMMON_FLOOR rows, for
+    # small catalogs) say little and are not used to pick candidates
+    COMMON = 0.05
+    COMMON_FLOOR = 20
+    SHORTLIST = 50
+
+    def __init__(self, catalog, rows=None, codes=None):
+        self.catalog = catalog
+        self.rows = np.arange(len(catalog), dtype=np.int32) if rows is None else np.asarray(rows, dtype=np.int32)
+        rows = self.rows.tolist()
+        self.codes = list(codes) if codes is not None else [catalog.string("id", row) for row in rows]
+
+        texts = [_text(catalog.string("name", row), catalog.string("desc", row)) for row in rows]
+        # one vectorized pass over all the texts: "\0" separators break the trigrams at row ends
+        data = np.frombuffer("\0".join(texts).encode("ascii", "ignore"), dtype=np.uint8).astype(np.int64)
+        owner = np.repeat(np.arange(len(texts), dtype=np.int64), [len(t) + 1 for t in texts])[:len(data)]
+        pairs = np.zeros(0, dtype=np.int64)
+        if len(data) >= 3:
+            grams = (data[:-2] << 16) | (data[1:-1] << 8) | data[2:]
+            valid = (data[:-2] != 0) & (data[1:-1] != 0) & (data[2:] != 0)
+            pairs = np.sort(grams[valid] * len(texts) + owner[:-2][valid])
+            pairs = pairs[np.concatenate(([True], pairs[1:] != pairs[:-1]))]  # sort + diff beats np.unique here
+        grams = pairs // max(len(texts), 1)
+        starts = np.flatnonzero(np.concatenate(([True], grams[1:] != grams[:-1]))) if len(grams) else grams
+        self.trigrams = grams[starts]
+        self.postings = (pairs % max(len(texts), 1)).astype(np.int32)
+        self.offsets = np.append(starts, len(pairs)).astype(np.int64)
+
+        self.families = {}
+        for position, code in enumerate(self.codes):
+            self.families.setdefault(tuple(code_segments(code)[:-1]), []).append(position)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def candidates(self, code, name, desc="", limit=3, threshold=0.35):
+        """Up to limit (catalog row, score) pairs for a cost item, best first.
+
+        The score, from 0 to 1, weighs the trigram similarity of name and
+        description (0.65) with the code similarity (0.35).
+        """
+        if not len(self.rows):
+            return []
+        query = _trigram_codes(_text(name, desc))
+        found = np.searchsorted(self.trigrams, query[np.isin(query, self.trigrams)])
+        common = max(self.COMMON * len(self.rows), self.COMMON_FLOOR)
+        lists = [
+            self.postings[self.offsets[i]:self.offsets[i + 1]]
+            for i in found.tolist()
+            if self.offsets[i + 1] - self.offsets[i] <= common
+        ]
+        shortlist = set(self.families.get(tuple(code_segments(code)[:-1]), ())[:self.SHORTLIST])
+        if lists:
+            # only the rows sharing a trigram are counted, never the whole catalog
+            found, counts = np.unique(np.concatenate(lists), return_counts=True)
+            if len(found) > self.SHORTLIST:
+                found = found[np.argpartition(-counts, self.SHORTLIST - 1)[:self.SHORTLIST]]
+            shortlist.update(found.tolist())
+
+        query_set = set(query.tolist())
+        scored = []
+        for position in shortlist:
+            row = int(self.rows[position])
+            text = _text(self.catalog.string("name", row), self.catalog.string("desc", row))
+            other = set(_trigram_codes(text).tolist())
+            union = len(query_set | other)
+            text_score = len(query_set & other) / union if union else 0.0
+            score = 0.65 * text_score + 0.35 * code_similarity(code, self.codes[position])
+            if score >= threshold:
+                scored.append((score, row))
+        scored.sort(key=lambda pair: (-pair[0], pair[1]))
+        return [(row, score) for score, row in scored[:limit]]
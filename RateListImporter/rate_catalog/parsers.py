@@ -0,0 +1,1305 @@
+"""Parsers of the Italian regional price list (prezzario) formats."""
+
+from typing import List
+
+from .catalog import XmlRateItem
+from .source import _CONTROL_BYTES
+
+
+class PriceListParser:
+    title: str
+    desc: str
+    year: str
+    language: []
+    xml_rate_list: List[XmlRateItem]
+    streamable = False
+    parallel = False
+
+    def __init__(self):
+        self.xml_rate_list = []
+        self.title = ""
+        self.year = ""
+
+    @staticmethod
+    def get_xml_content(filename):
+        with open(filename, "r", errors="ignore", encoding="utf8") as file:
+            data = file.read()
+        return data
+
+    def parse_header(self, root):
+        # module to be implemented by each importer classes
+        pass
+
+    def parse_items(self, xml_content):
+        # module to be implemented by each importer classes
+        pass
+
+    def iter_items(self, source):
+        # streaming counterpart of parse_items: importer classes that set
+        # streamable = True yield XmlRateItem records one at a time, the
+        # others parse the whole file first. Lombardia is the one format
+        # left whole: its layout is told apart by looking ahead in the tree
+        self.parse_items(source)
+        yield from self.xml_rate_list
+
+    def iter_items_parallel(self, source, workers=None):
+        # iter_items spread over a process pool, for importer classes that set
+        # parallel = True; must yield exactly what iter_items does. Serial here
+        yield from self.iter_items(source)
+
+    def clean_xml_content(self, data):
+        import re
+
+        if not isinstance(data, str):
+            return data  # CleanXmlSource already drops control characters
+        # clean non printable characters
+        return re.sub(r"[\x00-\x08\x0B\x0C\x0E-\x1F\x7F]", "", data)
+
+    def get_stripped_xml_namespaces_root(self, data):
+        import xml.etree.ElementTree as ET
+        from io import StringIO
+
+        it = ET.iterparse(StringIO(data) if isinstance(data, str) else data)
+        for _, el in it:
+            if isinstance(el.tag, str) and "}" in el.tag:
+                el.tag = el.tag.rpartition("}")[-1]
+        return it.root
+
+    def iter_stripped_xml_elements(self, source, tags):
+        """Stream source with iterparse and yield every element in tags as it closes.
+
+        Namespaces are stripped on the fly. Yielded elements, and any element
+        closing outside of them, are cleared and detached from their parent
+        right after use, so memory does not grow with the size of the file.
+        """
+        import xml.etree.ElementTree as ET
+
+        stack = []
+        open_tags = 0
+        for event, el in ET.iterparse(source, events=("start", "end")):
+            if event == "start":
+                if isinstance(el.tag, str) and "}" in el.tag:
+                    el.tag = el.tag.rpartition("}")[-1]
+                if el.tag in tags:
+                    open_tags += 1
+                stack.append(el)
+                continue
+            stack.pop()
+            if el.tag in tags:
+                open_tags -= 1
+                yield el
+            elif open_tags:
+                continue
+            el.clear()
+            if stack:
+                stack[-1].remove(el)
+
+    def iter_xml_paths(self, source, select):
+        """Stream source with iterparse and yield (path, element) for the elements select picks.
+
+        path is the tuple of tags from the root down to the element, with
+        namespaces stripped. select(path) is asked as each element opens:
+        "start" yields it right away, with its attributes but no children yet;
+        "end" yields it once it closes, with its whole subtree. Every element
+        is cleared and detached from its parent once closed and used, so
+        memory is bounded by the largest "end" subtree.
+        """
+        import xml.etree.ElementTree as ET
+
+        stack = []
+        path = []
+        modes = []
+        kept = 0
+        for event, el in ET.iterparse(source, events=("start", "end")):
+            if event == "start":
+                if isinstance(el.tag, str) and "}" in el.tag:
+                    el.tag = el.tag.rpartition("}")[-1]
+                stack.append(el)
+                path.append(el.tag)
+                mode = None if kept else select(tuple(path))
+                modes.append(mode)
+                if mode == "start":
+                    yield tuple(path), el
+                elif mode == "end":
+                    kept += 1
+                continue
+            mode = modes.pop()
+            if mode == "end":
+                kept -= 1
+                yield tuple(path), el
+            path.pop()
+            stack.pop()
+            if kept:
+                continue
+            el.clear()
+            if stack:
+                stack[-1].remove(el)
+
+    def get_root(self, data):
+        import xml.etree.ElementTree as ET
+        from io import StringIO
+
+        tree = ET.parse(StringIO(data) if isinstance(data, str) else data)
+        return tree.getroot()
+
+    def clean_string(self, text):
+        # sistema_cose (da Leeno)
+        text = text.replace("\t", " ").replace("Ã¨", "è").replace("", "")
+        text = text.replace("Â°", "°").replace("Ã", "à").replace(" $", "")
+        text = text.replace("Ó", "à").replace("Þ", "é").replace("&#x13;", "")
+        text = text.replace("&#xD;&#xA;", "").replace("&#xA;", "")
+        text = text.replace("&apos;", "'").replace("&#x3;&#x1;", "")
+        text = text.replace("\n \n", "\n")
+        while "  " in text:
+            text = text.replace("  ", " ")
+        while "\n\n" in text:
+            text = text.replace("\n\n", "\n")
+        return text.strip()
+
+
+class ParserXmlVeneto(PriceListParser):
+    streamable = True
+
+    def parse_items(self, xml_content):
+        xml_content = self.clean_xml_content(xml_content)
+        root = self.get_stripped_xml_namespaces_root(xml_content)
+
+        def nodes():
+            for settore in root.findall("settore"):
+                yield "settore", settore
+                for capitolo in settore.findall("capitolo"):
+                    yield "capitolo", capitolo
+                    for paragrafo in capitolo.findall("paragrafo"):
+                        yield "paragrafo", paragrafo
+
+        self.xml_rate_list.extend(self._iter_node_items(nodes()))
+
+    def iter_items(self, source):
+        # settore and capitolo only need their attributes, so the tree held
+        # at any time is a single paragrafo with its prices
+        levels = {("settore",): "start", ("settore", "capitolo"): "start",
+                  ("settore", "capitolo", "paragrafo"): "end"}
+        nodes = ((path[-1], el) for path, el in self.iter_xml_paths(source, lambda path: levels.get(path[1:])))
+        yield from self._iter_node_items(nodes)
+
+    def _iter_node_items(self, nodes):
+        # nodes: (tag, element) of the settore, capitolo and paragrafo
+        # elements in document order
+        index = 0
+        n_settore = n_capitolo = None
+        for tag, node in nodes:
+            if tag == "settore":
+                yield {
+                    "index": index,
+                    "level": 0,
+                    "is_parent": True,
+                    "parents": "",
+                    "id": node.attrib.get("cod", ""),
+                    "name": node.attrib.get("desc", ""),
+                    "desc": "",
+                    "unit": "",
+                    "value": 0.0,
+                    "labor": 0.0,
+                    "equipment": 0.0,
+                    "materials": 0.0,
+                    "safety": 0.0,
+                }
+                n_settore = index
+                index += 1
+            elif tag == "capitolo":
+                yield {
+                    "index": index,
+                    "level": 1,
+                    "is_parent": True,
+                    "parents": str(n_settore),
+                    "id": node.attrib.get("cod", ""),
+                    "name": node.attrib.get("desc", ""),
+                    "desc": "",
+                    "unit": "",
+                    "value": 0.0,
+                    "labor": 0.0,
+                    "equipment": 0.0,
+                    "materials": 0.0,
+                    "safety": 0.0,
+                }
+                n_capitolo = index
+                index += 1
+            else:
+                children = list(node)
+                para_name = (children[0].text or "") if len(children) > 0 else ""
+                para_desc = (children[1].text or "") if len(children) > 1 else ""
+                yield {
+                    "index": index,
+                    "level": 2,
+                    "is_parent": True,
+                    "parents": str(n_settore) + "," + str(n_capitolo),
+                    "id": node.attrib.get("cod", ""),
+                    "name": para_name,
+                    "desc": para_desc,
+                    "unit": "",
+                    "value": 0.0,
+                    "labor": 0.0,
+                    "equipment": 0.0,
+                    "materials": 0.0,
+                    "safety": 0.0,
+                }
+                n_paragrafo = index
+                index += 1
+                for prezzo in node.iterfind(".//prezzo"):
+                    try:
+                        val = float(prezzo.attrib.get("val", 0))
+                    except (ValueError, TypeError):
+                        val = 0.0
+                    try:
+                        labor = float(prezzo.attrib.get("man", 0)) * val / 100
+                    except (ValueError, TypeError):
+                        labor = 0.0
+                    yield {
+                        "index": index,
+                        "level": 3,
+                        "is_parent": False,
+                        "parents": str(n_settore)
+                        + ","
+                        + str(n_capitolo)
+                        + ","
+                        + str(n_paragrafo),
+                        "id": prezzo.attrib.get("cod", ""),
+                        "name": prezzo.text or "",
+                        "desc": para_desc,
+                        "unit": prezzo.attrib.get("umi", ""),
+                        "value": val,
+                        "labor": labor,
+                        "equipment": 0.0,
+                        "materials": 0.0,
+                        "safety": 0.0,
+                    }
+                    index += 1
+
+
+class ParserXmlBasilicata(PriceListParser):
+    """Parser per formato XML Basilicata (struttura gerarchica capitoli/categorie/voci/sottovoci)."""
+
+    streamable = True
+
+    def parse_items(self, xml_content):
+        xml_content = self.clean_xml_content(xml_content)
+        root = self.get_stripped_xml_namespaces_root(xml_content)
+
+        pdf_el = root.find('pdf')
+        if pdf_el is not None:
+            self._parse_pdf(pdf_el)
+
+        capitoli = root.find('capitoli')
+        if capitoli is None:
+            return
+        self.xml_rate_list.extend(self._iter_capitolo_items(capitoli))
+
+    def iter_items(self, source):
+        # the tree held at any time is a single capitolo; like find(), only
+        # the first pdf and capitoli elements count
+        seen = {'pdf': 0, 'capitoli': 0}
+
+        def select(path):
+            if len(path) == 2 and path[1] in seen:
+                seen[path[1]] += 1
+                return 'end' if path[1] == 'pdf' and seen['pdf'] == 1 else None
+            if len(path) == 3 and path[1] == 'capitoli' and seen['capitoli'] == 1:
+                return 'end'
+            return None
+
+        def capitoli():
+            for path, el in self.iter_xml_paths(source, select):
+                if len(path) == 2:
+                    self._parse_pdf(el)
+                else:
+                    yield el
+
+        yield from self._iter_capitolo_items(capitoli())
+
+    def _parse_pdf(self, pdf_el):
+        if pdf_el.text:
+            titolo = pdf_el.text
+            if titolo.endswith('.pdf'):
+                titolo = titolo[:-4]
+            self.title = ' '.join(titolo.split('_'))
+
+    def _iter_capitolo_items(self, capitoli):
+        index = 0
+
+        for capitolo in capitoli:
+            codice_sc = (capitolo.findtext('codice') or '').strip()
+            desc_sc = (capitolo.findtext('descrizione') or '').strip()
+            yield {
+                "index": index, "level": 0, "is_parent": True, "parents": "",
+                "id": codice_sc, "name": desc_sc, "desc": "", "unit": "",
+                "value": 0.0, "labor": 0.0, "equipment": 0.0, "materials": 0.0, "safety": 0.0,
+            }
+            sc_idx = index
+            index += 1
+
+            categorie = capitolo.find('categorie')
+            if categorie is None:
+                continue
+
+            for categoria in categorie:
+                codice_cat_raw = (categoria.findtext('codice') or '').strip()
+                codice_cat = codice_sc + '.' + codice_cat_raw
+                desc_cat = (categoria.findtext('descrizione') or '').strip()
+                yield {
+                    "index": index, "level": 1, "is_parent": True, "parents": str(sc_idx),
+                    "id": codice_cat, "name": desc_cat, "desc": "", "unit": "",
+                    "value": 0.0, "labor": 0.0, "equipment": 0.0, "materials": 0.0, "safety": 0.0,
+                }
+                cat_idx = index
+                index += 1
+
+                voci = categoria.find('voci')
+                if voci is None:
+                    continue
+
+                for voce in voci:
+                    codice_v = (voce.findtext('codice') or '').strip()
+                    codice_voce = codice_cat + '.' + codice_v
+                    voce_desc = (voce.findtext('descrizione') or '').strip()
+
+                    sottovoci = voce.find('sottovoci')
+                    if sottovoci is None:
+                        continue
+
+                    for sottovoce in sottovoci:
+                        codice_sv = (sottovoce.findtext('codice') or '').strip()
+                        sv_desc = (sottovoce.findtext('descrizione') or '').strip()
+                        codice = codice_voce + '.' + codice_sv
+                        desc = self.clean_string(voce_desc + ('\n- ' + sv_desc if sv_desc else ''))
+
+                        um_el = sottovoce.find('unitaMisura')
+                        um = ''
+                        if um_el is not None:
+                            um = (um_el.findtext('codice') or '').strip()
+
+                        prezzo = 0.0
+                        try:
+                            prezzo = float(sottovoce.findtext('prezzo') or 0)
+                        except (ValueError, TypeError):
+                            pass
+
+                        labor = 0.0
+                        try:
+                            labor = float(sottovoce.findtext('manodopera') or 0) * prezzo / 100
+                        except (ValueError, TypeError):
+                            pass
+
+                        yield {
+                            "index": index, "level": 2, "is_parent": False,
+                            "parents": str(sc_idx) + ',' + str(cat_idx),
+                            "id": codice, "name": desc, "desc": desc, "unit": um,
+                            "value": prezzo, "labor": labor,
+                            "equipment": 0.0, "materials": 0.0, "safety": 0.0,
+                        }
+                        index += 1
+
+
+class ParserXmlToscana(PriceListParser):
+    """Parser per formato XML Toscana (PRT/EASY namespace variants).
+    Usato anche da Calabria, Campania, Sardegna."""
+
+    streamable = True
+    parallel = True
+
+    # Articolo elements are split in ranges of this many bytes, at most
+    parallel_chunk_size = 8 * 1024 * 1024
+
+    def parse_items(self, xml_content):
+        xml_content = self.clean_xml_content(xml_content)
+        xml_content = self._fix_namespace(xml_content)
+        root = self.get_stripped_xml_namespaces_root(xml_content)
+
+        intestazione = root.find('intestazione')
+        if intestazione is not None:
+            dettaglio = intestazione.find('dettaglio')
+            if dettaglio is not None:
+                self._parse_dettaglio(dettaglio)
+
+        contenuto = root.find('Contenuto')
+        if contenuto is None:
+            return
+        self.xml_rate_list.extend(self._iter_articolo_items(contenuto.findall('Articolo')))
+
+    def iter_items(self, source):
+        def articoli():
+            for el in self.iter_stripped_xml_elements(source, ('dettaglio', 'Articolo')):
+                if el.tag == 'dettaglio':
+                    self._parse_dettaglio(el)
+                else:
+                    yield el
+
+        yield from self._iter_articolo_items(articoli())
+
+    def iter_items_parallel(self, source, workers=None):
+        """Like iter_items, but the Articolo elements are decoded in a process pool.
+
+        The file is cut into byte ranges at Articolo start tags; each worker
+        parses and decodes its range on its own and the pool hands the results
+        back in file order, so indices and parents match the serial path.
+        """
+        import multiprocessing
+        import os
+        import pickle
+        import re
+        import sys
+        import xml.etree.ElementTree as ET
+
+        workers = workers or os.cpu_count() or 1
+        try:
+            pickle.dumps(type(self))
+            if "fork" in multiprocessing.get_all_start_methods():
+                context = multiprocessing.get_context("fork")
+            elif "bpy" not in sys.modules:
+                # spawned workers re-run the caller's __main__, only safe outside Blender
+                context = multiprocessing.get_context("spawn")
+            else:
+                context = None
+        except Exception:
+            context = None
+        start_tag = re.compile(rb"<([\w.-]+:)?Articolo[\s/>]")
+        first = source.search(start_tag)
+        if context is None or workers < 2 or first is None:
+            yield from self.iter_items(source)
+            return
+
+        # the header carries dettaglio, the XML declaration and the namespaces
+        # each range needs to parse on its own
+        header = source.read(first.start())
+        pull = ET.XMLPullParser(events=("start-ns", "start"))
+        pull.feed(header)
+        namespaces = {}
+        for event, value in pull.read_events():
+            if event == "start-ns":
+                namespaces.setdefault(*value)
+            elif value.tag.rpartition("}")[2] == "dettaglio":
+                self._parse_dettaglio(value)
+        declaration = re.match(rb"\s*<\?xml[^>]*\?>", header)
+        prolog = (declaration.group(0) if declaration else b"") + b"<chunk" + b"".join(
+            b' xmlns%s="%s"' % ((b":" + prefix.encode("utf8")) if prefix else b"", uri.encode("utf8"))
+            for prefix, uri in namespaces.items()
+        ) + b">"
+
+        closing = b"</" + (first.group(1) or b"") + b"Articolo>"
+        end = source.rfind(closing)
+        end = end + len(closing) if end >= first.start() else len(source)
+        step = max(1024 * 1024, min(self.parallel_chunk_size, (end - first.start()) // (workers * 4)))
+        cuts = [first.start()]
+        while True:
+            match = source.search(start_tag, cuts[-1] + step)
+            if match is None or match.start() >= end:
+                break
+            cuts.append(match.start())
+        cuts.append(end)
+        tasks = [
+            (type(self), source.filename, prolog, lo, hi) for lo, hi in zip(cuts, cuts[1:])
+        ]
+
+        def decoded(pool):
+            for task, chunk in zip(tasks, pool.imap(_decode_articolo_range, tasks)):
+                yield from chunk
+                source.reached(task[4])
+
+        with context.Pool(min(workers, len(tasks))) as pool:
+            yield from self._iter_decoded_items(decoded(pool))
+
+    def _parse_dettaglio(self, dettaglio):
+        anno = dettaglio.attrib.get('anno', '')
+        area = dettaglio.attrib.get('area', '')
+        self.title = f"{area} {anno}".strip()
+        self.year = anno
+
+    def _iter_articolo_items(self, articoli):
+        return self._iter_decoded_items(map(self._decode_articolo, articoli))
+
+    def _iter_decoded_items(self, records):
+        # records from _decode_articolo, in file order; the only state shared
+        # between articles is the index bookkeeping kept here
+        index = 0
+        supercat_idx = {}
+        cat_idx = {}
+
+        for decoded in records:
+            if decoded is None:
+                continue
+            codice, supercat, cat, desc, um, prezzo, labor, safety = decoded
+            parts = codice.split('.')
+            codice_sc = parts[0]
+            codice_cat = parts[0] + '.' + parts[1]
+
+            if codice_sc not in supercat_idx:
+                yield {
+                    "index": index, "level": 0, "is_parent": True, "parents": "",
+                    "id": codice_sc, "name": supercat or codice_sc, "desc": "", "unit": "",
+                    "value": 0.0, "labor": 0.0, "equipment": 0.0, "materials": 0.0, "safety": 0.0,
+                }
+                supercat_idx[codice_sc] = index
+                index += 1
+
+            if codice_cat not in cat_idx:
+                yield {
+                    "index": index, "level": 1, "is_parent": True,
+                    "parents": str(supercat_idx[codice_sc]),
+                    "id": codice_cat, "name": cat or codice_cat, "desc": "", "unit": "",
+                    "value": 0.0, "labor": 0.0, "equipment": 0.0, "materials": 0.0, "safety": 0.0,
+                }
+                cat_idx[codice_cat] = index
+                index += 1
+
+            yield {
+                "index": index, "level": 2, "is_parent": False,
+                "parents": str(supercat_idx[codice_sc]) + ',' + str(cat_idx[codice_cat]),
+                "id": codice, "name": desc, "desc": desc, "unit": um,
+                "value": prezzo, "labor": labor, "equipment": 0.0, "materials": 0.0, "safety": safety,
+            }
+            index += 1
+
+    def _decode_articolo(self, articolo):
+        """Returns (codice, supercat, cat, desc, um, prezzo, labor, safety) or None to skip."""
+        codice = articolo.attrib.get('codice', '').strip()
+        if not codice or len(codice.split('.')) < 2:
+            return None
+
+        supercat = (articolo.findtext('tipo') or articolo.findtext('livello1') or '').strip()
+        cat = (articolo.findtext('capitolo') or articolo.findtext('livello2') or '').strip()
+
+        voce = (articolo.findtext('voce') or articolo.findtext('livello3') or '').strip()
+        art = (articolo.findtext('articolo') or articolo.findtext('livello4') or '').strip()
+        desc = self.clean_string(voce + ('\n' + art if art else ''))
+
+        um_el = articolo.find('um')
+        um = (um_el.text or '').strip() if um_el is not None else ''
+        prezzo = self._parse_price(articolo.findtext('prezzo') or '')
+
+        labor = 0.0
+        safety = 0.0
+        analisi = articolo.find('Analisi')
+        if analisi is not None:
+            try:
+                safety = float(analisi.find('onerisicurezza').attrib.get('valore', 0))
+            except Exception:
+                pass
+            try:
+                labor = float(analisi.find('incidenzamanodopera').attrib.get('percentuale', 0)) * prezzo / 100
+            except Exception:
+                pass
+
+        return codice, supercat, cat, desc, um, prezzo, labor, safety
+
+    @staticmethod
+    def _fix_namespace(data):
+        if not isinstance(data, str):
+            return data  # CleanXmlSource declares the prefixes while reading
+        if '<EASY:' in data and 'xmlns:EASY=' not in data:
+            tag = '<EASY:Prezzario>'
+            pos = data.find(tag)
+            if pos >= 0:
+                ins = pos + len(tag) - 1
+                data = data[:ins] + ' xmlns:EASY="mynamespace"' + data[ins:]
+        if '<PRT:' in data and 'xmlns:PRT=' not in data:
+            tag = '<PRT:Prezzario>'
+            pos = data.find(tag)
+            if pos >= 0:
+                ins = pos + len(tag) - 1
+                data = data[:ins] + ' xmlns:PRT="mynamespace"' + data[ins:]
+        return data
+
+    @staticmethod
+    def _parse_price(text):
+        if not text:
+            return 0.0
+        text = text.strip().replace(',', '.')
+        parts = text.split('.')
+        if len(parts) > 2:
+            text = ''.join(parts[:-1]) + '.' + parts[-1]
+        try:
+            return float(text)
+        except ValueError:
+            return 0.0
+
+
+class ParserXmlLiguria(ParserXmlToscana):
+    """Parser per formato XML Liguria (stessa struttura Toscana, differenze nei campi)."""
+
+    def _decode_articolo(self, articolo):
+        codice = articolo.attrib.get('codice', '').strip()
+        if not codice or len(codice.split('.')) < 2:
+            return None
+
+        tipo_el = articolo.find('tipo')
+        supercat = (tipo_el.text or '').strip() if tipo_el is not None else ''
+        cap_el = articolo.find('capitolo')
+        cat = (cap_el.text or '').strip() if cap_el is not None else ''
+
+        voce_el = articolo.find('voce')
+        voce = (voce_el.text or '').strip() if voce_el is not None else ''
+        art_el = articolo.find('articolo')
+        art = (art_el.text or '').strip() if art_el is not None else ''
+        desc = self.clean_string(voce + ('\n- ' + art if art else ''))
+
+        um_el = articolo.find('um')
+        um = ''
+        if um_el is not None and um_el.text:
+            um = um_el.text.split('(')[-1].rstrip(')').strip()
+
+        prezzo_el = articolo.find('prezzo')
+        prezzo = 0.0
+        if prezzo_el is not None:
+            try:
+                prezzo = float(prezzo_el.attrib.get('valore', 0))
+            except (ValueError, TypeError):
+                pass
+
+        labor = 0.0
+        mo_el = articolo.find('mo')
+        if mo_el is not None and mo_el.text:
+            try:
+                labor = float(mo_el.text) * prezzo / 100
+            except (ValueError, TypeError):
+                pass
+
+        safety = 0.0
+        sic_el = articolo.find('sicurezza')
+        if sic_el is not None and sic_el.text:
+            try:
+                safety = float(sic_el.text)
+            except (ValueError, TypeError):
+                pass
+
+        return codice, supercat, cat, desc, um, prezzo, labor, safety
+
+
+def _decode_articolo_range(task):
+    """Pool worker of ParserXmlToscana.iter_items_parallel: decodes the Articolo elements in bytes [start, end)."""
+    import mmap
+    import xml.etree.ElementTree as ET
+
+    parser_class, filename, prolog, start, end = task
+    parser = parser_class()
+    with open(filename, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        body = data[start:end].translate(None, _CONTROL_BYTES)
+    root = ET.fromstring(prolog + body + b"</chunk>")
+    records = []
+    for articolo in root:
+        for el in articolo.iter():
+            if isinstance(el.tag, str) and "}" in el.tag:
+                el.tag = el.tag.rpartition("}")[-1]
+        if articolo.tag == "Articolo":
+            records.append(parser._decode_articolo(articolo))
+    return records
+
+
+class ParserXmlLombardia(PriceListParser):
+    def parse_items(self, xml_content):
+        xml_content = self.clean_xml_content(xml_content)
+        root = self.get_stripped_xml_namespaces_root(xml_content)
+        if root.find("voci/voci") is not None:
+            self._parse_format1(root)
+        else:
+            self._parse_format2(root)
+
+    def _parse_format1(self, root):
+        voci_voci = root.find("voci/voci")
+        rifvoce = voci_voci.find("riferimenti_voce") if voci_voci is not None else None
+        if rifvoce is not None:
+            import re
+            parts = [rifvoce.find(t) for t in ("autore", "invigore", "anno")]
+            self.title = " ".join(p.text for p in parts if p is not None and p.text)
+            anno = rifvoce.find("anno")
+            if anno is not None and anno.text:
+                m = re.search(r"\b(\d{4})\b", anno.text)
+                self.year = m.group(1) if m else ""
+
+        voci = root.find("voci")
+        if voci is None:
+            return
+
+        index = 0
+        level1_idx = {}   # codifica_I → list index
+        level2_idx = {}   # (codifica_I, codifica_II) → list index
+
+        for voce in voci:
+            children = list(voce)
+            if len(children) < 2:
+                continue
+            det = children[1]
+
+            codice = det.attrib.get("CMPcodifica_voce") or det.attrib.get("codice_voce", "")
+            desc_el = det.find("declaratoria_voce")
+            desc = self.clean_string(desc_el.text if desc_el is not None else "")
+            um = det.attrib.get("udm_voce") or det.attrib.get("unita_misura_voce", "")
+
+            try:
+                prezzo = float(det.attrib.get("prezzo_voce", 0))
+            except ValueError:
+                prezzo = 0.0
+
+            labor = 0.0
+            try:
+                labor = float(det.attrib.get("rapporto_RU_voce", 0)) * prezzo / 100
+            except ValueError:
+                pass
+            if not labor:
+                risorse = det.find("risorse")
+                if risorse is not None:
+                    for el in risorse:
+                        if el.attrib.get("tipologia_risorsa") == "MANODOPERA":
+                            try:
+                                labor = float(el.attrib.get("perc_importo_tipo_risorsa", 0)) * prezzo / 100
+                            except ValueError:
+                                pass
+                            break
+
+            lvl1_cod = det.attrib.get("codifica_I_livello_voce", "")
+            lvl1_des = det.attrib.get("declaratoria_I_livello_voce", "")
+            lvl2_cod = det.attrib.get("codifica_II_livello_voce", "")
+            lvl2_des = det.attrib.get("declaratoria_II_livello_voce", "")
+
+            if lvl1_cod and lvl1_cod not in level1_idx:
+                self.xml_rate_list.append({
+                    "index": index, "level": 0, "is_parent": True, "parents": "",
+                    "id": lvl1_cod, "name": lvl1_des, "desc": "", "unit": "",
+                    "value": 0.0, "labor": 0.0, "equipment": 0.0, "materials": 0.0, "safety": 0.0,
+                })
+                level1_idx[lvl1_cod] = index
+                index += 1
+
+            key2 = (lvl1_cod, lvl2_cod)
+            if lvl2_cod and lvl2_cod != lvl1_cod and key2 not in level2_idx:
+                sp_parent = str(level1_idx[lvl1_cod]) if lvl1_cod in level1_idx else ""
+                self.xml_rate_list.append({
+                    "index": index, "level": 1 if sp_parent else 0,
+                    "is_parent": True, "parents": sp_parent,
+                    "id": lvl2_cod, "name": lvl2_des, "desc": "", "unit": "",
+                    "value": 0.0, "labor": 0.0, "equipment": 0.0, "materials": 0.0, "safety": 0.0,
+                })
+                level2_idx[key2] = index
+                index += 1
+
+            parents_parts = []
+            if lvl1_cod in level1_idx:
+                parents_parts.append(str(level1_idx[lvl1_cod]))
+            if key2 in level2_idx:
+                parents_parts.append(str(level2_idx[key2]))
+
+            self.xml_rate_list.append({
+                "index": index, "level": len(parents_parts), "is_parent": False,
+                "parents": ",".join(parents_parts),
+                "id": codice, "name": desc, "desc": desc, "unit": um,
+                "value": prezzo, "labor": labor,
+                "equipment": 0.0, "materials": 0.0, "safety": 0.0,
+            })
+            index += 1
+
+    def _parse_format2(self, root):
+        try:
+            attrs = root.items()
+            if attrs:
+                self.title = attrs[0][-1].split(".")[0].replace(":", "_")
+        except Exception:
+            pass
+
+        index = 0
+        madre_index = None
+
+        for voce in list(root):
+            codice_el = voce.find("Codice")
+            if codice_el is None:
+                continue
+            codice = (codice_el.text or "").split(" - ")[0].strip()
+
+            desc_el = voce.find("Declaratoria")
+            desc = self.clean_string(desc_el.text if desc_el is not None else "")
+
+            um_el = voce.find("UM")
+            um = (um_el.text or "").strip() if um_el is not None else ""
+
+            if not um:
+                self.xml_rate_list.append({
+                    "index": index, "level": 0, "is_parent": True, "parents": "",
+                    "id": codice, "name": desc, "desc": desc, "unit": "",
+                    "value": 0.0, "labor": 0.0, "equipment": 0.0, "materials": 0.0, "safety": 0.0,
+                })
+                madre_index = index
+                index += 1
+            else:
+                prezzo = 0.0
+                try:
+                    t = voce.find("Prezzo").text.strip().replace(" €", "").replace(".", "").replace(",", ".")
+                    prezzo = float(t) if t else 0.0
+                except Exception:
+                    pass
+
+                labor = 0.0
+                try:
+                    t = voce.find("Rapporto_RU").text.strip().replace(" €", "").replace(".", "").replace(",", ".")
+                    labor = float(t) if t else 0.0
+                except Exception:
+                    pass
+
+                parents = str(madre_index) if madre_index is not None else ""
+                self.xml_rate_list.append({
+                    "index": index, "level": 1 if parents else 0, "is_parent": False,
+                    "parents": parents,
+                    "id": codice, "name": desc, "desc": desc, "unit": um,
+                    "value": prezzo, "labor": labor,
+                    "equipment": 0.0, "materials": 0.0, "safety": 0.0,
+                })
+                index += 1
+
+
+
+
+class ParserXpwe(PriceListParser):
+    """Parser per formato XPWE (Primus e compatibili)."""
+
+    streamable = True
+
+    @staticmethod
+    def _text(elem, path, default=""):
+        try:
+            found = elem.find(path)
+            return (found.text or default) if found is not None else default
+        except Exception:
+            return default
+
+    @staticmethod
+    def _float(text):
+        if not text:
+            return 0.0
+        try:
+            return float(text.replace(",", "."))
+        except (ValueError, TypeError):
+            return 0.0
+
+    def parse_items(self, xml_content):
+        xml_content = self.clean_xml_content(xml_content)
+        root = self.get_root(xml_content)
+
+        dati = root.find("PweDatiGenerali")
+        if dati is None:
+            try:
+                dati = list(root)[0].find("PweDatiGenerali")
+            except Exception:
+                return
+
+        self._parse_header(dati)
+        supercaps, caps = self._read_categories(dati)
+
+        misurazioni = root.find("PweMisurazioni")
+        if misurazioni is None:
+            try:
+                misurazioni = list(root)[0].find("PweMisurazioni")
+            except Exception:
+                return
+        if misurazioni is None or len(list(misurazioni)) == 0:
+            return
+
+        ep_root = list(misurazioni)[0]  # PweElencoPrezzi
+        self.xml_rate_list.extend(self._iter_ep_items(ep_root.findall("EPItem"), supercaps, caps))
+
+    def iter_items(self, source):
+        # Primus writes PweDatiGenerali before the price list, so the tree
+        # held at any time is the header or a single EPItem. The sections
+        # are found where parse_items looks: under the root or its first child
+        found = {"root_children": 0, "dati": False, "misurazioni": None, "elenco": None}
+
+        def select(path):
+            depth = len(path)
+            if depth == 2:
+                found["root_children"] += 1
+            section = depth == 2 or depth == 3 and found["root_children"] == 1
+            if path[-1] == "PweDatiGenerali" and section and not found["dati"]:
+                found["dati"] = True
+                return "end"
+            if path[-1] == "PweMisurazioni" and section and found["misurazioni"] is None:
+                found["misurazioni"] = path
+            elif found["elenco"] is None and path[:-1] == found["misurazioni"]:
+                found["elenco"] = path
+            elif path[-1] == "EPItem" and path[:-1] == found["elenco"]:
+                return "end"
+            return None
+
+        elements = self.iter_xml_paths(source, select)
+        for path, el in elements:
+            if path[-1] != "PweDatiGenerali":
+                return  # no header ahead of the price list: nothing, as in parse_items
+            self._parse_header(el)
+            supercaps, caps = self._read_categories(el)
+            break
+        else:
+            return
+        yield from self._iter_ep_items((el for _, el in elements), supercaps, caps)
+
+    def _iter_ep_items(self, ep_elements, supercaps, caps):
+        index = 0
+        spcap_to_index = {}  # SuperCapitolo ID → list index
+        cap_to_index = {}    # (id_spcap, id_cap) → list index
+
+        for ep in ep_elements:
+            if not ep.get("ID"):
+                continue
+
+            tariffa = self._text(ep, "Tariffa")
+            if self._text(ep, "Flags") == "134217728":
+                tariffa = "VDS_" + tariffa
+
+            name = self.clean_string(self._text(ep, "DesBreve") or self._text(ep, "DesRidotta"))
+            desc = self.clean_string(self._text(ep, "DesEstesa"))
+            unit = self._text(ep, "UnMisura")
+            prezzo_raw = self._text(ep, "Prezzo1")
+            prezzo = self._float(prezzo_raw) if prezzo_raw and prezzo_raw != "0" else 0.0
+
+            def incidenza(tag):
+                val = self._float(self._text(ep, tag))
+                return round(val * prezzo / 100, 6) if val else 0.0
+
+            id_spcap = self._text(ep, "IDSpCap")
+            id_cap = self._text(ep, "IDCap")
+
+            # create SuperCapitolo on first encounter
+            if id_spcap and id_spcap not in spcap_to_index:
+                sc = supercaps.get(id_spcap, {})
+                yield {
+                    "index": index, "level": 0, "is_parent": True, "parents": "",
+                    "id": sc.get("codice", ""), "name": sc.get("desc", ""),
+                    "desc": "", "unit": "", "value": 0.0,
+                    "labor": 0.0, "equipment": 0.0, "materials": 0.0, "safety": 0.0,
+                }
+                spcap_to_index[id_spcap] = index
+                index += 1
+
+            # create Capitolo on first encounter
+            cap_key = (id_spcap, id_cap)
+            if id_cap and cap_key not in cap_to_index:
+                cap = caps.get(id_cap, {})
+                sp_parent = str(spcap_to_index[id_spcap]) if id_spcap in spcap_to_index else ""
+                yield {
+                    "index": index, "level": 1 if sp_parent else 0,
+                    "is_parent": True, "parents": sp_parent,
+                    "id": cap.get("codice", ""), "name": cap.get("desc", ""),
+                    "desc": "", "unit": "", "value": 0.0,
+                    "labor": 0.0, "equipment": 0.0, "materials": 0.0, "safety": 0.0,
+                }
+                cap_to_index[cap_key] = index
+                index += 1
+
+            # build parents list for EPItem
+            parents_parts = []
+            if id_spcap in spcap_to_index:
+                parents_parts.append(str(spcap_to_index[id_spcap]))
+            if cap_key in cap_to_index:
+                parents_parts.append(str(cap_to_index[cap_key]))
+
+            yield {
+                "index": index,
+                "level": len(parents_parts),
+                "is_parent": False,
+                "parents": ",".join(parents_parts),
+                "id": tariffa,
+                "name": name,
+                "desc": desc,
+                "unit": unit,
+                "value": prezzo,
+                "labor": incidenza("IncMDO"),
+                "equipment": incidenza("IncATTR"),
+                "materials": incidenza("IncMAT"),
+                "safety": incidenza("IncSIC"),
+            }
+            index += 1
+
+    def _parse_header(self, dati):
+        try:
+            child = list(dati)[0]
+            content = list(child)[0] if list(child) else child
+            oggetto = self._text(content, "Oggetto")
+            if oggetto:
+                self.title = self.clean_string(oggetto)
+        except Exception:
+            pass
+
+    @staticmethod
+    def _read_categories(dati):
+        supercaps = {}
+        caps = {}
+        try:
+            cap_cat = dati.find("PweDGCapitoliCategorie")
+            if cap_cat is None:
+                return supercaps, caps
+
+            sc_found = cap_cat.find("PweDGSuperCapitoli")
+            if sc_found is not None:
+                for elem in sc_found:
+                    sc_id = elem.get("ID")
+                    if sc_id:
+                        supercaps[sc_id] = {
+                            "codice": ParserXpwe._text(elem, "Codice"),
+                            "desc": ParserXpwe._text(elem, "DesSintetica"),
+                        }
+
+            cap_found = cap_cat.find("PweDGCapitoli")
+            if cap_found is not None:
+                for elem in cap_found:
+                    cap_id = elem.get("ID")
+                    if cap_id:
+                        desc = ParserXpwe._text(elem, "DesSintetica")
+                        if desc == "Nuova voce":
+                            desc = ParserXpwe._text(elem, "DesEstesa")
+                        caps[cap_id] = {
+                            "codice": ParserXpwe._text(elem, "Codice"),
+                            "desc": desc,
+                        }
+        except Exception:
+            pass
+        return supercaps, caps
+
+
+class ParserXmlSix(PriceListParser):
+    """Parser per formato XML SIX."""
+
+    streamable = True
+
+    def __init__(self, language=None):
+        super().__init__()
+        self.language = language
+        self.default_list_id = None
+        self.list_ids = []
+
+    def parse_items(self, xml_content):
+        xml_content = self.clean_xml_content(xml_content)
+        root = self.get_stripped_xml_namespaces_root(xml_content)
+        prezzario = root.find("prezzario")
+        if prezzario is None:
+            return
+
+        prz_desc = prezzario.find("przDescrizione")
+        if prz_desc is not None:
+            self.title = self.clean_string(prz_desc.attrib.get("breve", ""))
+
+        self.default_list_id = self._get_default_quotazione_id(prezzario)
+        self.list_ids = [lista.attrib.get("listaQuotazioneId") for lista in prezzario.findall("listaQuotazione")]
+        units = self.get_units(prezzario)
+        products = prezzario.findall("prodotto")
+
+        self.xml_rate_list.extend(self._iter_product_items(products, units))
+
+    def iter_items(self, source):
+        # the elements are dropped as they stream, only the decoded products are
+        # kept: parents may come after their children, so the tree is built at the end
+        units = {}
+
+        def products():
+            tags = ("przDescrizione", "listaQuotazione", "unitaDiMisura", "prodotto")
+            for el in self.iter_stripped_xml_elements(source, tags):
+                if el.tag == "prodotto":
+                    yield el
+                elif el.tag == "unitaDiMisura":
+                    self._read_unit(units, el)
+                elif el.tag == "listaQuotazione":
+                    self.list_ids.append(el.attrib.get("listaQuotazioneId"))
+                    if self.default_list_id is None:
+                        self.default_list_id = self.list_ids[0]
+                else:
+                    self.title = self.clean_string(el.attrib.get("breve", ""))
+
+        # unitaDiMisura and listaQuotazione precede the products in SIX files
+        records = [self._decode_product(product, units) for product in products()]
+        yield from self._iter_record_items(records)
+
+    def _iter_product_items(self, products, units):
+        yield from self._iter_record_items([self._decode_product(product, units) for product in products])
+
+    def _iter_record_items(self, records):
+        """Yields decoded products depth-first, without sorting the whole list.
+
+        Each product hangs under its nearest existing prdId prefix, found with
+        dict lookups, so the build is linear in the number of products.
+        Siblings keep file order unless it breaks natural order ("9" before
+        "10"), in which case only that sibling group is sorted.
+        """
+        position = {record[0]: i for i, record in enumerate(records)}
+        children = {}
+        roots = []
+        for i, record in enumerate(records):
+            prefix = record[0]
+            while "." in prefix:
+                prefix = prefix.rpartition(".")[0]
+                parent = position.get(prefix)
+                if parent is not None:
+                    children.setdefault(parent, []).append(i)
+                    break
+            else:
+                roots.append(i)
+
+        index = 0
+        stack = [(i, "") for i in reversed(self._natural_order(roots, records))]
+        while stack:
+            i, parents = stack.pop()
+            record = records[i]
+            yield self._rate_from_record(index, parents, record)
+            if record[1]:
+                parents = parents + "," + str(index) if parents else str(index)
+            index += 1
+            if i in children:
+                stack.extend((c, parents) for c in reversed(self._natural_order(children[i], records)))
+
+    @staticmethod
+    def _natural_key(prdId):
+        import re
+        parts = re.split(r"(\d+)", prdId)
+        parts[1::2] = map(int, parts[1::2])
+        return parts
+
+    def _natural_order(self, indices, records):
+        if len(indices) < 2:
+            return indices
+        ids = [records[i][0] for i in indices]
+        # sibling codes ordered by (length, text), e.g. ".9" then ".10", need no sort
+        if all(len(a) < len(b) or (len(a) == len(b) and a <= b) for a, b in zip(ids, ids[1:])):
+            return indices
+        return sorted(indices, key=lambda i: self._natural_key(records[i][0]))
+
+    _COMPONENTS = {"incidenzaManodopera": 0, "incidenzaAttrezzatura": 1, "incidenzaMateriali": 2}
+
+    def _decode_product(self, product, units):
+        """Reads each child of product once.
+
+        Returns (prdId, is_parent, name, desc, unit, value, labor, equipment, materials, safety, values)
+        where values maps every listaQuotazioneId to its price when the file has more than one list.
+        """
+        desc = None
+        ratios = [None, None, None]
+        default_value = first_value = None
+        values = {} if len(self.list_ids) > 1 else None
+        is_parent = True
+        for child in product:
+            tag = child.tag
+            if tag == "prdQuotazione":
+                value = self._float(child.get("valore"))
+                if value != 0.0:
+                    is_parent = False
+                if first_value is None:
+                    first_value = value
+                if values is not None:
+                    values.setdefault(child.get("listaQuotazioneId"), value)
+                if default_value is None and self.default_list_id \
+                        and child.get("listaQuotazioneId") == self.default_list_id:
+                    default_value = value
+            elif tag == "prdDescrizione":
+                if desc is None:
+                    desc = child
+            elif tag in self._COMPONENTS:
+                slot = self._COMPONENTS[tag]
+                if ratios[slot] is None:
+                    ratios[slot] = self._float(child.text)
+
+        value = default_value if default_value is not None else (first_value or 0.0)
+        labor, equipment, materials = ((r or 0.0) * value / 100 for r in ratios)
+        return (
+            product.get("prdId", ""),
+            is_parent,
+            self.clean_string(desc.get("breve", "")) if desc is not None else "",
+            self.clean_string(desc.get("estesa", "")) if desc is not None else "",
+            units.get(product.get("unitaDiMisuraId", ""), ""),
+            value,
+            labor,
+            equipment,
+            materials,
+            self._float(product.get("onereSicurezza")) * value / 100,
+            values,
+        )
+
+    @staticmethod
+    def _rate_from_record(index, parents, record):
+        prdId, is_parent, name, desc, unit, value, labor, equipment, materials, safety, values = record
+        rate = {
+            "index": index,
+            "level": prdId.count("."),
+            "is_parent": is_parent,
+            "parents": parents,
+            "id": prdId,
+            "name": name,
+            "desc": desc,
+            "unit": unit,
+            "value": value,
+            "labor": labor,
+            "equipment": equipment,
+            "materials": materials,
+            "safety": safety,
+        }
+        if values:
+            rate["values"] = values  # one price per quotation list, see RateCatalog.value_columns
+        return rate
+
+    @staticmethod
+    def _float(text):
+        if not text:
+            return 0.0
+        try:
+            return float(text)
+        except ValueError:
+            return 0.0
+
+    def _get_default_quotazione_id(self, prezzario):
+        lista = prezzario.find("listaQuotazione")
+        if lista is not None:
+            return lista.attrib.get("listaQuotazioneId")
+        return None
+
+    @staticmethod
+    def get_units(prezzario):
+        units = {}
+        umList = prezzario.findall("unitaDiMisura")
+        for um in umList:
+            ParserXmlSix._read_unit(units, um)
+        return units
+
+    @staticmethod
+    def _read_unit(units, um):
+        attr = um.attrib
+        try:
+            sym = attr.get("simbolo", attr.get("udmId", ""))
+            units[attr["unitaDiMisuraId"]] = sym
+        except KeyError:
+            pass
+
+
+class ParserIfcCostSchedule(PriceListParser):
+    """Parser per IfcCostSchedule del progetto corrente; i file IFC esterni li legge ParserIfcStep."""
+
+    def parse_schedule(self, file, schedule_id):
+        from .valuation import labor_amount, schedule_valuation
+        schedule = file.by_id(int(schedule_id))
+        self.title = schedule.Name or f"Schedule {schedule_id}"
+        valuation = schedule_valuation(file, schedule)
+        tree = valuation.tree
+        rates = valuation.rate.tolist()
+
+        parents = []
+        for index, (cost_item, parent, level, is_leaf) in enumerate(
+            zip(tree.items, tree.parent.tolist(), tree.depth.tolist(), tree.is_leaf.tolist())
+        ):
+            if parent < 0:
+                parents.append("")
+            else:
+                parents.append(f"{parents[parent]},{parent}" if parents[parent] else str(parent))
+            self.xml_rate_list.append({
+                "index": index,
+                "ifc_id": cost_item.id(),
+                "level": level,
+                "is_parent": not is_leaf,
+                "parents": parents[index],
+                "id": cost_item.Identification or "",
+                "name": cost_item.Name or "",
+                "desc": cost_item.Description or "",
+                "unit": "",
+                "value": rates[index],
+                "labor": labor_amount(cost_item),
+                "equipment": 0.0,
+                "materials": 0.0,
+                "safety": 0.0,
+            })
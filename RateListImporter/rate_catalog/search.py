@@ -0,0 +1,95 @@
+"""Full-text search over a RateCatalog: id, name and description, accent folded."""
+
+import bisect
+import re
+import unicodedata
+
+import numpy as np
+
+_WORD = re.compile(r"[a-z0-9]+")
+# a query chunk such as "A01.02" or "TOS.1-3" is a code: it matches ids by prefix only
+_CODE = re.compile(r"^(?=.*\d)[a-z0-9]+(?:[./_-][a-z0-9]*)+$")
+
+
+def fold(text):
+    """Lower case without accents: "Città Perché" -> "citta perche"."""
+    return unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii").lower()
+
+
+class RateSearchIndex:
+    """Inverted index of the words in id, name and desc of every rate of a catalog.
+
+    Words are stored sorted, with the rows containing each of them in one
+    contiguous int32 array, so all the words starting with a prefix share a
+    single slice of it. search() answers in milliseconds on 100k rates.
+    """
+
+    FIELDS = ("id", "name", "desc")
+
+    def __init__(self, catalog):
+        from array import array
+
+        self.catalog = catalog
+        words = {}
+        word_ids = array("i")
+        rows = array("i")
+        for row in range(len(catalog)):
+            text = " ".join(catalog.string(field, row) for field in self.FIELDS)
+            for word in set(_WORD.findall(fold(text))):
+                word_ids.append(words.setdefault(word, len(words)))
+                rows.append(row)
+
+        self.words = sorted(words)
+        rank = np.empty(len(words), dtype=np.int32)
+        rank[[words[w] for w in self.words]] = np.arange(len(words), dtype=np.int32)
+        word_rank = rank[np.frombuffer(word_ids, dtype=np.int32)]
+        order = np.argsort(word_rank, kind="stable")  # rows stay ascending within a word
+        self.postings = np.frombuffer(rows, dtype=np.int32)[order]
+        self.offsets = np.zeros(len(words) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(word_rank, minlength=len(words)), out=self.offsets[1:])
+
+        ids = [fold(catalog.string("id", row)) for row in range(len(catalog))]
+        id_order = sorted(range(len(ids)), key=ids.__getitem__)
+        self.ids = [ids[i] for i in id_order]
+        self.id_rows = np.array(id_order, dtype=np.int32)
+
+    def prefix_mask(self, prefix):
+        """Boolean mask of the rows with a word starting with prefix."""
+        lo = bisect.bisect_left(self.words, prefix)
+        hi = bisect.bisect_left(self.words, prefix + "\x7f", lo)
+        mask = np.zeros(len(self.catalog), dtype=bool)
+        mask[self.postings[self.offsets[lo]:self.offsets[hi]]] = True
+        return mask
+
+    def code_mask(self, prefix):
+        """Boolean mask of the rows whose id starts with prefix."""
+        lo = bisect.bisect_left(self.ids, prefix)
+        hi = bisect.bisect_left(self.ids, prefix + "\x7f", lo)
+        mask = np.zeros(len(self.catalog), dtype=bool)
+        mask[self.id_rows[lo:hi]] = True
+        return mask
+
+    def search(self, query):
+        """Sorted rows matching every term of query.
+
+        A term matches a rate when one of its words starts with it; code-like
+        terms ("A01.02") match ids starting with them instead.
+        """
+        # masks rather than sorted sets: every step is a linear pass in C
+        result = np.ones(len(self.catalog), dtype=bool)
+        for chunk in fold(query).split():
+            if _CODE.match(chunk):
+                result &= self.code_mask(chunk)
+                continue
+            words = _WORD.findall(chunk)
+            if not words:
+                continue  # only punctuation
+            matched = self.prefix_mask(words[0])
+            for word in words[1:]:
+                matched &= self.prefix_mask(word)
+            result &= matched | self.code_mask(chunk)
+        return np.flatnonzero(result).astype(np.int32)
+
+    def with_ancestors(self, rows):
+        """Boolean mask of rows and all their parents, to keep the hierarchy visible."""
+        return self.catalog.with_ancestors(rows)
@@ -0,0 +1,23 @@
+"""The catalog behind the scene rate list, shared by the RateListImporter Blender scripts.
+
+RateListImporter publishes it on every import; BulkUpdateCostSchedule and
+the other scripts read the rates from it instead of from the scene list.
+The version grows with every publish, so indexes built on a catalog can
+tell when they are stale.
+"""
+
+_loaded = None
+_version = 0
+
+
+def publish_catalog(catalog):
+    """Makes catalog (or None) the one behind the scene rate list; returns its version."""
+    global _loaded, _version
+    _loaded = catalog
+    _version += 1
+    return _version
+
+
+def loaded_catalog():
+    """(catalog, version) of the last publish; catalog is None when nothing is loaded."""
+    return _loaded, _version
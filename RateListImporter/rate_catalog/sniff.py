@@ -0,0 +1,63 @@
+"""Detection of the price list format from the first bytes of a file."""
+
+from .parsers import (
+    ParserXmlBasilicata,
+    ParserXmlLiguria,
+    ParserXmlLombardia,
+    ParserXmlSix,
+    ParserXmlToscana,
+    ParserXmlVeneto,
+    ParserXpwe,
+)
+from .step import ParserIfcStep
+
+# (pattern, parser class, confidence) in priority order, from the Leeno pre-scan
+_XML_SIGNATURES = (
+    ("ISO-10303-21;", ParserIfcStep, 1.0),
+    ("PweDatiGenerali", ParserXpwe, 1.0),
+    ('xmlns="six.xsd"', ParserXmlSix, 1.0),
+    ('autore="Regione Toscana"', ParserXmlToscana, 0.9),
+    ('autore="Regione Calabria"', ParserXmlToscana, 0.9),
+    ('autore="Regione Campania"', ParserXmlToscana, 0.9),
+    ('autore="Regione Sardegna"', ParserXmlToscana, 0.9),
+    ('autore="Regione Liguria"', ParserXmlLiguria, 0.9),
+    ("rks=", ParserXmlVeneto, 0.6),
+    ("<settore cod=", ParserXmlVeneto, 0.8),
+    ("<pdf>Prezzario_Regione_Basilicata", ParserXmlBasilicata, 0.9),
+    ("<autore>Regione Lombardia", ParserXmlLombardia, 0.9),
+    ("<autore>LOM", ParserXmlLombardia, 0.7),
+)
+
+# bytes looked at first; the window grows x16 only while the match is ambiguous
+SNIFF_WINDOW = 64 * 1024
+
+
+def sniff_xml_parser(xml_content, window=SNIFF_WINDOW):
+    """Pick the parser from a bounded prefix of xml_content (str, bytes, mmap or CleanXmlSource).
+
+    Returns (parser_class, confidence). When no signature, or signatures of
+    different parsers, match in the prefix the window is widened, up to the
+    whole file; a parser still in conflict wins by priority with its
+    confidence split among the contenders.
+    """
+    size = len(xml_content)
+    encode = not isinstance(xml_content, str)
+    while True:
+        end = min(window, size)
+        matches = {}
+        for pattern, parser_class, confidence in _XML_SIGNATURES:
+            if matches.get(parser_class, 0.0) >= confidence:
+                continue
+            if xml_content.find(pattern.encode("utf8") if encode else pattern, 0, end) >= 0:
+                matches[parser_class] = confidence
+        if len(matches) == 1 or (matches and end >= size):
+            parser_class = next(iter(matches))
+            return parser_class, matches[parser_class] / len(matches)
+        if end >= size:
+            return None, 0.0
+        window *= 16
+
+
+def find_xml_parser(xml_content):
+    """From Leeno (thanks Giuserpe): pre-scans the XML to pick the right parser."""
+    return sniff_xml_parser(xml_content)[0]
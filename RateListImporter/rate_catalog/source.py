@@ -0,0 +1,116 @@
+"""Memory-mapped, cleaned byte stream that feeds the XML parsers."""
+
+_CONTROL_BYTES = bytes(range(0x00, 0x09)) + b"\x0b\x0c" + bytes(range(0x0E, 0x20)) + b"\x7f"
+_UNDECLARED_PREFIXES = (b"EASY", b"PRT")
+
+
+class CleanXmlSource:
+    """Byte stream over a memory-mapped XML file, ready to feed iterparse.
+
+    Control characters are deleted chunk by chunk (they never occur inside
+    UTF-8 multibyte sequences, so this matches clean_xml_content) and the
+    undeclared EASY/PRT prefixes of Toscana files get a namespace on the root
+    tag, as ParserXmlToscana._fix_namespace does. The file is never decoded
+    into a str and pages already handed to the parser are released.
+
+    progress(done, total), when set, is told the bytes consumed so far each
+    time a chunk is read or reached() is called; it may raise to stop the parse.
+    """
+
+    chunk_size = 1024 * 1024
+
+    def __init__(self, filename):
+        import mmap
+
+        self.filename = filename
+        self._file = open(filename, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # empty file
+            self._map = b""
+        self._pos = 0
+        self._pending = b""
+        self.progress = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if hasattr(self._map, "close"):
+            self._map.close()
+        self._file.close()
+
+    def __len__(self):
+        return len(self._map)
+
+    def find(self, sub, start=0, end=None):
+        # raw search on the mapped bytes, used to sniff the format without reading
+        if isinstance(sub, str):
+            sub = sub.encode("utf8")
+        return self._map.find(sub, start, len(self._map) if end is None else end)
+
+    def rfind(self, sub, start=0, end=None):
+        if isinstance(sub, str):
+            sub = sub.encode("utf8")
+        return self._map.rfind(sub, start, len(self._map) if end is None else end)
+
+    def search(self, pattern, start=0):
+        # compiled bytes regex over the mapped file, e.g. to find element boundaries
+        return pattern.search(self._map, start)
+
+    @property
+    def raw(self):
+        """The mapped file as it is on disk, for parsers that scan it with regexes."""
+        return self._map
+
+    def tell(self):
+        """Bytes of the file read so far, e.g. for progress."""
+        return min(self._pos, len(self._map))
+
+    def reached(self, position):
+        """Reports the bytes up to position as consumed, e.g. by a worker process reading the raw file."""
+        if self.progress is not None:
+            self.progress(min(position, len(self._map)), len(self._map))
+
+    def read(self, size=-1):
+        while size < 0 or len(self._pending) < size:
+            if not self._fill():
+                break
+        if size < 0:
+            data, self._pending = self._pending, b""
+        else:
+            data, self._pending = self._pending[:size], self._pending[size:]
+        return data
+
+    def _fill(self):
+        import mmap
+
+        start = self._pos
+        if start >= len(self._map):
+            return False
+        chunk = self._map[start:start + self.chunk_size].translate(None, _CONTROL_BYTES)
+        if start == 0:
+            chunk = self._fix_namespace(chunk)
+        self._pos = start + self.chunk_size
+        if hasattr(mmap, "MADV_DONTNEED") and self._pos <= len(self._map):
+            try:
+                self._map.madvise(mmap.MADV_DONTNEED, start, self.chunk_size)
+            except (OSError, ValueError):
+                pass
+        self._pending += chunk
+        self.reached(self._pos)
+        return True
+
+    @staticmethod
+    def _fix_namespace(chunk):
+        for prefix in _UNDECLARED_PREFIXES:
+            if b"<" + prefix + b":" in chunk and b"xmlns:" + prefix + b"=" not in chunk:
+                tag = b"<" + prefix + b":Prezzario>"
+                pos = chunk.find(tag)
+                if pos >= 0:
+                    ins = pos + len(tag) - 1
+                    chunk = chunk[:ins] + b' xmlns:' + prefix + b'="mynamespace"' + chunk[ins:]
+        return chunk
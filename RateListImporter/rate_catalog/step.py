@@ -0,0 +1,317 @@
+"""Cost schedules read straight from the STEP text of an IFC file, without ifcopenshell.
+
+Only the records of the cost entities are decoded: a regex over the
+memory-mapped file finds them, everything else (geometry, properties) is
+skipped unread, so a schedule of rates comes out of a model of hundreds of
+MB in the time it takes to scan it once.
+"""
+
+import re
+
+from .cost_tree import CostTree
+from .parsers import PriceListParser
+from .valuation import ScheduleValuation, labor_amount
+
+COST_ENTITIES = ("IFCCOSTSCHEDULE", "IFCCOSTITEM", "IFCCOSTVALUE", "IFCRELNESTS", "IFCRELASSIGNSTOCONTROL")
+# quantities and unit bases of the cost entities: a model has far more of these
+# than it has cost entities, so their records are only parsed when referenced
+DEFERRED_ENTITIES = (
+    "IFCQUANTITYLENGTH", "IFCQUANTITYAREA", "IFCQUANTITYVOLUME", "IFCQUANTITYCOUNT",
+    "IFCQUANTITYWEIGHT", "IFCQUANTITYTIME", "IFCQUANTITYNUMBER", "IFCMEASUREWITHUNIT",
+)
+
+# "IFC" is a literal prefix, which re searches for with a fast scan; every
+# record of the file has one, so the type check stays cheap
+_RECORD = re.compile(
+    rb"IFC(COSTSCHEDULE|COSTITEM|COSTVALUE|RELNESTS|RELASSIGNSTOCONTROL"
+    rb"|QUANTITY(?:LENGTH|AREA|VOLUME|COUNT|WEIGHT|TIME|NUMBER)|MEASUREWITHUNIT)\s*\("
+)
+_DEFERRED = {name[3:] for name in DEFERRED_ENTITIES}
+_INSTANCE = re.compile(rb"#(\d+)\s*=\s*$")
+# the rest of a record up to its ";", strings may hold ";" and quotes doubled
+_BODY = re.compile(rb"[^';]*(?:'[^']*(?:''[^']*)*'[^';]*)*;")
+# one findall group per token kind: string, ref, enum, typed name, number, ( ) $ *
+_TOKEN = re.compile(rb"'([^']*(?:''[^']*)*)'|(#)(\d+)|\.(\w+)\.|(\w+)\s*\(|([-+.\d][-+.\deE]*)|([()$*])")
+_ESCAPE = re.compile(r"\\X2\\((?:[0-9A-F]{4})+)\\X0\\|\\X4\\((?:[0-9A-F]{8})+)\\X0\\|\\X\\([0-9A-F]{2})|\\S\\(.)|\\\\")
+
+# attribute positions, IFC4 and IFC4X3
+_COST_SCHEDULE_NAME, _COST_SCHEDULE_DESC, _COST_SCHEDULE_ID = 2, 3, 5
+_COST_ITEM_NAME, _COST_ITEM_DESC, _COST_ITEM_ID, _COST_ITEM_VALUES, _COST_ITEM_QUANTITIES = 2, 3, 5, 7, 8
+_COST_VALUE_APPLIED, _COST_VALUE_BASIS, _COST_VALUE_CATEGORY = 2, 3, 6
+_COST_VALUE_OPERATOR, _COST_VALUE_COMPONENTS = 8, 9
+_QUANTITY_VALUE = 3
+_MEASURE_VALUE = 0
+_NESTS_RELATING, _NESTS_RELATED = 4, 5
+_CONTROL_RELATED, _CONTROL_RELATING = 4, 6
+
+
+class Ref(int):
+    """An #id instance reference."""
+
+
+class Typed:
+    """A typed value such as IFCMONETARYMEASURE(12.5)."""
+
+    __slots__ = ("type", "value")
+
+    def __init__(self, type, value):
+        self.type = type
+        self.value = value
+
+
+def _unescape(match):
+    utf16, utf32, latin1, high = match.groups()
+    if utf16:
+        return bytes.fromhex(utf16).decode("utf-16-be")
+    if utf32:
+        return bytes.fromhex(utf32).decode("utf-32-be")
+    if latin1:
+        return chr(int(latin1, 16))
+    if high:
+        return chr(ord(high) + 128)
+    return "\\"
+
+
+def decode_string(raw):
+    """Text of a STEP string literal without its quotes: '' and the \\X2\\ style escapes decoded."""
+    text = raw.replace(b"''", b"'").decode("utf8", "replace")
+    return _ESCAPE.sub(_unescape, text) if "\\" in text else text
+
+
+def parse_arguments(body):
+    """Arguments of a record, given its text after the opening "(" up to the ";".
+
+    The record may span lines and holds any mix of strings, numbers,
+    references, enums, typed values and lists; commas and blanks are
+    skipped by findall, which keeps the per token work to one tuple.
+    """
+    stack = [[]]
+    typed = [None]
+    for string, ref, number_ref, enum, name, number, symbol in _TOKEN.findall(body):
+        if symbol:
+            if symbol == b"(":
+                stack.append([])
+                typed.append(None)
+            elif symbol == b")":
+                values = stack.pop()
+                name = typed.pop()
+                if not stack:
+                    return values
+                stack[-1].append(Typed(name, values[0] if values else None) if name else values)
+            else:
+                stack[-1].append(None)
+        elif ref:
+            stack[-1].append(Ref(number_ref))
+        elif name:
+            stack.append([])
+            typed.append(name.decode("ascii").upper())
+        elif number:
+            stack[-1].append(float(number) if b"." in number or b"e" in number or b"E" in number else int(number))
+        elif enum:
+            stack[-1].append(enum.decode("ascii"))
+        else:
+            stack[-1].append(decode_string(string))
+    raise ValueError("unbalanced STEP record")
+
+
+def read_cost_entities(buf):
+    """Cost entities of a STEP file (bytes or mmap): {id: (type, arguments)}, types without the IFC prefix.
+
+    The DEFERRED_ENTITIES keep the bytes of their record in place of the
+    arguments until entity_arguments parses them.
+    """
+    entities = {}
+    pos = 0
+    while True:
+        match = _RECORD.search(buf, pos)
+        if match is None:
+            return entities
+        pos = match.end()
+        head = buf[max(0, match.start() - 24):match.start()]
+        instance = _INSTANCE.search(head)
+        if instance is None:
+            continue  # a type name inside another record, e.g. in a string
+        body = _BODY.match(buf, pos)
+        if body is None:
+            raise ValueError(f"unterminated STEP record at byte {match.start()}")
+        pos = body.end()
+        kind = match.group(1).decode("ascii")
+        entities[int(instance.group(1))] = (kind, body.group() if kind in _DEFERRED else parse_arguments(body.group()))
+
+
+def entity_arguments(entities, ref):
+    """Arguments of entity ref from read_cost_entities, parsing a deferred record once; None when ref was not read."""
+    entry = entities.get(ref)
+    if entry is None:
+        return None
+    kind, arguments = entry
+    if isinstance(arguments, bytes):
+        arguments = parse_arguments(arguments)
+        entities[ref] = (kind, arguments)
+    return arguments
+
+
+def _number(value):
+    if isinstance(value, Typed):
+        value = value.value
+    if isinstance(value, Ref) or not isinstance(value, (int, float)):
+        raise ValueError(value)
+    return float(value)
+
+
+def _attribute(arguments, index):
+    return arguments[index] if index < len(arguments) else None
+
+
+class ParserIfcStep(PriceListParser):
+    """Parser per file IFC esterni: legge dal testo STEP solo le entità di costo, senza ifcopenshell.
+
+    Ogni IfcCostSchedule diventa un capitolo di livello 0 con le sue voci
+    annidate sotto, come le mostra ParserIfcCostSchedule.
+    """
+
+    def parse_items(self, xml_content):
+        buf = getattr(xml_content, "raw", xml_content)
+        if isinstance(buf, str):
+            buf = buf.encode("utf8")
+        header = bytes(buf[:4096])
+        schema = re.search(rb"FILE_SCHEMA\s*\(\s*\(\s*'([^']*)'", header)
+        if schema and schema.group(1).upper().startswith(b"IFC2X"):
+            raise ValueError("IFC2X3 cost schedules are not supported, save the file as IFC4")
+        entities = read_cost_entities(buf)
+        self.xml_rate_list = list(self._rates(entities))
+
+    def _rates(self, entities):
+        nested = {}
+        controlled = {}
+        for rel_id in sorted(entities):
+            kind, arguments = entities[rel_id]
+            if kind == "RELNESTS":
+                nested.setdefault(_attribute(arguments, _NESTS_RELATING), []).extend(
+                    _attribute(arguments, _NESTS_RELATED) or []
+                )
+            elif kind == "RELASSIGNSTOCONTROL":
+                controlled.setdefault(_attribute(arguments, _CONTROL_RELATING), []).extend(
+                    _attribute(arguments, _CONTROL_RELATED) or []
+                )
+
+        def is_item(ref):
+            return entities.get(ref, ("",))[0] == "COSTITEM"
+
+        index = 0
+        for schedule_id in sorted(entities):
+            kind, arguments = entities[schedule_id]
+            roots = [ref for ref in controlled.get(schedule_id, []) if is_item(ref)] if kind == "COSTSCHEDULE" else []
+            if not roots:
+                continue
+            yield {
+                "index": index,
+                "level": 0,
+                "is_parent": True,
+                "parents": "",
+                "id": _attribute(arguments, _COST_SCHEDULE_ID) or "",
+                "name": _attribute(arguments, _COST_SCHEDULE_NAME) or f"Schedule {schedule_id}",
+                "desc": _attribute(arguments, _COST_SCHEDULE_DESC) or "",
+                "unit": "",
+                "value": 0.0,
+                "labor": 0.0,
+                "equipment": 0.0,
+                "materials": 0.0,
+                "safety": 0.0,
+            }
+            schedule_index = index
+            index += 1
+
+            # depth first without recursion: deep schedules cannot hit the recursion limit
+            items, parent, depth = [], [], []
+            stack = [(ref, -1, 0) for ref in reversed(roots)]
+            while stack:
+                item_id, parent_row, level = stack.pop()
+                row = len(items)
+                items.append(_StepCostItem(entities, item_id))
+                parent.append(parent_row)
+                depth.append(level)
+                stack.extend((ref, row, level + 1) for ref in reversed(nested.get(item_id, [])) if is_item(ref))
+            # the same valuation as ParserIfcCostSchedule, so both importers agree on a rate
+            valuation = ScheduleValuation(CostTree(items, parent, depth), _total_quantity)
+
+            parents = []
+            for row, (item, parent_row, level, is_leaf) in enumerate(
+                zip(items, parent, depth, valuation.tree.is_leaf.tolist())
+            ):
+                if parent_row < 0:
+                    parents.append(str(schedule_index))
+                else:
+                    parents.append(f"{parents[parent_row]},{schedule_index + 1 + parent_row}")
+                _, arguments = entities[item.id()]
+                yield {
+                    "index": index,
+                    "level": level + 1,
+                    "is_parent": not is_leaf,
+                    "parents": parents[row],
+                    "id": _attribute(arguments, _COST_ITEM_ID) or "",
+                    "name": _attribute(arguments, _COST_ITEM_NAME) or "",
+                    "desc": _attribute(arguments, _COST_ITEM_DESC) or "",
+                    "unit": "",
+                    "value": float(valuation.rate[row]),
+                    "labor": labor_amount(item),
+                    "equipment": 0.0,
+                    "materials": 0.0,
+                    "safety": 0.0,
+                }
+                index += 1
+
+
+def _measure(entities, value):
+    """Number of an IfcValue or of the ValueComponent of an IfcMeasureWithUnit reference, else None."""
+    if isinstance(value, Ref):
+        if entities.get(value, ("",))[0] != "MEASUREWITHUNIT":
+            return None
+        value = _attribute(entity_arguments(entities, value), _MEASURE_VALUE)
+    try:
+        return _number(value)
+    except ValueError:
+        return None
+
+
+def _total_quantity(item):
+    # as ifcopenshell.util.cost.get_total_quantity: the sum of the quantity values
+    return sum(item.CostQuantities)
+
+
+class _StepCostValue:
+    """An IfcCostValue record under the attribute names valuation.cost_value_amount reads."""
+
+    __slots__ = ("AppliedValue", "UnitBasis", "Category", "ArithmeticOperator", "Components")
+
+    def __init__(self, entities, ref):
+        arguments = entities[ref][1]
+        self.AppliedValue = _measure(entities, _attribute(arguments, _COST_VALUE_APPLIED))
+        self.UnitBasis = _measure(entities, _attribute(arguments, _COST_VALUE_BASIS))
+        self.Category = _attribute(arguments, _COST_VALUE_CATEGORY)
+        self.ArithmeticOperator = _attribute(arguments, _COST_VALUE_OPERATOR)
+        self.Components = _cost_values(entities, _attribute(arguments, _COST_VALUE_COMPONENTS))
+
+
+def _cost_values(entities, refs):
+    return [_StepCostValue(entities, ref) for ref in refs or [] if entities.get(ref, ("",))[0] == "COSTVALUE"]
+
+
+class _StepCostItem:
+    """An IfcCostItem record with the CostValues and CostQuantities ScheduleValuation reads."""
+
+    __slots__ = ("_id", "CostValues", "CostQuantities")
+
+    def __init__(self, entities, ref):
+        arguments = entities[ref][1]
+        self._id = ref
+        self.CostValues = _cost_values(entities, _attribute(arguments, _COST_ITEM_VALUES))
+        quantities = []
+        for quantity in _attribute(arguments, _COST_ITEM_QUANTITIES) or []:
+            value = _measure(entities, _attribute(entity_arguments(entities, quantity) or [], _QUANTITY_VALUE))
+            if value is not None:
+                quantities.append(value)
+        self.CostQuantities = quantities
+
+    def id(self):
+        return self._id
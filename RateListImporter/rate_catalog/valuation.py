@@ -0,0 +1,128 @@
+"""Rates, quantities and totals of a whole cost schedule, computed once per change of the file.
+
+Every tool that shows or compares prices reads them from here, so the
+PDF summary, the bulk update and the BoQ comparison agree on what a cost
+item is worth.
+"""
+
+import numpy as np
+
+from .cost_tree import cost_tree
+
+_OPERATORS = {
+    "ADD": lambda a, b: a + b,
+    "SUBTRACT": lambda a, b: a - b,
+    "MULTIPLY": lambda a, b: a * b,
+    "DIVIDE": lambda a, b: a / b if b else 0.0,
+}
+
+
+def _number(value):
+    # IfcValue (wrappedValue), IfcMeasureWithUnit (ValueComponent) or a plain number
+    if value is None:
+        return None
+    value = getattr(value, "ValueComponent", value)
+    value = getattr(value, "wrappedValue", value)
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def cost_value_amount(cost_value, children_total=0.0):
+    """Amount of one IfcCostValue per unit of its item.
+
+    The AppliedValue when set, else its Components combined with the
+    ArithmeticOperator (ADD when missing); a "*" Category stands for the
+    sum of the child items, children_total. A UnitBasis divides the amount
+    down to one unit.
+    """
+    if cost_value.Category == "*":
+        amount = children_total
+    else:
+        amount = _number(cost_value.AppliedValue)
+        if amount is None:
+            components = getattr(cost_value, "Components", None) or []
+            operator = _OPERATORS.get(getattr(cost_value, "ArithmeticOperator", None), _OPERATORS["ADD"])
+            amount = 0.0
+            for index, component in enumerate(components):
+                component = cost_value_amount(component, children_total)
+                amount = component if index == 0 else operator(amount, component)
+    basis = getattr(cost_value, "UnitBasis", None)
+    if basis is not None:
+        per = _number(basis)
+        if per:
+            amount /= per
+    return amount
+
+
+def labor_amount(cost_item):
+    """Labor share of the rate of cost_item: its first Labor component, per unit as cost_value_amount gives it."""
+    for cost_value in cost_item.CostValues or []:
+        for component in getattr(cost_value, "Components", None) or []:
+            if component.Category == "Labor":
+                amount = cost_value_amount(component)
+                per = _number(getattr(cost_value, "UnitBasis", None))
+                return amount / per if per else amount
+    return 0.0
+
+
+class ScheduleValuation:
+    """Rate, quantity, line total and subtotal of every row of a CostTree, in one post-order pass.
+
+    rate is the sum of the cost values of an item, quantity the total of
+    its CostQuantities and total their product. subtotal is what the item
+    contributes to its parent: its own total when it has quantities, else
+    the sum of the subtotals of its children. valued flags the items with
+    at least one cost value. get_total_quantity(item) defaults to the
+    ifcopenshell one.
+    """
+
+    def __init__(self, tree, get_total_quantity=None):
+        if get_total_quantity is None:
+            from ifcopenshell.util.cost import get_total_quantity
+
+        self.tree = tree
+        size = len(tree)
+        self.rate = np.zeros(size)
+        self.quantity = np.zeros(size)
+        self.total = np.zeros(size)
+        self.subtotal = np.zeros(size)
+        self.valued = np.zeros(size, dtype=bool)
+        children_total = np.zeros(size + 1)  # the last slot collects the roots
+        parent = tree.parent.tolist()
+        for row in range(size - 1, -1, -1):
+            item = tree.items[row]
+            values = item.CostValues or []
+            rate = sum(cost_value_amount(value, children_total[row]) for value in values)
+            quantities = item.CostQuantities
+            quantity = (get_total_quantity(item) or 0.0) if quantities else 0.0
+            total = rate * quantity
+            subtotal = total if quantities else children_total[row]
+            self.rate[row] = rate
+            self.quantity[row] = quantity
+            self.total[row] = total
+            self.subtotal[row] = subtotal
+            self.valued[row] = bool(values)
+            children_total[parent[row]] += subtotal
+        self.grand_total = float(children_total[-1])
+
+    def row(self, item):
+        return self.tree.row(item)
+
+    def rate_of(self, item):
+        """Rate of item, None when it has no cost value or is not in the schedule."""
+        row = self.tree.row(item)
+        return float(self.rate[row]) if row is not None and self.valued[row] else None
+
+    def subtotal_of(self, item):
+        row = self.tree.row(item)
+        return float(self.subtotal[row]) if row is not None else 0.0
+
+
+def schedule_valuation(file, schedule):
+    """ScheduleValuation of schedule (an IfcCostSchedule or its id), memoized with its CostTree."""
+    tree = cost_tree(file, schedule)
+    if tree.valuation is None:
+        tree.valuation = ScheduleValuation(tree)
+    return tree.valuation